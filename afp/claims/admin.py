@@ -1,9 +1,17 @@
 from django import forms
+from django.apps import apps
+from django.conf import settings
 from django.contrib import admin, messages
-from django.http import HttpResponseRedirect
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import render
 from django.urls import path, reverse
+from django.utils import timezone
 
+from . import exports, jobs, reports
+from .forms import WeightScenarioForm
+from .imports import CsvImport
+from .lookups import get_snapshot
 from .models import (
     ArticleType,
     Award,
@@ -19,11 +27,13 @@ from .models import (
     GrantCategory,
     GrantLink,
     GrantReview,
+    ImportJob,
     GrantReviewType,
     GrantRole,
     Journal,
     Lecture,
     LectureType,
+    PhysicianScore,
     Promotion,
     Publication,
     PublicationLink,
@@ -34,6 +44,8 @@ from .models import (
     SupervisionType,
     WorkFrequencyType,
 )
+from .scoring import simulate, simulation_rows
+from .search import GRANT_SEARCH, PUBLICATION_SEARCH
 
 admin.site.register(ArticleType)
 admin.site.register(AwardLevel)
@@ -50,12 +62,110 @@ admin.site.register(SupervisionType)
 admin.site.register(WorkFrequencyType)
 
 
+class LookupListFilter(admin.RelatedFieldListFilter):
+    """Changelist filter that lists a lookup table from the snapshot."""
+
+    def field_choices(self, field, request, model_admin):
+        return [
+            (obj.pk, str(obj))
+            for obj in get_snapshot().rows(field.related_model)
+        ]
+
+
+class FullTextSearchMixin:
+    """
+    Searches the changelist through `full_text_search` (see `search.py`)
+    instead of one ILIKE per search field and word.
+    """
+
+    full_text_search = None
+
+    def get_search_results(self, request, queryset, search_term):
+        return self.full_text_search.filter(queryset, search_term), False
+
+
 class CsvImportForm(forms.Form):
     csv_upload = forms.FileField()
+    dry_run = forms.BooleanField(
+        required=False, help_text="Report what would change without saving."
+    )
+
+
+class CsvImportMixin:
+    """
+    Adds an ``upload_csv/`` view queueing files for import with
+    `csv_import` (see `jobs`).
+    """
+
+    csv_import = None
+
+    def get_urls(self):
+        urls = super().get_urls()
+        new_urls = [
+            path(
+                "upload_csv/",
+                self.admin_site.admin_view(self.upload_csv),
+            ),
+        ]
+        return new_urls + urls
+
+    def upload_csv(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        form = CsvImportForm(request.POST or None, request.FILES or None)
+        if form.is_valid():
+            csv_file = form.cleaned_data["csv_upload"]
+
+            if not csv_file.name.endswith(".csv"):
+                messages.warning(request, "The wrong file type was uploaded")
+                return HttpResponseRedirect(request.path_info)
+
+            job = jobs.enqueue(
+                self.model,
+                csv_file,
+                user=request.user,
+                dry_run=form.cleaned_data["dry_run"],
+            )
+            if not settings.CLAIM_IMPORT_WORKER:
+                jobs.run_next(job.pk)
+            return HttpResponseRedirect(
+                reverse("admin:claims_importjob_change", args=[job.pk])
+            )
+
+        data = {"form": form}
+        return render(request, "admin/claims/csv_upload.html", data)
+
+
+class ExportMixin:
+    """Adds actions downloading the selected rows as a spreadsheet."""
+
+    actions = ["export_csv", "export_xlsx"]
+
+    def export(self, queryset, format):
+        content_type, chunks = exports.export(queryset, format)
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        filename = f"{self.model._meta.model_name}.{format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    @admin.action(
+        description="Export selected %(verbose_name_plural)s as CSV",
+        permissions=["view"],
+    )
+    def export_csv(self, request, queryset):
+        return self.export(queryset, "csv")
+
+    @admin.action(
+        description="Export selected %(verbose_name_plural)s as XLSX",
+        permissions=["view"],
+    )
+    def export_xlsx(self, request, queryset):
+        return self.export(queryset, "xlsx")
 
 
 @admin.register(Award)
-class AwardAdmin(admin.ModelAdmin):
+class AwardAdmin(ExportMixin, admin.ModelAdmin):
     """Administration object for Award models.
     Defines:
      - fields to be displayed in list view (list_display)
@@ -74,7 +184,7 @@ class AwardAdmin(admin.ModelAdmin):
         "ver_url",
         "decision_comments",
     ]
-    list_filter = ["eligible", "award_level"]
+    list_filter = ["eligible", ("award_level", LookupListFilter)]
     list_editable = ["cash_prize", "eligible", "decision_comments"]
 
     fieldsets = (
@@ -97,7 +207,7 @@ class AwardAdmin(admin.ModelAdmin):
 
 
 @admin.register(Promotion)
-class PromotionAdmin(admin.ModelAdmin):
+class PromotionAdmin(ExportMixin, admin.ModelAdmin):
 
     list_display = [
         "user_id",
@@ -108,7 +218,7 @@ class PromotionAdmin(admin.ModelAdmin):
         "ver_url",
         "decision_comments",
     ]
-    list_filter = ["eligible", "promoted_to"]
+    list_filter = ["eligible", ("promoted_to", LookupListFilter)]
     list_editable = ["eligible", "decision_comments"]
 
     fieldsets = (
@@ -128,47 +238,24 @@ class PromotionAdmin(admin.ModelAdmin):
 
 
 @admin.register(Journal)
-class JournalAdmin(admin.ModelAdmin):
-    def get_urls(self):
-        urls = super().get_urls()
-        new_urls = [
-            path("upload_csv/", self.upload_csv),
-        ]
-        return new_urls + urls
-
-    def upload_csv(self, request):
-
-        if request.method == "POST":
-            csv_file = request.FILES["csv_upload"]
-
-            if not csv_file.name.endswith(".csv"):
-                messages.warning(request, "The wrong file type was uploaded")
-                return HttpResponseRedirect(request.path_info)
-
-            file_data = csv_file.read().decode("utf-8")
-            csv_data = file_data.split("\n")
-
-            for x in csv_data:
-                fields = x.split(",")
-                created = Journal.objects.update_or_create(
-                    id=fields[0],
-                    name=fields[1],
-                    full_name=fields[2],
-                    issn=fields[3],
-                    eissn=fields[4],
-                    impact_factor=fields[5],
-                    isi_listed=fields[6].rstrip(),
-                )
-            url = reverse("admin:index")
-            return HttpResponseRedirect(url)
-
-        form = CsvImportForm()
-        data = {"form": form}
-        return render(request, "admin/claims/csv_upload.html", data)
+class JournalAdmin(CsvImportMixin, admin.ModelAdmin):
+    csv_import = CsvImport(
+        Journal,
+        [
+            "id",
+            "name",
+            "full_name",
+            "issn",
+            "eissn",
+            "impact_factor",
+            "isi_listed",
+        ],
+        keys=[("issn",)],
+    )
 
 
 @admin.register(PublicationLink)
-class PublicationLinkAdmin(admin.ModelAdmin):
+class PublicationLinkAdmin(ExportMixin, admin.ModelAdmin):
 
     list_display = [
         "publication",
@@ -201,7 +288,9 @@ class PublicationLinkInLineAdmin(admin.TabularInline):
 
 
 @admin.register(Publication)
-class PublicationAdmin(admin.ModelAdmin):
+class PublicationAdmin(
+    CsvImportMixin, ExportMixin, FullTextSearchMixin, admin.ModelAdmin
+):
     list_display = [
         "title",
         "eligible",
@@ -225,10 +314,12 @@ class PublicationAdmin(admin.ModelAdmin):
     list_filter = [
         "entry_type",
         "eligible",
-        "pub_type",
-        "article_type",
+        ("pub_type", LookupListFilter),
+        ("article_type", LookupListFilter),
         "is_epub",
     ]
+    search_fields = ["title", "authors", "chapter_title"]
+    full_text_search = PUBLICATION_SEARCH
     fieldsets = (
         (
             None,
@@ -252,55 +343,32 @@ class PublicationAdmin(admin.ModelAdmin):
     )
     inlines = [PublicationLinkInLineAdmin]
 
-    def get_urls(self):
-        urls = super().get_urls()
-        new_urls = [
-            path("upload_csv/", self.upload_csv),
-        ]
-        return new_urls + urls
-
-    def upload_csv(self, request):
-
-        if request.method == "POST":
-            csv_file = request.FILES["csv_upload"]
-
-            if not csv_file.name.endswith(".csv"):
-                messages.warning(request, "The wrong file type was uploaded")
-                return HttpResponseRedirect(request.path_info)
-
-            file_data = csv_file.read().decode("utf-8")
-            csv_data = file_data.split("\n")
-
-            for x in csv_data:
-                fields = x.split(",")
-                created = Publication.objects.update_or_create(
-                    pmid=fields[0],
-                    pub_type_id=fields[1],
-                    title=fields[2],
-                    authors=fields[3],
-                    article_type_id=fields[4],
-                    journal_id=fields[5],
-                    other_journal_name=fields[6],
-                    volume=fields[7],
-                    issue=fields[8],
-                    start_page=fields[9],
-                    end_page=fields[10],
-                    pub_year=fields[11],
-                    pub_month=fields[12],
-                    is_epub=fields[13],
-                    ver_url=fields[14],
-                    entry_type=fields[15].rstrip(),
-                )
-            url = reverse("admin:index")
-            return HttpResponseRedirect(url)
-
-        form = CsvImportForm()
-        data = {"form": form}
-        return render(request, "admin/claims/csv_upload.html", data)
+    csv_import = CsvImport(
+        Publication,
+        [
+            "pmid",
+            "pub_type",
+            "title",
+            "authors",
+            "article_type",
+            "journal",
+            "other_journal_name",
+            "volume",
+            "issue",
+            "start_page",
+            "end_page",
+            "pub_year",
+            "pub_month",
+            "is_epub",
+            "ver_url",
+            "entry_type",
+        ],
+        keys=[("pmid",), ("title", "pub_year")],
+    )
 
 
 @admin.register(EditorialBoard)
-class EditorialBoardAdmin(admin.ModelAdmin):
+class EditorialBoardAdmin(ExportMixin, admin.ModelAdmin):
 
     list_display = [
         "user_id",
@@ -333,7 +401,7 @@ class EditorialBoardAdmin(admin.ModelAdmin):
 
 
 @admin.register(GrantLink)
-class GrantLinkAdmin(admin.ModelAdmin):
+class GrantLinkAdmin(ExportMixin, admin.ModelAdmin):
 
     list_display = [
         "grant",
@@ -365,7 +433,9 @@ class GrantLinkInLineAdmin(admin.TabularInline):
 
 
 @admin.register(Grant)
-class GrantAdmin(admin.ModelAdmin):
+class GrantAdmin(
+    CsvImportMixin, ExportMixin, FullTextSearchMixin, admin.ModelAdmin
+):
     list_display = [
         "name",
         "eligible",
@@ -384,6 +454,8 @@ class GrantAdmin(admin.ModelAdmin):
     ]
     list_filter = ["eligible", "at_camh"]
     list_editable = ["at_camh", "eligible", "decision_comments"]
+    search_fields = ["name", "pi_list", "coi_list"]
+    full_text_search = GRANT_SEARCH
     fieldsets = (
         (
             None,
@@ -403,48 +475,25 @@ class GrantAdmin(admin.ModelAdmin):
     )
     inlines = [GrantLinkInLineAdmin]
 
-    def get_urls(self):
-        urls = super().get_urls()
-        new_urls = [
-            path("upload_csv/", self.upload_csv),
-        ]
-        return new_urls + urls
-
-    def upload_csv(self, request):
-
-        if request.method == "POST":
-            csv_file = request.FILES["csv_upload"]
-
-            if not csv_file.name.endswith(".csv"):
-                messages.warning(request, "The wrong file type was uploaded")
-                return HttpResponseRedirect(request.path_info)
-
-            file_data = csv_file.read().decode("utf-8")
-            csv_data = file_data.split("\n")
-
-            for x in csv_data:
-                fields = x.split(",")
-                created = Grant.objects.update_or_create(
-                    amount=fields[0],
-                    name=fields[1],
-                    pi_list=fields[2],
-                    coi_list=fields[3],
-                    at_camh=fields[4],
-                    agency_id=fields[5],
-                    other_grant_agency=fields[6],
-                    start_date=fields[7],
-                    end_date=fields[8].rstrip(),
-                )
-            url = reverse("admin:index")
-            return HttpResponseRedirect(url)
-
-        form = CsvImportForm()
-        data = {"form": form}
-        return render(request, "admin/claims/csv_upload.html", data)
+    csv_import = CsvImport(
+        Grant,
+        [
+            "amount",
+            "name",
+            "pi_list",
+            "coi_list",
+            "at_camh",
+            "agency",
+            "other_grant_agency",
+            "start_date",
+            "end_date",
+        ],
+        keys=[("name", "start_date")],
+    )
 
 
 @admin.register(GrantReview)
-class GrantReviewAdmin(admin.ModelAdmin):
+class GrantReviewAdmin(ExportMixin, admin.ModelAdmin):
 
     list_display = [
         "user_id",
@@ -461,7 +510,7 @@ class GrantReviewAdmin(admin.ModelAdmin):
         "ver_url",
         "decision_comments",
     ]
-    list_filter = ["entry_type", "eligible", "type"]
+    list_filter = ["entry_type", "eligible", ("type", LookupListFilter)]
     list_editable = ["is_member", "eligible", "decision_comments"]
 
     fieldsets = (
@@ -487,7 +536,7 @@ class GrantReviewAdmin(admin.ModelAdmin):
 
 
 @admin.register(CommitteeWork)
-class CommitteeWorkAdmin(admin.ModelAdmin):
+class CommitteeWorkAdmin(ExportMixin, admin.ModelAdmin):
 
     list_display = [
         "user_id",
@@ -520,7 +569,7 @@ class CommitteeWorkAdmin(admin.ModelAdmin):
 
 
 @admin.register(Lecture)
-class LectureAdmin(admin.ModelAdmin):
+class LectureAdmin(CsvImportMixin, ExportMixin, admin.ModelAdmin):
 
     list_display = [
         "user_id",
@@ -538,7 +587,12 @@ class LectureAdmin(admin.ModelAdmin):
         "ver_url",
         "decision_comments",
     ]
-    list_filter = ["entry_type", "eligible", "lecture_type", "is_cash"]
+    list_filter = [
+        "entry_type",
+        "eligible",
+        ("lecture_type", LookupListFilter),
+        "is_cash",
+    ]
     list_editable = ["eligible", "decision_comments"]
 
     fieldsets = (
@@ -560,50 +614,27 @@ class LectureAdmin(admin.ModelAdmin):
         ("Admin", {"fields": ("entry_type", "eligible", "decision_comments")}),
     )
 
-    def get_urls(self):
-        urls = super().get_urls()
-        new_urls = [
-            path("upload_csv/", self.upload_csv),
-        ]
-        return new_urls + urls
-
-    def upload_csv(self, request):
-
-        if request.method == "POST":
-            csv_file = request.FILES["csv_upload"]
-
-            if not csv_file.name.endswith(".csv"):
-                messages.warning(request, "The wrong file type was uploaded")
-                return HttpResponseRedirect(request.path_info)
-
-            file_data = csv_file.read().decode("utf-8")
-            csv_data = file_data.split("\n")
-
-            for x in csv_data:
-                fields = x.split(",")
-                created = Lecture.objects.update_or_create(
-                    user_id_id=fields[0],
-                    lecture_type_id=fields[1],
-                    name=fields[2],
-                    course_code=fields[3],
-                    start_date=fields[4],
-                    hours=fields[5],
-                    is_series=fields[6],
-                    num_sessions=fields[7],
-                    end_date=fields[8],
-                    eligible=fields[9],
-                    entry_type=fields[10],
-                )
-            url = reverse("admin:index")
-            return HttpResponseRedirect(url)
-
-        form = CsvImportForm()
-        data = {"form": form}
-        return render(request, "admin/claims/csv_upload.html", data)
+    csv_import = CsvImport(
+        Lecture,
+        [
+            "user_id",
+            "lecture_type",
+            "name",
+            "course_code",
+            "start_date",
+            "hours",
+            "is_series",
+            "num_sessions",
+            "end_date",
+            "eligible",
+            "entry_type",
+        ],
+        keys=[("user_id", "name", "start_date")],
+    )
 
 
 @admin.register(Exam)
-class ExamAdmin(admin.ModelAdmin):
+class ExamAdmin(CsvImportMixin, ExportMixin, admin.ModelAdmin):
 
     list_display = [
         "user_id",
@@ -618,7 +649,7 @@ class ExamAdmin(admin.ModelAdmin):
         "ver_url",
         "decision_comments",
     ]
-    list_filter = ["entry_type", "eligible", "exam_type"]
+    list_filter = ["entry_type", "eligible", ("exam_type", LookupListFilter)]
     list_editable = ["eligible", "decision_comments"]
 
     fieldsets = (
@@ -638,42 +669,19 @@ class ExamAdmin(admin.ModelAdmin):
         ("Admin", {"fields": ("entry_type", "eligible", "decision_comments")}),
     )
 
-    def get_urls(self):
-        urls = super().get_urls()
-        new_urls = [
-            path("upload_csv/", self.upload_csv),
-        ]
-        return new_urls + urls
-
-    def upload_csv(self, request):
-
-        if request.method == "POST":
-            csv_file = request.FILES["csv_upload"]
-
-            if not csv_file.name.endswith(".csv"):
-                messages.warning(request, "The wrong file type was uploaded")
-                return HttpResponseRedirect(request.path_info)
-
-            file_data = csv_file.read().decode("utf-8")
-            csv_data = file_data.split("\n")
-
-            for x in csv_data:
-                fields = x.split(",")
-                created = Exam.objects.update_or_create(
-                    user_id_id=fields[0],
-                    exam_type_id=fields[1],
-                    student_name=fields[2],
-                    date=fields[3],
-                    hours=fields[4],
-                    eligible=fields[5],
-                    entry_type=fields[6],
-                )
-            url = reverse("admin:index")
-            return HttpResponseRedirect(url)
-
-        form = CsvImportForm()
-        data = {"form": form}
-        return render(request, "admin/claims/csv_upload.html", data)
+    csv_import = CsvImport(
+        Exam,
+        [
+            "user_id",
+            "exam_type",
+            "student_name",
+            "date",
+            "hours",
+            "eligible",
+            "entry_type",
+        ],
+        keys=[("user_id", "exam_type", "student_name", "date")],
+    )
 
 
 @admin.register(Student)
@@ -703,7 +711,7 @@ class StudentAdmin(admin.ModelAdmin):
 
 
 @admin.register(Supervision)
-class SupervisionAdmin(admin.ModelAdmin):
+class SupervisionAdmin(CsvImportMixin, ExportMixin, admin.ModelAdmin):
 
     list_display = [
         "user_id",
@@ -718,7 +726,11 @@ class SupervisionAdmin(admin.ModelAdmin):
         "ver_url",
         "decision_comments",
     ]
-    list_filter = ["entry_type", "eligible", "supervision_type"]
+    list_filter = [
+        "entry_type",
+        "eligible",
+        ("supervision_type", LookupListFilter),
+    ]
     list_editable = ["eligible", "decision_comments"]
 
     fieldsets = (
@@ -738,46 +750,23 @@ class SupervisionAdmin(admin.ModelAdmin):
         ("Admin", {"fields": ("entry_type", "eligible", "decision_comments")}),
     )
 
-    def get_urls(self):
-        urls = super().get_urls()
-        new_urls = [
-            path("upload_csv/", self.upload_csv),
-        ]
-        return new_urls + urls
-
-    def upload_csv(self, request):
-
-        if request.method == "POST":
-            csv_file = request.FILES["csv_upload"]
-
-            if not csv_file.name.endswith(".csv"):
-                messages.warning(request, "The wrong file type was uploaded")
-                return HttpResponseRedirect(request.path_info)
-
-            file_data = csv_file.read().decode("utf-8")
-            csv_data = file_data.split("\n")
-
-            for x in csv_data:
-                fields = x.split(",")
-                created = Supervision.objects.update_or_create(
-                    user_id_id=fields[0],
-                    supervision_type_id=fields[1],
-                    student_name=fields[2],
-                    duration=fields[3],
-                    frequency_id=fields[4],
-                    eligible=fields[5],
-                    entry_type=fields[6],
-                )
-            url = reverse("admin:index")
-            return HttpResponseRedirect(url)
-
-        form = CsvImportForm()
-        data = {"form": form}
-        return render(request, "admin/claims/csv_upload.html", data)
+    csv_import = CsvImport(
+        Supervision,
+        [
+            "user_id",
+            "supervision_type",
+            "student_name",
+            "duration",
+            "frequency",
+            "eligible",
+            "entry_type",
+        ],
+        keys=[("user_id", "supervision_type", "student_name")],
+    )
 
 
 @admin.register(Cpa)
-class CpaAdmin(admin.ModelAdmin):
+class CpaAdmin(ExportMixin, admin.ModelAdmin):
 
     list_display = [
         "user_id",
@@ -803,3 +792,157 @@ class CpaAdmin(admin.ModelAdmin):
         ),
         ("Admin", {"fields": ("eligible", "cpa_value", "decision_comments")}),
     )
+
+
+@admin.register(PhysicianScore)
+class PhysicianScoreAdmin(admin.ModelAdmin):
+    """Read-only view of the score ledger maintained by the claim signals."""
+
+    list_display = ["user_id", "year", "category", "points", "claims"]
+    list_filter = ["year", "category"]
+    list_select_related = ["user_id"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        urls = super().get_urls()
+        new_urls = [
+            path(
+                "simulate/",
+                self.admin_site.admin_view(self.simulate),
+                name="claims_physicianscore_simulate",
+            ),
+            path(
+                "rollup/",
+                self.admin_site.admin_view(self.rollup),
+                name="claims_physicianscore_rollup",
+            ),
+        ]
+        return new_urls + urls
+
+    def rollup(self, request):
+        """Totals per division and rank for a year, from `reports`."""
+        try:
+            year = int(request.GET.get("year", timezone.localdate().year))
+        except ValueError:
+            year = timezone.localdate().year
+        if request.method == "POST":
+            reports.invalidate()
+            return HttpResponseRedirect(f"{request.path}?year={year}")
+        pub_types, tables = reports.report_tables(reports.cached_rollup(year))
+        data = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": f"Division and rank roll-up, {year}",
+            "year": year,
+            "pub_types": pub_types,
+            "tables": tables,
+        }
+        return render(request, "admin/claims/rollup_report.html", data)
+
+    def simulate(self, request):
+        """What-if page rescoring every physician under edited weights."""
+        form = WeightScenarioForm(request.POST or None)
+        rows = None
+        if form.is_valid():
+            rows = simulation_rows(
+                simulate(form.overrides(), year=form.cleaned_data["year"])
+            )
+        data = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Simulate weights",
+            "form": form,
+            "rows": rows,
+        }
+        return render(request, "admin/claims/simulate_scores.html", data)
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = [
+        "name",
+        "model",
+        "status",
+        "dry_run",
+        "progress",
+        "created",
+        "updated",
+        "rejected",
+        "created_by",
+        "created_at",
+    ]
+    list_filter = ["status", "model", "dry_run"]
+    actions = ["resume"]
+    fields = [
+        ("name", "model", "dry_run", "sha256"),
+        ("status", "progress", "line"),
+        ("created", "updated", "rejected"),
+        ("created_by", "created_at", "started_at", "finished_at"),
+        "failure",
+    ]
+    readonly_fields = [
+        "name",
+        "model",
+        "dry_run",
+        "sha256",
+        "status",
+        "progress",
+        "line",
+        "created",
+        "updated",
+        "rejected",
+        "created_by",
+        "created_at",
+        "started_at",
+        "finished_at",
+        "failure",
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Progress")
+    def progress(self, obj):
+        return f"{obj.progress}%"
+
+    def can_import(self, request, label):
+        """Whether the user may upload files into the model `label`."""
+        model_admin = self.admin_site._registry.get(apps.get_model(label))
+        return isinstance(
+            model_admin, CsvImportMixin
+        ) and model_admin.has_add_permission(request)
+
+    def has_resume_permission(self, request):
+        return any(
+            isinstance(model_admin, CsvImportMixin)
+            and model_admin.has_add_permission(request)
+            for model_admin in self.admin_site._registry.values()
+        )
+
+    @admin.action(
+        description="Resume selected failed imports", permissions=["resume"]
+    )
+    def resume(self, request, queryset):
+        labels = queryset.values_list("model", flat=True).distinct()
+        allowed = [
+            label for label in labels if self.can_import(request, label)
+        ]
+        failed = queryset.filter(
+            status=ImportJob.Status.FAILED, model__in=allowed
+        )
+        pks = list(failed.values_list("pk", flat=True))
+        count = failed.update(status=ImportJob.Status.QUEUED, failure="")
+        if settings.CLAIM_IMPORT_WORKER:
+            self.message_user(request, f"{count} import(s) queued to resume.")
+            return
+        for pk in pks:
+            jobs.run_next(pk)
+        self.message_user(request, f"{count} import(s) resumed.")
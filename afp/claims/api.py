@@ -0,0 +1,126 @@
+"""
+Read-only JSON export of every claim type, for downstream tools.
+
+Each claim section (see `dashboard.SECTIONS`) is served in
+``(modified_at, id)`` order with keyset pagination: a response holds up to
+``limit`` rows and ends with the cursor of its last row, which returns the
+rows after it on the next call. Because saving a claim moves it to the end
+of that order, a client that keeps its last cursor can come back later and
+receive the rows saved since. Rows are read through a server-side cursor
+and serialized as they stream out, so memory stays flat however many rows a
+response holds.
+
+`modified_at` is stamped before the transaction commits, so a row can
+become visible after rows stamped later than it. Rows are therefore only
+served once they are `CLAIM_SYNC_DELAY` seconds old, by which time their
+transaction has committed; a cursor never moves past a row that could
+still appear before it. Deletions are not reported: clients that must
+drop deleted claims have to re-read a section from the start.
+
+Publication and grant links carry the fields of their publication or grant,
+and every lookup key is accompanied by the lookup's name. Saving a
+publication or grant stamps its links as modified (see `signals`), so they
+are sent again with the new fields. Renaming a lookup row does not: clients
+that show lookup names should re-read them from the start after a rename.
+"""
+import datetime
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .dashboard import SECTIONS
+from .lookups import LOOKUP_MODELS, get_snapshot
+from .models import GrantLink, PublicationLink
+from .pagination import encode_cursor, keyset_filter
+
+ORDERING = "modified_at"
+CHUNK_SIZE = 2000
+DEFAULT_LIMIT = 10000
+MAX_LIMIT = 100000
+
+SECTIONS_BY_KEY = {section.key: section for section in SECTIONS}
+PARENTS = {PublicationLink: "publication", GrantLink: "grant"}
+
+
+def columns(model):
+    """
+    Return ``[(key, path, lookup model or None), ...]`` describing a row of
+    `model`: its fields, the fields of its publication or grant, and the name
+    of every lookup they point at.
+    """
+    result = []
+
+    def add(model, prefix=""):
+        for field in model._meta.concrete_fields:
+            if prefix and field.primary_key:
+                continue
+            path = prefix + field.name
+            key = path.replace("__", "_")
+            result.append((key, path, None))
+            if field.is_relation and field.related_model in LOOKUP_MODELS:
+                result.append((f"{key}_name", path, field.related_model))
+
+    add(model)
+    if model in PARENTS:
+        parent = PARENTS[model]
+        add(model._meta.get_field(parent).related_model, f"{parent}__")
+    return result
+
+
+def settled_before():
+    """
+    Return the time before which every saved row has been committed (see
+    `CLAIM_SYNC_DELAY`).
+    """
+    delay = getattr(settings, "CLAIM_SYNC_DELAY", 60)
+    return timezone.now() - datetime.timedelta(seconds=delay)
+
+
+def export(section, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Return an iterator over the JSON text of one response: up to `limit`
+    rows of `section` after `cursor`, and the cursor to continue from.
+
+    The cursor is checked straight away, raising `InvalidCursor`, but
+    nothing is read until the iterator is consumed.
+    """
+    cols = columns(section.model)
+    paths = list(dict.fromkeys(path for _, path, _ in cols))
+    queryset = section.model.objects.filter(
+        **{f"{ORDERING}__lte": settled_before()}
+    )
+    queryset = keyset_filter(queryset, ORDERING, cursor)
+    queryset = queryset.values(*paths)[: limit + 1]
+
+    def stream():
+        snapshot = get_snapshot()
+        encoder = DjangoJSONEncoder()
+        chunk, sent, last, more = [], 0, None, False
+        yield '{"results": ['
+        for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+            if sent + len(chunk) == limit:
+                more = True
+                break
+            item = {}
+            for key, path, lookup in cols:
+                value = row[path]
+                if lookup is not None and value is not None:
+                    value = str(snapshot.tables[lookup].get(value, ""))
+                item[key] = value
+            chunk.append(encoder.encode(item))
+            last = row
+            if len(chunk) == CHUNK_SIZE:
+                yield ("," if sent else "") + ",".join(chunk)
+                sent += len(chunk)
+                chunk = []
+        if chunk:
+            yield ("," if sent else "") + ",".join(chunk)
+        if last is not None:
+            next_cursor = encode_cursor(last[ORDERING], last["id"])
+        else:
+            next_cursor = cursor or None
+        yield "], " + json.dumps({"next": next_cursor, "more": more})[1:]
+
+    return stream()
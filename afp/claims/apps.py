@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ClaimsConfig(AppConfig):
     name = "afp.claims"
     verbose_name = "Claims"
+
+    def ready(self):
+        from . import signals  # noqa: F401
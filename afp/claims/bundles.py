@@ -0,0 +1,116 @@
+"""
+Zip bundles of the verification files attached to claims, for auditors.
+
+A bundle holds the ``ver_file`` of every claim of a physician, or of a
+claim section (optionally for one year), and the files of the publications
+and grants of publication and grant links. Files are read from the storage
+backend in chunks and compressed into the archive as they arrive (see
+`afp.utils.zipstream`), so a bundle never holds a file whole in memory or
+on disk. Files that have gone missing from storage are listed in
+``MISSING.txt`` at the end of the archive instead.
+"""
+import posixpath
+
+from django.db.models import Q
+from django.db.models.functions import ExtractYear
+
+from afp.utils.zipstream import CHUNK_SIZE, zip_chunks
+
+from .api import PARENTS
+from .scoring import RULES_BY_CATEGORY
+
+# Bytes fetched from Cloud Storage per request.
+BLOB_CHUNK_SIZE = 1024 * 1024
+
+
+def claims(section, users=None, year=None):
+    """Return the claims of `section` for the given physicians and year."""
+    queryset = section.model.objects.order_by()
+    if users is not None:
+        queryset = queryset.filter(user_id__in=users)
+    if year is not None:
+        rule = RULES_BY_CATEGORY.get(section.key)
+        date_field = rule.date_field if rule else "created_at"
+        queryset = queryset.alias(year=ExtractYear(date_field)).filter(
+            year=year
+        )
+    return queryset
+
+
+def files(sections, users=None, year=None):
+    """
+    Yield ``(name in the archive, storage, stored name)`` for every
+    verification file of the given sections, physicians and year.
+    """
+    for section in sections:
+        model = section.model
+        queryset = claims(section, users, year)
+        sources = [
+            ("", "pk", field.name, field)
+            for field in model._meta.concrete_fields
+            if field.name == "ver_file"
+        ]
+        if model in PARENTS:
+            parent = model._meta.get_field(PARENTS[model])
+            field = parent.related_model._meta.get_field("ver_file")
+            sources.append(
+                (
+                    f"{parent.name}/",
+                    parent.attname,
+                    f"{parent.name}__{field.name}",
+                    field,
+                )
+            )
+        for folder, key, path, field in sources:
+            rows = (
+                queryset.exclude(
+                    Q(**{path: ""}) | Q(**{f"{path}__isnull": True})
+                )
+                .values_list(key, path)
+                .distinct()
+                .order_by(key)
+            )
+            for pk, name in rows.iterator():
+                yield (
+                    f"{section.key}/{folder}{pk}-{posixpath.basename(name)}",
+                    field.storage,
+                    name,
+                )
+
+
+def stored_chunks(file):
+    """
+    Yield the content of an opened stored file in chunks, reading Cloud
+    Storage blobs directly rather than through a local copy.
+    """
+    blob = getattr(file, "blob", None)
+    with file:
+        if blob is not None:
+            source = blob.open("rb", chunk_size=BLOB_CHUNK_SIZE)
+        else:
+            source = file
+        with source:
+            while chunk := source.read(CHUNK_SIZE):
+                yield chunk
+
+
+def bundle(sections, users=None, year=None):
+    """
+    Return an iterator over the zip archive, as bytes, of the verification
+    files of the given sections, physicians and year. Nothing is read until
+    it is consumed.
+    """
+
+    def entries():
+        missing = []
+        for name, storage, stored_name in files(sections, users, year):
+            try:
+                file = storage.open(stored_name, "rb")
+            except FileNotFoundError:
+                missing.append(stored_name)
+                continue
+            yield name, stored_chunks(file)
+        if missing:
+            yield "MISSING.txt", "\n".join(missing).encode() + b"\n"
+
+    return zip_chunks(entries())
@@ -0,0 +1,148 @@
+"""
+Per-physician summary of every claim category for the home page.
+
+The claim counts per category and eligibility status and the physician's
+provisional points for the year (from the `PhysicianScore` ledger) are read
+in a single ``UNION ALL`` query, so the home page costs one round trip no
+matter how many claims or categories there are.
+"""
+from decimal import Decimal
+
+from django.db.models import (
+    CharField,
+    Count,
+    F,
+    IntegerField,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Cast
+
+from .mixins import AdminMixin
+from .models import (
+    Award,
+    CommitteeWork,
+    Cpa,
+    EditorialBoard,
+    Exam,
+    GrantLink,
+    GrantReview,
+    Lecture,
+    PhysicianScore,
+    Promotion,
+    PublicationLink,
+    Supervision,
+)
+
+Status = AdminMixin.EligibilityStatus
+
+
+class Section:
+    """A claim category shown on the dashboard."""
+
+    def __init__(self, key, label, model, url_name, status="eligible"):
+        self.key = key
+        self.label = label
+        self.model = model
+        self.url_name = url_name
+        self.status = status
+
+    def counts(self, user):
+        """Count the physician's claims per eligibility status."""
+        return (
+            self.model.objects.filter(user_id=user)
+            .values(
+                status=F(self.status),
+                section=Value(self.key, output_field=CharField()),
+            )
+            .annotate(
+                claims=Count("pk"),
+                points=Cast(Value(None), PhysicianScore.points.field),
+            )
+            .order_by()
+        )
+
+
+SECTIONS = (
+    Section("awards", "Awards", Award, "award_list"),
+    Section("promotions", "Promotions", Promotion, "promotion_list"),
+    Section(
+        "publications",
+        "Publications",
+        PublicationLink,
+        "publication_list",
+        status="publication__eligible",
+    ),
+    Section(
+        "editorial_boards",
+        "Editorial Boards",
+        EditorialBoard,
+        "editorial_board_list",
+    ),
+    Section(
+        "grants", "Grants", GrantLink, "grant_list", status="grant__eligible"
+    ),
+    Section("grant_reviews", "Grant Reviews", GrantReview, "grantreview_list"),
+    Section("committees", "Committee Work", CommitteeWork, "committee_list"),
+    Section("lectures", "Lectures", Lecture, "lecture_list"),
+    Section("exams", "Exams", Exam, "exam_list"),
+    Section("supervision", "Supervision", Supervision, "supervision_list"),
+    Section("cpa", "CPA", Cpa, "cpa_list"),
+)
+
+
+def ledger_points(user, year):
+    """The physician's points per category, shaped like `Section.counts`."""
+    return (
+        PhysicianScore.objects.filter(user_id=user, year=year)
+        .values(
+            status=Cast(Value(None), IntegerField()),
+            section=F("category"),
+        )
+        .annotate(
+            claims=Value(0, output_field=IntegerField()),
+            points=Sum("points"),
+        )
+        .order_by()
+    )
+
+
+def claim_summary(user, year):
+    """
+    Return ``(rows, total)``: one row per section with the number of claims
+    in each eligibility status and the provisional points for `year`, and
+    the sum of every row.
+    """
+    first, *rest = [section.counts(user) for section in SECTIONS]
+    union = first.union(*rest, ledger_points(user, year), all=True)
+
+    rows = {
+        section.key: {
+            "label": section.label,
+            "url_name": section.url_name,
+            "statuses": {status: 0 for status in Status.values},
+            "claims": 0,
+            "points": Decimal(0),
+        }
+        for section in SECTIONS
+    }
+    for result in union:
+        row = rows.get(result["section"])
+        if row is None:
+            continue
+        if result["status"] is None:
+            row["points"] += result["points"]
+        else:
+            row["statuses"][result["status"]] += result["claims"]
+            row["claims"] += result["claims"]
+
+    rows = list(rows.values())
+    for row in rows:
+        row["statuses"] = [row["statuses"][s] for s in Status.values]
+    total = {
+        "label": "Total",
+        "statuses": [sum(c) for c in zip(*(r["statuses"] for r in rows))],
+        "claims": sum(row["claims"] for row in rows),
+        "points": sum((row["points"] for row in rows), Decimal(0)),
+    }
+    return rows, total
@@ -0,0 +1,98 @@
+"""
+Spreadsheet exports of claims, for reviewers and finance staff.
+
+An export holds every field of a claim model, with the names of the lookups,
+journals and physicians it points at in place of their keys, and the fields
+of the publication or grant of publication and grant links. Rows are read
+through a server-side cursor and written out as they arrive (see
+`afp.utils.spreadsheets`), so an export of any size starts straight away
+and runs in constant memory.
+"""
+from django.contrib.auth import get_user_model
+from django.utils.text import capfirst
+
+from afp.utils.spreadsheets import csv_chunks, xlsx_chunks
+
+from .api import CHUNK_SIZE, PARENTS
+from .lookups import LOOKUP_MODELS, get_snapshot
+from .models import Journal
+
+FORMATS = {
+    "csv": ("text/csv", csv_chunks),
+    "xlsx": (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        xlsx_chunks,
+    ),
+}
+
+# Fields shown in place of a foreign key to other models than lookups.
+NAMES = {
+    Journal: ["full_name"],
+    get_user_model(): ["first_name", "last_name"],
+}
+
+
+def columns(model):
+    """
+    Return ``[(header, paths, lookup model or None), ...]`` describing an
+    exported row of `model`.
+    """
+    result = []
+
+    def add(model, prefix="", label=""):
+        for field in model._meta.concrete_fields:
+            if prefix and field.primary_key:
+                continue
+            path = prefix + field.name
+            header = label + capfirst(field.verbose_name)
+            related = field.related_model
+            if related in NAMES:
+                paths = [f"{path}__{name}" for name in NAMES[related]]
+            else:
+                paths = [path]
+            lookup = related if related in LOOKUP_MODELS else None
+            result.append((header, paths, lookup))
+
+    add(model)
+    if model in PARENTS:
+        parent = model._meta.get_field(PARENTS[model])
+        add(
+            parent.related_model,
+            f"{parent.name}__",
+            f"{capfirst(parent.verbose_name)} ",
+        )
+    return result
+
+
+def rows(queryset):
+    """Yield the header and then one row per object of `queryset`."""
+    cols = columns(queryset.model)
+    paths = [path for _, paths, _ in cols for path in paths]
+    snapshot = get_snapshot()
+    yield [header for header, _, _ in cols]
+    for values in queryset.values_list(*paths).iterator(CHUNK_SIZE):
+        values = iter(values)
+        row = []
+        for _, paths, lookup in cols:
+            parts = [next(values) for _ in paths]
+            if lookup is not None:
+                value = snapshot.tables[lookup].get(parts[0])
+                row.append(None if value is None else str(value))
+            elif len(parts) > 1:
+                row.append(" ".join(str(part) for part in parts if part))
+            else:
+                row.append(parts[0])
+        yield row
+
+
+def export(queryset, format):
+    """
+    Return ``(content type, chunks)``: the export of `queryset` in `format`
+    (a key of `FORMATS`) as an iterator of chunks. Nothing is read until the
+    iterator is consumed.
+    """
+    content_type, writer = FORMATS[format]
+    if format == "xlsx":
+        sheet = capfirst(queryset.model._meta.verbose_name_plural)
+        return content_type, writer(rows(queryset), sheet)
+    return content_type, writer(rows(queryset))
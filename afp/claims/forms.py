@@ -1,8 +1,18 @@
 from datetime import datetime
 
 from django import forms
-from django.forms.models import inlineformset_factory
+from django.core.exceptions import ValidationError
+from django.forms.models import (
+    BaseInlineFormSet,
+    ModelChoiceIterator,
+    inlineformset_factory,
+)
+from django.urls import reverse
 
+from .lookups import get_snapshot
+from .mixins import AdminMixin
+from .scoring import weight_models
+from .search import GRANT_SEARCH, PUBLICATION_SEARCH
 from .models import (
     Award,
     CommitteeWork,
@@ -10,17 +20,111 @@ from .models import (
     EditorialBoard,
     Exam,
     Grant,
+    GrantAgency,
     GrantLink,
     GrantReview,
     Lecture,
     Promotion,
     Publication,
     PublicationLink,
+    PublicationType,
     Student,
     Supervision,
 )
 
 
+class LookupChoiceIterator(ModelChoiceIterator):
+    """Iterates over a lookup table's rows from the lookup snapshot."""
+
+    def rows(self):
+        return get_snapshot().rows(self.queryset.model)
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in self.rows():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self.rows()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.rows())
+
+
+class LookupChoiceField(forms.ModelChoiceField):
+    """
+    A `ModelChoiceField` for lookup tables that renders and validates its
+    choices against the lookup snapshot instead of querying the database.
+    """
+
+    iterator = LookupChoiceIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        model = self.queryset.model
+        try:
+            if isinstance(value, model):
+                value = value.pk
+            return get_snapshot().get(model, model._meta.pk.to_python(value))
+        except (ValueError, TypeError, ValidationError, model.DoesNotExist):
+            raise ValidationError(
+                self.error_messages["invalid_choice"],
+                code="invalid_choice",
+                params={"value": value},
+            )
+
+
+TOM_SELECT = "https://cdn.jsdelivr.net/npm/tom-select@2.2.2/dist"
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    A select that only renders its selected option. Other options are
+    fetched from the JSON endpoint named `url` as the user types, so large
+    tables such as journals aren't shipped with every form.
+    """
+
+    def __init__(self, url, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+
+    class Media:
+        css = {"all": [f"{TOM_SELECT}/css/tom-select.bootstrap5.min.css"]}
+        js = [
+            f"{TOM_SELECT}/js/tom-select.complete.min.js",
+            "js/autocomplete.js",
+        ]
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context["widget"]["attrs"]["data-autocomplete-url"] = reverse(self.url)
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [
+            v for v in value if v not in self.choices.field.empty_values
+        ]
+        options = [
+            self.create_option(
+                name, "", self.choices.field.empty_label, False, 0
+            )
+        ]
+        if selected:
+            for obj in self.choices.queryset.filter(pk__in=selected):
+                options.append(
+                    self.create_option(
+                        name,
+                        self.choices.choice(obj)[0],
+                        self.choices.field.label_from_instance(obj),
+                        True,
+                        len(options),
+                    )
+                )
+        return [(None, options, 0)]
+
+
 class AwardForm(forms.ModelForm):
     class Meta:
         model = Award
@@ -33,6 +137,9 @@ class AwardForm(forms.ModelForm):
             "ver_url",
             "comments",
         ]
+        field_classes = {
+            "award_level": LookupChoiceField,
+        }
         widgets = {
             "ver_file": forms.ClearableFileInput(
                 attrs={
@@ -52,6 +159,9 @@ class PromotionForm(forms.ModelForm):
             "ver_url",
             "comments",
         ]
+        field_classes = {
+            "promoted_to": LookupChoiceField,
+        }
         widgets = {
             "ver_file": forms.ClearableFileInput(
                 attrs={
@@ -91,6 +201,10 @@ class PublicationForm(forms.ModelForm):
             "ver_file",
             "ver_url",
         ]
+        field_classes = {
+            "pub_type": LookupChoiceField,
+            "article_type": LookupChoiceField,
+        }
 
         widgets = {
             "ver_file": forms.ClearableFileInput(
@@ -98,6 +212,7 @@ class PublicationForm(forms.ModelForm):
                     "accept": "application/pdf, application/msword, application/vnd.openxmlformats-officedocument.wordprocessingml.document, image/jpeg, image/png"
                 }
             ),
+            "journal": AutocompleteSelect("journal_autocomplete"),
             "comments": forms.Textarea(attrs={"rows": 5}),
         }
 
@@ -108,16 +223,52 @@ class PublicationForm(forms.ModelForm):
                 self.add_error(field, msg)
 
 
+class BulkInlineFormSet(BaseInlineFormSet):
+    """
+    Inline formset saved with one ``DELETE``, one ``bulk_update`` and one
+    ``bulk_create`` however many rows it has.
+
+    Bulk writes skip the model signals, so the caller is responsible for
+    what they would have done (see `signals.links_saved`).
+    """
+
+    def save_bulk(self, instance):
+        """Save every row under `instance`, returning the saved objects."""
+        self.instance = instance
+        objs = self.save(commit=False)
+        created, updated = [], []
+        for obj in objs:
+            setattr(obj, self.fk.name, instance)
+            (created if obj._state.adding else updated).append(obj)
+
+        if self.deleted_objects:
+            self.model.objects.filter(
+                pk__in=[obj.pk for obj in self.deleted_objects]
+            ).delete()
+        if updated:
+            fields = {
+                name for _, names in self.changed_objects for name in names
+            }
+            self.model.objects.bulk_update(updated, sorted(fields))
+        if created:
+            self.model.objects.bulk_create(created)
+        return objs
+
+
 class PublicationLinkForm(forms.ModelForm):
     class Meta:
         model = PublicationLink
         fields = ["user_id", "role", "is_corresponding"]
+        field_classes = {
+            "role": LookupChoiceField,
+        }
 
 
 PublicationLinkFormSet = inlineformset_factory(
     Publication,
     PublicationLink,
     form=PublicationLinkForm,
+    formset=BulkInlineFormSet,
     extra=0,
     min_num=1,
     can_delete=True,
@@ -140,6 +291,7 @@ class EditorialBoardForm(forms.ModelForm):
                     "accept": "application/pdf, application/msword, application/vnd.openxmlformats-officedocument.wordprocessingml.document, image/jpeg, image/png"
                 }
             ),
+            "journal": AutocompleteSelect("journal_autocomplete"),
             "comments": forms.Textarea(attrs={"rows": 5}),
         }
 
@@ -175,6 +327,9 @@ class GrantForm(forms.ModelForm):
             "ver_file",
             "ver_url",
         ]
+        field_classes = {
+            "agency": LookupChoiceField,
+        }
         widgets = {
             "start_date": forms.DateInput(
                 attrs={
@@ -213,12 +368,16 @@ class GrantLinkForm(forms.ModelForm):
     class Meta:
         model = GrantLink
         fields = ["user_id", "role"]
+        field_classes = {
+            "role": LookupChoiceField,
+        }
 
 
 GrantLinkFormSet = inlineformset_factory(
     Grant,
     GrantLink,
     form=GrantLinkForm,
+    formset=BulkInlineFormSet,
     extra=0,
     min_num=1,
     can_delete=True,
@@ -240,6 +399,9 @@ class GrantReviewForm(forms.ModelForm):
             "ver_file",
             "ver_url",
         ]
+        field_classes = {
+            "type": LookupChoiceField,
+        }
 
         widgets = {
             "date": forms.DateInput(
@@ -296,6 +458,9 @@ class LectureForm(forms.ModelForm):
             "ver_file",
             "ver_url",
         ]
+        field_classes = {
+            "lecture_type": LookupChoiceField,
+        }
         widgets = {
             "start_date": forms.DateInput(
                 attrs={
@@ -355,6 +520,9 @@ class ExamForm(forms.ModelForm):
             "ver_file",
             "ver_url",
         ]
+        field_classes = {
+            "exam_type": LookupChoiceField,
+        }
         widgets = {
             "date": forms.DateInput(
                 attrs={
@@ -412,6 +580,10 @@ class SupervisionForm(forms.ModelForm):
             "ver_file",
             "ver_url",
         ]
+        field_classes = {
+            "supervision_type": LookupChoiceField,
+            "frequency": LookupChoiceField,
+        }
         widgets = {
             "ver_file": forms.ClearableFileInput(
                 attrs={
@@ -439,3 +611,126 @@ class CpaForm(forms.ModelForm):
             ),
             "comments": forms.Textarea(attrs={"rows": 5}),
         }
+
+
+class WeightScenarioForm(forms.Form):
+    """
+    One input per scoring weight, initialised with the current weight.
+    Used by the what-if simulator to describe a weighting scenario.
+    """
+
+    year = forms.IntegerField(required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        snapshot = get_snapshot()
+        self.weight_fields = {}
+        for model, field in weight_models().items():
+            for obj in snapshot.rows(model):
+                name = f"{model.__name__}-{obj.pk}"
+                self.fields[name] = forms.DecimalField(
+                    label=str(obj),
+                    initial=getattr(obj, field),
+                    min_value=0,
+                    required=False,
+                )
+                self.weight_fields[name] = (model, obj.pk, getattr(obj, field))
+
+    def groups(self):
+        """Return ``[(table name, [bound field, ...]), ...]`` for display."""
+        groups = {}
+        for name, (model, _pk, _weight) in self.weight_fields.items():
+            label = model._meta.verbose_name_plural.title()
+            groups.setdefault(label, []).append(self[name])
+        return list(groups.items())
+
+    def overrides(self):
+        """Return ``{lookup model: {pk: weight}}`` for every changed weight."""
+        overrides = {}
+        for name, (model, pk, weight) in self.weight_fields.items():
+            value = self.cleaned_data.get(name)
+            if value is not None and value != weight:
+                overrides.setdefault(model, {})[pk] = value
+        return overrides
+
+
+class ClaimFilterForm(forms.Form):
+    """
+    Search, filter and sort options of a department-wide claim table, read
+    from the query string.
+    """
+
+    sort_choices = ()
+    search = None
+    filter_fields = ()
+
+    q = forms.CharField(
+        label="Search",
+        required=False,
+        widget=forms.TextInput(attrs={"placeholder": "Search"}),
+    )
+    eligible = forms.TypedChoiceField(
+        choices=[("", "Any status")] + AdminMixin.EligibilityStatus.choices,
+        coerce=int,
+        empty_value=None,
+        required=False,
+    )
+    sort = forms.ChoiceField(required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["sort"].choices = self.sort_choices
+        for field in self.fields.values():
+            if isinstance(field.widget, forms.Select):
+                field.widget.attrs["class"] = "form-select"
+            else:
+                field.widget.attrs["class"] = "form-control"
+
+    def get_sort(self):
+        return self.cleaned_data.get("sort") or self.sort_choices[0][0]
+
+    def filter(self, queryset):
+        """Apply the search and filters to `queryset`."""
+        data = self.cleaned_data
+        if data.get("q"):
+            queryset = self.search.filter(queryset, data["q"])
+        for field in self.filter_fields + ("eligible",):
+            if data.get(field) is not None:
+                queryset = queryset.filter(**{field: data[field]})
+        return queryset
+
+
+class PublicationFilterForm(ClaimFilterForm):
+    sort_choices = [
+        ("title", "Title (A-Z)"),
+        ("-title", "Title (Z-A)"),
+        ("-created_at", "Newest first"),
+        ("created_at", "Oldest first"),
+    ]
+    search = PUBLICATION_SEARCH
+    filter_fields = ("pub_type",)
+    field_order = ["q", "pub_type", "eligible", "sort"]
+
+    pub_type = LookupChoiceField(
+        queryset=PublicationType.objects.all(),
+        empty_label="Any type",
+        required=False,
+    )
+
+
+class GrantFilterForm(ClaimFilterForm):
+    sort_choices = [
+        ("name", "Title (A-Z)"),
+        ("-name", "Title (Z-A)"),
+        ("-start_date", "Newest first"),
+        ("start_date", "Oldest first"),
+    ]
+    search = GRANT_SEARCH
+    filter_fields = ("agency",)
+    field_order = ["q", "agency", "eligible", "sort"]
+
+    agency = LookupChoiceField(
+        queryset=GrantAgency.objects.all(),
+        empty_label="Any agency",
+        required=False,
+    )
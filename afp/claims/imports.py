@@ -0,0 +1,436 @@
+"""
+CSV imports run from the admin.
+
+Each importable model declares a `CsvImport`: the model field read from
+each column and the natural keys identifying existing rows. Uploads are
+decoded and parsed with the `csv` module as they are read, so quoted values
+may contain commas and the file is never held in memory as a whole. Rows are
+validated against the model fields one by one; a row that does not validate
+is reported with its line number and skipped. The rest are written in
+batches of `BATCH_SIZE`, each costing one query per foreign key column and
+natural key to resolve them and one upsert, however many rows it holds.
+
+Each batch is committed on its own together with a checkpoint, so a long
+import shows its progress as it goes, and one that is interrupted resumes
+after the last batch written. Rows are matched on their natural keys, so
+importing the same file again updates the rows it created rather than
+duplicating them. A dry run rolls every batch back instead, so its report
+shows what a real import would do.
+"""
+import csv
+
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import DatabaseError, connection, models, transaction
+from django.db.models import Q
+from djmoney.models.fields import MoneyField
+from djmoney.money import Money
+
+from . import signals
+from .models import Journal
+
+BATCH_SIZE = 1000
+
+# Columns of the yearly journal list read by `refresh_journals`.
+JOURNAL_REFRESH_COLUMNS = [
+    "name",
+    "full_name",
+    "issn",
+    "eissn",
+    "impact_factor",
+    "isi_listed",
+]
+
+
+class ImportReport:
+    """
+    Counts of the rows written by an import and the rows rejected, and its
+    checkpoint: the last line read and the byte offset just past it.
+    """
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.created = 0
+        self.updated = 0
+        self.rejected = 0
+        self.errors = []
+        self.position = 0
+        self.line = 0
+
+    def error(self, line, message):
+        self.rejected += 1
+        self.errors.append((line, message))
+
+
+class RefreshReport(ImportReport):
+    """An `ImportReport` that also counts the rows left alone."""
+
+    def __init__(self, dry_run=False):
+        super().__init__(dry_run)
+        self.unchanged = 0
+        self.disappeared = 0
+
+
+def read_csv(upload, columns, position=0, line=0):
+    """
+    Yield ``(line number, row, offset)`` for every non-blank row of a
+    binary file from byte `position` on (`line` being the number of lines
+    before it), `offset` being where the next row starts. A header row
+    matching `columns` at the start of the file is skipped.
+    """
+    offset = position
+
+    def lines():
+        nonlocal offset
+        upload.seek(position)
+        for raw in iter(upload.readline, b""):
+            text = raw.decode("utf-8")
+            if offset == 0:
+                text = text.removeprefix("\ufeff")
+            offset += len(raw)
+            yield text
+
+    # csv.reader only reads as many lines as the next row needs, so
+    # `offset` always ends where the row just returned does.
+    reader = csv.reader(lines())
+    for row in reader:
+        number = line + reader.line_num
+        if not any(value.strip() for value in row):
+            continue
+        if number == 1 and [value.strip().lower() for value in row] == list(
+            columns
+        ):
+            continue
+        yield number, row, offset
+
+
+class Column:
+    """
+    A column of the file, read into model field `field`. A foreign key is
+    given by the primary key of the related row, or by its `to_field`.
+    """
+
+    def __init__(self, model, name):
+        self.name = name
+        field_name, _, to_field = name.partition("__")
+        self.field = model._meta.get_field(field_name)
+        self.attname = self.field.attname
+        if self.field.is_relation:
+            related = self.field.related_model._meta
+            self.to_field = to_field or related.pk.name
+            self.converter = related.get_field(self.to_field)
+        else:
+            self.to_field = None
+            self.converter = self.field
+
+    def clean(self, value):
+        """Convert and validate one value, raising `ValidationError`."""
+        field = self.field
+        value = value.strip()
+        if not value and (field.null or field.primary_key):
+            return None
+        if not value and field.has_default():
+            value = field.get_default()
+        if not value and self.to_field is not None:
+            raise ValidationError(field.error_messages["null"])
+        if self.to_field is not None:
+            # Existence is checked for the whole batch in `resolve`.
+            return self.converter.to_python(value)
+        if isinstance(field, MoneyField):
+            value = Money(value, field.default_currency)
+        return field.clean(value, None)
+
+    def resolve(self, batch, report):
+        """
+        Replace the values of this foreign key in `batch` by the primary
+        keys they refer to, returning the rows that refer to nothing.
+        """
+        wanted = {values[self.attname] for _, values in batch} - {None}
+        if not wanted:
+            return []
+        model = self.field.related_model
+        found = dict(
+            model._default_manager.filter(
+                **{f"{self.to_field}__in": wanted}
+            ).values_list(self.to_field, "pk")
+        )
+        missing = []
+        for line, values in batch:
+            value = values[self.attname]
+            if value is None:
+                continue
+            if value in found:
+                values[self.attname] = found[value]
+            else:
+                report.error(
+                    line,
+                    f"{self.name}: {model._meta.verbose_name} "
+                    f"{value!r} does not exist.",
+                )
+                missing.append(line)
+        return missing
+
+
+class CsvImport:
+    """
+    Import of `model` from CSV files whose columns are `columns`, in order:
+    model field names, with ``"field__attr"`` naming a foreign key by
+    another unique field of the related model. A row updates the object
+    matching it on the first of `keys` (tuples of field names) whose values
+    are all present, or that has its primary key if that is a column, and
+    creates one otherwise.
+    """
+
+    def __init__(self, model, columns, keys=(), batch_size=BATCH_SIZE):
+        self.model = model
+        self.names = list(columns)
+        self.columns = [Column(model, name) for name in columns]
+        self.batch_size = batch_size
+        pk = model._meta.pk
+        self.pk_column = pk.name in columns
+        self.keys = [
+            tuple(model._meta.get_field(name).attname for name in key)
+            for key in keys
+        ]
+        if self.pk_column and (pk.attname,) not in self.keys:
+            self.keys.insert(0, (pk.attname,))
+        self.update_fields = [
+            column.field.name
+            for column in self.columns
+            if not column.field.primary_key
+        ]
+        self.owned = any(f.name == "user_id" for f in model._meta.fields)
+
+    def clean(self, row):
+        """Return the model values of `row`, raising `ValidationError`."""
+        if len(row) != len(self.columns):
+            raise ValidationError(
+                f"Expected {len(self.columns)} columns, found {len(row)}."
+            )
+        values, errors = {}, []
+        for column, value in zip(self.columns, row):
+            try:
+                values[column.attname] = column.clean(value)
+            except ValidationError as e:
+                errors.extend(f"{column.name}: {m}" for m in e.messages)
+        if errors:
+            raise ValidationError(errors)
+        return values
+
+    def run(self, upload, report=None, progress=None):
+        """
+        Import a binary file, returning an `ImportReport`. Pass the last
+        report saved by `progress` to resume an interrupted import.
+
+        Each batch is committed with `progress` called in the same
+        transaction, so whatever `progress` saves is an exact checkpoint:
+        the rows before it are written, and none after it.
+        """
+        if report is None:
+            report = ImportReport()
+        batch, line, position = [], report.line, report.position
+        rows = read_csv(upload, self.names, position, line)
+        for line, row, position in rows:
+            try:
+                batch.append((line, self.clean(row)))
+            except ValidationError as e:
+                report.error(line, " ".join(e.messages))
+            if len(batch) == self.batch_size:
+                self.flush(batch, report, line, position, progress)
+                batch = []
+        self.flush(batch, report, line, position, progress)
+        if not report.dry_run:
+            self.reset_sequence()
+        report.errors.sort()
+        return report
+
+    def flush(self, batch, report, line, position, progress=None):
+        """Write one batch in its own transaction, and checkpoint."""
+        with transaction.atomic():
+            if batch:
+                self.write(batch, report)
+            report.line, report.position = line, position
+            if report.dry_run:
+                transaction.set_rollback(True)
+            elif progress is not None:
+                progress(report)
+        if report.dry_run and progress is not None:
+            progress(report)
+
+    def match(self, batch):
+        """
+        Set the primary key of every row of `batch` matching an existing
+        object, returning ``{pk: owner}`` for those objects (the owner
+        being None for models without one).
+        """
+        pk = self.model._meta.pk.attname
+        owner = ("user_id",) if self.owned else ()
+        existing = {}
+        for key in self.keys:
+            wanted = {
+                tuple(values[name] for name in key)
+                for _, values in batch
+                if values.get(pk) is None or key == (pk,)
+            }
+            wanted = {values for values in wanted if None not in values}
+            if not wanted:
+                continue
+            if len(key) == 1:
+                condition = Q(**{f"{key[0]}__in": [v for v, in wanted]})
+            else:
+                condition = Q()
+                for values in wanted:
+                    condition |= Q(**dict(zip(key, values)))
+            found = {}
+            rows = (
+                self.model._default_manager.filter(condition)
+                .order_by("pk")
+                .values_list("pk", *owner, *key)
+            )
+            key_columns = slice(1 + len(owner), None)
+            for row in rows:
+                existing[row[0]] = row[1] if owner else None
+                found.setdefault(row[key_columns], row[0])
+            for _, values in batch:
+                if key != (pk,) and values.get(pk) is not None:
+                    continue
+                match = found.get(tuple(values[name] for name in key))
+                if match is not None:
+                    values[pk] = match
+        return existing
+
+    def write(self, batch, report):
+        """Resolve, match and save one batch of cleaned rows."""
+        missing = set()
+        for column in self.columns:
+            if column.to_field is not None:
+                missing.update(column.resolve(batch, report))
+        batch = [
+            (line, values) for line, values in batch if line not in missing
+        ]
+        if not batch:
+            return
+        existing = self.match(batch)
+
+        # Later rows for the same object win.
+        pk = self.model._meta.pk.attname
+        upserts, new = {}, []
+        for line, values in batch:
+            if values.get(pk) is not None:
+                upserts[values[pk]] = values
+            else:
+                values.pop(pk, None)
+                new.append(values)
+
+        manager = self.model._default_manager
+        objs = [self.model(**values) for values in upserts.values()]
+        created = [self.model(**values) for values in new]
+        try:
+            with transaction.atomic():
+                if objs:
+                    manager.bulk_create(
+                        objs,
+                        update_conflicts=True,
+                        unique_fields=[self.model._meta.pk.name],
+                        update_fields=self.update_fields,
+                    )
+                if created:
+                    manager.bulk_create(created)
+        except DatabaseError as e:
+            for line, _ in batch:
+                report.error(line, str(e).strip())
+            return
+        updated = len(existing.keys() & upserts.keys())
+        report.updated += updated
+        report.created += len(upserts) - updated + len(new)
+
+        if report.dry_run:
+            return
+        written = objs + created
+        users = {existing[pk] for pk in existing.keys() & upserts.keys()}
+        if self.owned:
+            users.update(obj.user_id_id for obj in written)
+        signals.bulk_saved(self.model, [obj.pk for obj in written], users)
+
+    def reset_sequence(self):
+        """Move the id sequence past rows imported with an explicit id."""
+        if not (
+            self.pk_column
+            and isinstance(self.model._meta.pk, models.AutoField)
+        ):
+            return
+        sql = connection.ops.sequence_reset_sql(no_style(), [self.model])
+        with connection.cursor() as cursor:
+            for statement in sql:
+                cursor.execute(statement)
+
+
+def refresh_journals(upload, dry_run=False, batch_size=BATCH_SIZE):
+    """
+    Bring the journal catalogue in line with a yearly journal list (a binary
+    CSV file of `JOURNAL_REFRESH_COLUMNS`), returning a `RefreshReport`.
+
+    Rows are matched to journals on their ISSN, or their eISSN if they have
+    none, and compared with a snapshot of the catalogue read in one query.
+    Only journals whose values differ are updated and only unknown ones
+    created, so a refresh where little changed writes little. Journals
+    missing from the list are counted but kept, as claims refer to them.
+    """
+    csv_import = CsvImport(Journal, JOURNAL_REFRESH_COLUMNS)
+    fields = [column.attname for column in csv_import.columns]
+    report = RefreshReport(dry_run=dry_run)
+
+    stored, by_issn, by_eissn = {}, {}, {}
+    rows = Journal.objects.order_by("pk").values_list("pk", *fields)
+    for pk, *values in rows.iterator():
+        stored[pk] = tuple(values)
+        journal = dict(zip(fields, values))
+        if journal["issn"]:
+            by_issn.setdefault(journal["issn"], pk)
+        if journal["eissn"]:
+            by_eissn.setdefault(journal["eissn"], pk)
+
+    # Later rows for the same journal win.
+    seen, changed, new = set(), {}, {}
+    for line, row, _ in read_csv(upload, JOURNAL_REFRESH_COLUMNS):
+        try:
+            values = csv_import.clean(row)
+        except ValidationError as e:
+            report.error(line, " ".join(e.messages))
+            continue
+        issn, eissn = values["issn"], values["eissn"]
+        if not (issn or eissn):
+            report.error(line, "issn: A journal needs an ISSN or eISSN.")
+            continue
+        pk = by_issn.get(issn) or by_eissn.get(eissn)
+        if pk is None:
+            new[issn, eissn] = values
+            continue
+        seen.add(pk)
+        values = tuple(values[field] for field in fields)
+        if values == stored[pk]:
+            changed.pop(pk, None)
+        else:
+            changed[pk] = values
+
+    with transaction.atomic():
+        Journal.objects.bulk_update(
+            [
+                Journal(pk=pk, **dict(zip(fields, values)))
+                for pk, values in changed.items()
+            ],
+            fields,
+            batch_size=batch_size,
+        )
+        Journal.objects.bulk_create(
+            [Journal(**values) for values in new.values()],
+            batch_size=batch_size,
+        )
+        if dry_run:
+            transaction.set_rollback(True)
+    report.updated = len(changed)
+    report.created = len(new)
+    report.unchanged = len(seen) - len(changed)
+    report.disappeared = len(stored) - len(seen)
+    report.errors.sort()
+    return report
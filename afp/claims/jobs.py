@@ -0,0 +1,173 @@
+"""
+Queue of CSV imports, run outside the web process.
+
+Uploading a file in the admin only stores it and queues an `ImportJob`; the
+``process_imports`` command takes queued jobs one at a time and runs the
+model admin's `CsvImport` on them. Every committed batch checkpoints the
+job (counters, and the line and byte offset reached) in the same
+transaction, so the job page shows progress, and a job whose worker died or
+that failed resumes from its checkpoint instead of from the top. Jobs are
+claimed with ``SELECT ... FOR UPDATE SKIP LOCKED``, so any number of workers
+can share the queue without taking the same job twice.
+
+Files are identified by their SHA-256: uploading a file again while its
+previous import is unfinished resumes that import.
+
+Until a worker is deployed (`CLAIM_IMPORT_WORKER`), the admin runs each
+queued job itself, in the request that queued it.
+"""
+import hashlib
+import logging
+import traceback
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib import admin
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .imports import ImportReport
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+# Errors kept on a job for the admin page; the counters cover the rest.
+MAX_ERRORS = 1000
+
+
+def file_hash(upload):
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def enqueue(model, upload, user=None, dry_run=False):
+    """
+    Store an uploaded file and queue its import into `model`, or requeue
+    the unfinished import of the same file.
+    """
+    label = model._meta.label_lower
+    sha256 = file_hash(upload)
+    job = (
+        ImportJob.objects.filter(model=label, sha256=sha256, dry_run=dry_run)
+        .exclude(status=ImportJob.Status.DONE)
+        .first()
+    )
+    if job is not None:
+        ImportJob.objects.filter(
+            pk=job.pk, status=ImportJob.Status.FAILED
+        ).update(status=ImportJob.Status.QUEUED, failure="")
+        return job
+    return ImportJob.objects.create(
+        model=label,
+        file=upload,
+        name=upload.name,
+        size=upload.size,
+        sha256=sha256,
+        dry_run=dry_run,
+        created_by=user,
+    )
+
+
+def claim(pk=None):
+    """
+    Mark the oldest queued job, or a running job whose worker stopped
+    checkpointing it, as running and return it, or None. With `pk`, only
+    that job is considered.
+    """
+    stale = timezone.now() - timedelta(
+        seconds=settings.CLAIM_IMPORT_STALE_AFTER
+    )
+    with transaction.atomic():
+        job = (
+            ImportJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=ImportJob.Status.QUEUED)
+                | Q(status=ImportJob.Status.RUNNING, modified_at__lt=stale)
+            )
+            .filter(**({} if pk is None else {"pk": pk}))
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = ImportJob.Status.RUNNING
+        job.started_at = job.started_at or timezone.now()
+        job.save(update_fields=["status", "started_at", "modified_at"])
+    return job
+
+
+def csv_import_for(job):
+    model = apps.get_model(job.model)
+    return admin.site._registry[model].csv_import
+
+
+def checkpoint(job):
+    """Return the report of a job's last checkpoint."""
+    report = ImportReport(dry_run=job.dry_run)
+    report.position = job.position
+    report.line = job.line
+    report.created = job.created
+    report.updated = job.updated
+    report.rejected = job.rejected
+    report.errors = [tuple(error) for error in job.errors]
+    return report
+
+
+def save_progress(job, report):
+    job.position = report.position
+    job.line = report.line
+    job.created = report.created
+    job.updated = report.updated
+    job.rejected = report.rejected
+    job.errors = report.errors[:MAX_ERRORS]
+    job.save(
+        update_fields=[
+            "position",
+            "line",
+            "created",
+            "updated",
+            "rejected",
+            "errors",
+            "modified_at",
+        ]
+    )
+
+
+def run(job):
+    """
+    Run a claimed job to completion from its last checkpoint, recording how
+    it ended.
+    """
+    try:
+        with job.file.open("rb") as upload:
+            report = csv_import_for(job).run(
+                upload,
+                checkpoint(job),
+                progress=lambda report: save_progress(job, report),
+            )
+    except Exception:
+        logger.exception("Import job %s failed", job.pk)
+        job.refresh_from_db()
+        job.status = ImportJob.Status.FAILED
+        job.failure = traceback.format_exc()
+    else:
+        save_progress(job, report)
+        job.status = ImportJob.Status.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "failure", "finished_at", "modified_at"])
+    return job
+
+
+def run_next(pk=None):
+    """
+    Run the oldest queued job (or job `pk`, if queued), returning it, or
+    None if there is none.
+    """
+    job = claim(pk)
+    if job is not None:
+        run(job)
+    return job
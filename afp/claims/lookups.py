@@ -0,0 +1,140 @@
+"""
+In-process snapshot of the small lookup tables claims point at.
+
+Lookup rows (award levels, roles, lecture types, ...) almost never change, so
+every thread of a process shares one immutable snapshot of them instead of
+querying the database on each form render or scoring run. The snapshot is
+tagged with a version number kept in the default cache (see
+`afp.utils.versions`); saving or deleting a
+lookup row bumps that version once the transaction commits, and each process
+re-checks it at most every `LOOKUP_SNAPSHOT_CHECK_INTERVAL` seconds. With a
+cache shared by every instance (see the production settings) edits reach all
+gunicorn threads and Cloud Run instances within that interval.
+"""
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings
+from django.db import transaction
+
+from afp.accounts.models import Division, Rank
+from afp.utils import versions
+
+from .models import (
+    ArticleType,
+    AwardLevel,
+    ExamType,
+    GrantAgency,
+    GrantAgencyType,
+    GrantCategory,
+    GrantReviewType,
+    GrantRole,
+    LectureType,
+    PublicationRole,
+    PublicationType,
+    SupervisionType,
+    WorkFrequencyType,
+)
+
+LOOKUP_MODELS = (
+    ArticleType,
+    AwardLevel,
+    Division,
+    ExamType,
+    GrantAgency,
+    GrantAgencyType,
+    GrantCategory,
+    GrantReviewType,
+    GrantRole,
+    LectureType,
+    PublicationRole,
+    PublicationType,
+    Rank,
+    SupervisionType,
+    WorkFrequencyType,
+)
+
+VERSION_KEY = "claims:lookups:version"
+
+_lock = threading.Lock()
+_snapshot = None
+_checked_at = 0.0
+
+
+class LookupSnapshot:
+    """
+    Read-only copy of every lookup table at a given version.
+
+    The tables can't be changed, but the model instances in them are shared
+    by every thread of the process: callers must not modify them (copy one
+    first, or fetch it from the database, to edit it).
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.tables = MappingProxyType(
+            {
+                model: MappingProxyType(
+                    {obj.pk: obj for obj in model.objects.all()}
+                )
+                for model in LOOKUP_MODELS
+            }
+        )
+
+    def rows(self, model):
+        """Return every row of a lookup table in its default ordering."""
+        return tuple(self.tables[model].values())
+
+    def get(self, model, pk):
+        """Return one lookup row, raising `model.DoesNotExist` if missing."""
+        try:
+            return self.tables[model][pk]
+        except KeyError:
+            raise model.DoesNotExist(
+                f"{model.__name__} matching pk={pk!r} does not exist."
+            )
+
+
+def current_version():
+    """Return the shared lookup version, initialising it if needed."""
+    return versions.get_version(VERSION_KEY)
+
+
+def get_snapshot():
+    """Return the current lookup snapshot, rebuilding it if outdated."""
+    global _snapshot, _checked_at
+
+    snapshot = _snapshot
+    interval = getattr(settings, "LOOKUP_SNAPSHOT_CHECK_INTERVAL", 5)
+    if snapshot is not None and time.monotonic() - _checked_at < interval:
+        return snapshot
+    with _lock:
+        version = current_version()
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = LookupSnapshot(version)
+        _checked_at = time.monotonic()
+        return _snapshot
+
+
+def discard_snapshot():
+    """Drop this process' snapshot so the next read rebuilds it."""
+    global _snapshot
+
+    with _lock:
+        _snapshot = None
+
+
+def bump_version():
+    """Invalidate the lookup snapshot of every process."""
+    versions.bump_version(VERSION_KEY)
+    discard_snapshot()
+
+
+def lookup_changed(sender, **kwargs):
+    """
+    Bump the shared version, and discard the local snapshot, only once the
+    change is committed: a snapshot rebuilt earlier could hold rows that
+    are then rolled back, and would be kept under the current version.
+    """
+    transaction.on_commit(bump_version)
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from afp.claims.api import SECTIONS_BY_KEY
+from afp.claims.bundles import bundle
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the verification files of a physician or a claim section "
+        "to a zip archive."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Zip file to write.")
+        parser.add_argument(
+            "--user", type=int, help="Only files of this physician (id)."
+        )
+        parser.add_argument(
+            "--section",
+            choices=sorted(SECTIONS_BY_KEY),
+            help="Only files of this claim section.",
+        )
+        parser.add_argument(
+            "--year",
+            type=int,
+            help="Only files of claims counting towards this year.",
+        )
+
+    def handle(self, *args, **options):
+        if options["user"] is None and options["section"] is None:
+            raise CommandError("Give a --user or a --section.")
+        if options["section"] is None:
+            sections = SECTIONS_BY_KEY.values()
+        else:
+            sections = [SECTIONS_BY_KEY[options["section"]]]
+        users = None if options["user"] is None else [options["user"]]
+
+        size = 0
+        with open(options["output"], "wb") as output:
+            for chunk in bundle(sections, users, options["year"]):
+                output.write(chunk)
+                size += len(chunk)
+        self.stdout.write(f"Wrote {size} bytes to {options['output']}.")
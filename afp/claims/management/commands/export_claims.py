@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import ExtractYear
+
+from afp.claims.api import SECTIONS_BY_KEY
+from afp.claims.exports import FORMATS, export
+from afp.claims.scoring import RULES_BY_CATEGORY
+
+
+class Command(BaseCommand):
+    help = "Export every claim of one section as a CSV or XLSX spreadsheet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("section", choices=sorted(SECTIONS_BY_KEY))
+        parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+        parser.add_argument(
+            "--year",
+            type=int,
+            help="Only export claims counting towards this year.",
+        )
+        parser.add_argument(
+            "-o",
+            "--output",
+            help="File to write to. CSV is written to stdout by default.",
+        )
+
+    def handle(self, *args, **options):
+        section = SECTIONS_BY_KEY[options["section"]]
+        queryset = section.model.objects.order_by("pk")
+        if options["year"] is not None:
+            rule = RULES_BY_CATEGORY.get(section.key)
+            date_field = rule.date_field if rule else "created_at"
+            queryset = queryset.alias(year=ExtractYear(date_field)).filter(
+                year=options["year"]
+            )
+
+        if options["format"] != "csv" and not options["output"]:
+            raise CommandError("Give an --output file for XLSX exports.")
+        _, chunks = export(queryset, options["format"])
+        if options["output"]:
+            with open(options["output"], "wb") as output:
+                for chunk in chunks:
+                    output.write(
+                        chunk.encode() if isinstance(chunk, str) else chunk
+                    )
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
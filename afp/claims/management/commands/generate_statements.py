@@ -0,0 +1,78 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from afp.claims.statements import save_statements
+
+
+def init_worker():
+    """Give each pool worker its own app registry and DB connection."""
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Write every physician's annual statement PDF to statement storage, "
+        "sharding physicians across a pool of worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("year", type=int)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of worker processes (1 renders in-process).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=50,
+            help="Number of statements rendered per task.",
+        )
+
+    def handle(self, *args, **options):
+        year = options["year"]
+        chunk_size = options["chunk_size"]
+        users = list(
+            get_user_model()
+            .objects.filter(is_physician=True)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        chunks = [
+            users[slice(i, i + chunk_size)]
+            for i in range(0, len(users), chunk_size)
+        ]
+
+        started = time.monotonic()
+        statements = 0
+        if options["workers"] <= 1:
+            for chunk in chunks:
+                statements += save_statements(chunk, year)
+        else:
+            # Forked workers must not share the parent's open connection.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options["workers"], initializer=init_worker
+            ) as pool:
+                futures = [
+                    pool.submit(save_statements, chunk, year)
+                    for chunk in chunks
+                ]
+                for future in as_completed(futures):
+                    statements += future.result()
+        elapsed = max(time.monotonic() - started, 1e-9)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {statements} statements in {elapsed:.2f}s "
+                f"({statements / elapsed:.1f} statements/sec)."
+            )
+        )
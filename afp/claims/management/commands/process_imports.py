@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from afp.claims import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the CSV imports queued from the admin. Several workers can run "
+        "side by side; each job is taken by exactly one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of waiting for jobs.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.CLAIM_IMPORT_POLL_INTERVAL,
+            help="Seconds to wait before checking an empty queue again.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                job = jobs.run_next()
+                if job is not None:
+                    self.stdout.write(
+                        f"{job}: {job.created} created, {job.updated} "
+                        f"updated, {job.rejected} rejected."
+                    )
+                elif options["once"]:
+                    break
+                else:
+                    # Drop a connection the database may time out while idle.
+                    close_old_connections()
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from afp.claims.imports import JOURNAL_REFRESH_COLUMNS, refresh_journals
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh journal impact factors and ISI listings from the yearly "
+        "journal list, a CSV file with the columns "
+        + ", ".join(JOURNAL_REFRESH_COLUMNS)
+        + ". Only journals that changed are written."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file of the journal list.")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would change without writing anything.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            upload = open(options["path"], "rb")
+        except OSError as e:
+            raise CommandError(e)
+        with upload:
+            report = refresh_journals(upload, dry_run=options["dry_run"])
+        for line, message in report.errors:
+            self.stderr.write(f"Line {line}: {message}")
+        self.stdout.write(
+            f"{report.unchanged} unchanged, {report.updated} updated, "
+            f"{report.created} new, {report.disappeared} disappeared, "
+            f"{report.rejected} rejected."
+            + (" Dry run: nothing was saved." if report.dry_run else "")
+        )
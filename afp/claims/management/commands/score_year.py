@@ -0,0 +1,118 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.functions import ExtractYear
+
+from afp.claims import reports
+from afp.claims.models import PhysicianScore
+from afp.claims.scoring import RULES, refresh_scores
+
+
+def score_chunk(users, year):
+    """Score one shard of physicians; runs inside a pool worker."""
+    scores = refresh_scores(users, year=year)
+    return len(users), sum(claims for _points, claims in scores.values())
+
+
+def users_to_score(year=None):
+    """
+    Return the pks of every physician, and of anyone else (e.g. scientists)
+    with claims or ledger rows in `year`, whose ledger must be rebuilt.
+    """
+    scores = PhysicianScore.objects.filter(user_id=OuterRef("pk"))
+    if year is not None:
+        scores = scores.filter(year=year)
+    condition = Q(is_physician=True) | Q(Exists(scores))
+    for rule in RULES:
+        claims = rule.model.objects.filter(user_id=OuterRef("pk"))
+        if year is not None:
+            claims = claims.alias(year=ExtractYear(rule.date_field)).filter(
+                year=year
+            )
+        condition |= Q(Exists(claims))
+    return list(
+        get_user_model()
+        .objects.filter(condition)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def init_worker():
+    """Give each pool worker its own app registry and DB connection."""
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the PhysicianScore ledger of every physician, and of "
+        "anyone else with claims, sharding them across a pool of worker "
+        "processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "year",
+            type=int,
+            nargs="?",
+            help="Only rescore claims counting towards this year.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of worker processes (1 scores in-process).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=100,
+            help="Number of physicians scored per task.",
+        )
+
+    def handle(self, *args, **options):
+        year = options["year"]
+        chunk_size = options["chunk_size"]
+        users = users_to_score(year)
+        chunks = [
+            users[slice(i, i + chunk_size)]
+            for i in range(0, len(users), chunk_size)
+        ]
+
+        started = time.monotonic()
+        physicians = claims = 0
+        if options["workers"] <= 1:
+            for chunk in chunks:
+                scored, chunk_claims = score_chunk(chunk, year)
+                physicians += scored
+                claims += chunk_claims
+        else:
+            # Forked workers must not share the parent's open connection.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options["workers"], initializer=init_worker
+            ) as pool:
+                futures = [
+                    pool.submit(score_chunk, chunk, year) for chunk in chunks
+                ]
+                for future in as_completed(futures):
+                    scored, chunk_claims = future.result()
+                    physicians += scored
+                    claims += chunk_claims
+        elapsed = max(time.monotonic() - started, 1e-9)
+        reports.invalidate()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Scored {physicians} physicians and {claims} claims in "
+                f"{elapsed:.2f}s ({physicians / elapsed:.1f} physicians/sec, "
+                f"{claims / elapsed:.1f} claims/sec)."
+            )
+        )
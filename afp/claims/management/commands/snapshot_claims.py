@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Write every claim table and its dimensions as Parquet datasets "
+        "for offline analysis. Needs pyarrow (the analytics extra)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Directory to write to.")
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help=(
+                "Only append the rows modified since the last snapshot in "
+                "the directory, where the table allows it."
+            ),
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Number of rows read and written at a time.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            from afp.claims.snapshots import snapshot
+        except ImportError as e:
+            raise CommandError(
+                f"{e}. Install the analytics extra: "
+                'pip install "afp_app[analytics]"'
+            )
+
+        started = time.monotonic()
+        written = snapshot(
+            options["output"],
+            incremental=options["incremental"],
+            chunk_size=options["chunk_size"],
+        )
+        elapsed = time.monotonic() - started
+        for table, rows in written.items():
+            self.stdout.write(f"{table}: {rows} rows")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {sum(written.values())} rows of {len(written)} "
+                f"tables in {elapsed:.2f}s."
+            )
+        )
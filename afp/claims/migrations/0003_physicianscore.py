@@ -0,0 +1,66 @@
+# Generated by Django 4.2.6 on 2026-10-18 15:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        (
+            "claims",
+            "0002_alter_award_ver_file_alter_committeework_ver_file_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PhysicianScore",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("category", models.CharField(max_length=50)),
+                ("year", models.IntegerField()),
+                (
+                    "points",
+                    models.DecimalField(
+                        decimal_places=2, default=0, max_digits=12
+                    ),
+                ),
+                (
+                    "claims",
+                    models.IntegerField(
+                        default=0, verbose_name="# Eligible Claims"
+                    ),
+                ),
+                ("modified_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user_id",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Physician",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["user_id", "year", "category"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="physicianscore",
+            constraint=models.UniqueConstraint(
+                fields=("user_id", "category", "year"),
+                name="unique_physician_score",
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.6 on 2026-10-18 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("claims", "0003_physicianscore"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="grant",
+            index=models.Index(fields=["name", "id"], name="grant_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="grant",
+            index=models.Index(
+                fields=["start_date", "id"], name="grant_start_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="grant",
+            index=models.Index(
+                fields=["agency", "name", "id"], name="grant_agency_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="publication",
+            index=models.Index(
+                fields=["title", "id"], name="publication_title_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="publication",
+            index=models.Index(
+                fields=["created_at", "id"], name="publication_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="publication",
+            index=models.Index(
+                fields=["pub_type", "title", "id"],
+                name="publication_type_title_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.6 on 2026-10-18 16:40
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("claims", "0004_grant_publication_indexes"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="grant",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector(
+                    "name", "pi_list", "coi_list", config="english"
+                ),
+                name="grant_search_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="grant",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("pi_list"),
+                    name="gin_trgm_ops",
+                ),
+                name="grant_pi_list_trgm_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="grant",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("coi_list"),
+                    name="gin_trgm_ops",
+                ),
+                name="grant_coi_list_trgm_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="publication",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector(
+                    "title", "authors", "chapter_title", config="english"
+                ),
+                name="publication_search_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="publication",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("authors"),
+                    name="gin_trgm_ops",
+                ),
+                name="publication_authors_trgm_idx",
+            ),
+        ),
+    ]
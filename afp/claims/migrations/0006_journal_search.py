@@ -0,0 +1,55 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:05
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("claims", "0005_grant_publication_search"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="journal",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"),
+                    name="gin_trgm_ops",
+                ),
+                name="journal_name_trgm_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="journal",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("full_name"),
+                    name="gin_trgm_ops",
+                ),
+                name="journal_full_name_trgm_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="journal",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("issn"),
+                    name="gin_trgm_ops",
+                ),
+                name="journal_issn_trgm_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="journal",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("eissn"),
+                    name="gin_trgm_ops",
+                ),
+                name="journal_eissn_trgm_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("claims", "0006_journal_search"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="award",
+            index=models.Index(
+                fields=["modified_at", "id"], name="award_modified_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="committeework",
+            index=models.Index(
+                fields=["modified_at", "id"], name="committeework_modified_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cpa",
+            index=models.Index(
+                fields=["modified_at", "id"], name="cpa_modified_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="editorialboard",
+            index=models.Index(
+                fields=["modified_at", "id"],
+                name="editorialboard_modified_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="exam",
+            index=models.Index(
+                fields=["modified_at", "id"], name="exam_modified_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="grantlink",
+            index=models.Index(
+                fields=["modified_at", "id"], name="grantlink_modified_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="grantreview",
+            index=models.Index(
+                fields=["modified_at", "id"], name="grantreview_modified_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lecture",
+            index=models.Index(
+                fields=["modified_at", "id"], name="lecture_modified_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="promotion",
+            index=models.Index(
+                fields=["modified_at", "id"], name="promotion_modified_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="publicationlink",
+            index=models.Index(
+                fields=["modified_at", "id"],
+                name="publicationlink_modified_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="supervision",
+            index=models.Index(
+                fields=["modified_at", "id"], name="supervision_modified_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 4.2.6 on 2026-10-18 15:37
+
+import afp.claims.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("claims", "0007_claim_modified_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("modified_at", models.DateTimeField(auto_now=True)),
+                ("model", models.CharField(max_length=50)),
+                (
+                    "file",
+                    models.FileField(
+                        storage=afp.claims.models.import_storage,
+                        upload_to="imports/%Y/%m/",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=255, verbose_name="File Name"),
+                ),
+                ("size", models.BigIntegerField(default=0)),
+                ("dry_run", models.BooleanField(default=False)),
+                (
+                    "status",
+                    models.IntegerField(
+                        choices=[
+                            (1, "Queued"),
+                            (2, "Running"),
+                            (3, "Done"),
+                            (4, "Failed"),
+                        ],
+                        default=1,
+                    ),
+                ),
+                (
+                    "position",
+                    models.BigIntegerField(
+                        default=0, verbose_name="Bytes Read"
+                    ),
+                ),
+                ("created", models.IntegerField(default=0)),
+                ("updated", models.IntegerField(default=0)),
+                ("rejected", models.IntegerField(default=0)),
+                ("errors", models.JSONField(blank=True, default=list)),
+                ("failure", models.TextField(blank=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status", 1)),
+                        fields=["created_at"],
+                        name="importjob_queued_idx",
+                    )
+                ],
+            },
+        ),
+    ]
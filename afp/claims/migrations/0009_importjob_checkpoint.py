@@ -0,0 +1,25 @@
+# Generated by Django 4.2.6 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("claims", "0008_importjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importjob",
+            name="sha256",
+            field=models.CharField(
+                blank=True, max_length=64, verbose_name="SHA-256"
+            ),
+        ),
+        migrations.AddField(
+            model_name="importjob",
+            name="line",
+            field=models.IntegerField(default=0, verbose_name="Lines Read"),
+        ),
+    ]
@@ -5,6 +5,35 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
+class CreatedUpdatedQuerySet(models.QuerySet):
+    """
+    Keeps `CreatedUpdatedMixin` timestamps current on bulk writes, which
+    bypass `save()`. ``bulk_create`` already stamps both fields through
+    their ``auto_now``/``auto_now_add`` flags (and refreshes `modified_at`
+    on conflicting rows when upserting); ``bulk_update`` and ``update`` are
+    made to set `modified_at`.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields and "modified_at" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "modified_at"]
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        now = timezone.now()
+        for obj in objs:
+            obj.modified_at = now
+        if "modified_at" not in fields:
+            fields = [*fields, "modified_at"]
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        kwargs.setdefault("modified_at", timezone.now())
+        return super().update(**kwargs)
+
+
 class CreatedUpdatedMixin(models.Model):
     """
     This mixin provides fields for storing instance creation
@@ -14,6 +43,8 @@ class CreatedUpdatedMixin(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, editable=False)
     modified_at = models.DateTimeField(auto_now=True)
 
+    objects = CreatedUpdatedQuerySet.as_manager()
+
     class Meta:
         abstract = True
 
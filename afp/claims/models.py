@@ -2,10 +2,12 @@ import uuid
 
 from django import forms
 from django.conf import settings
+from django.core.files.storage import default_storage
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.template.defaultfilters import filesizeformat
 from django.urls import reverse
+from django.utils.module_loading import import_string
 from django.utils.translation import gettext_lazy as _
 
 from djmoney.models.fields import MoneyField
@@ -19,6 +21,7 @@ from .mixins import (
     user_directory_path,
     ContentTypeRestrictedFileField,
 )
+from .search import GRANT_SEARCH, JOURNAL_SEARCH, PUBLICATION_SEARCH
 
 STR_SHORT = 10
 STR_MED = 50
@@ -88,6 +91,11 @@ class Award(UserBaseModel):
 
     class Meta:
         ordering = ["award_level", "name"]
+        indexes = [
+            models.Index(
+                fields=["modified_at", "id"], name="award_modified_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -96,6 +104,13 @@ class Award(UserBaseModel):
 class Promotion(UserBaseModel):
     promoted_to = models.ForeignKey(Rank, on_delete=models.PROTECT)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["modified_at", "id"], name="promotion_modified_idx"
+            ),
+        ]
+
     def __str__(self):
         return str(self.promoted_to)
 
@@ -182,6 +197,16 @@ class Grant(BaseModel):
 
     class Meta:
         ordering = ["agency", "name"]
+        indexes = [
+            models.Index(fields=["name", "id"], name="grant_name_idx"),
+            models.Index(
+                fields=["start_date", "id"], name="grant_start_date_idx"
+            ),
+            models.Index(
+                fields=["agency", "name", "id"], name="grant_agency_name_idx"
+            ),
+            *GRANT_SEARCH.indexes("grant"),
+        ]
 
     def __str__(self):
         return self.name
@@ -213,6 +238,13 @@ class GrantLink(AdminMixin, CreatedUpdatedMixin):
     )
     entry_type = None
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["modified_at", "id"], name="grantlink_modified_idx"
+            ),
+        ]
+
 
 class GrantReviewType(models.Model):
     name = models.CharField(
@@ -257,6 +289,11 @@ class GrantReview(UserBaseModel):
 
     class Meta:
         ordering = ["type", "agency"]
+        indexes = [
+            models.Index(
+                fields=["modified_at", "id"], name="grantreview_modified_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.agency} - {self.date}"
@@ -310,6 +347,7 @@ class Journal(models.Model):
 
     class Meta:
         ordering = ["name"]
+        indexes = JOURNAL_SEARCH.indexes("journal")
 
     def __str__(self):
         return self.full_name
@@ -388,6 +426,17 @@ class Publication(BaseModel):
 
     class Meta:
         ordering = ["pub_type", "title"]
+        indexes = [
+            models.Index(fields=["title", "id"], name="publication_title_idx"),
+            models.Index(
+                fields=["created_at", "id"], name="publication_created_idx"
+            ),
+            models.Index(
+                fields=["pub_type", "title", "id"],
+                name="publication_type_title_idx",
+            ),
+            *PUBLICATION_SEARCH.indexes("publication"),
+        ]
 
     def __str__(self):
         return self.title
@@ -424,6 +473,14 @@ class PublicationLink(AdminMixin, CreatedUpdatedMixin):
     )
     entry_type = None
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["modified_at", "id"],
+                name="publicationlink_modified_idx",
+            ),
+        ]
+
 
 class EditorialBoard(UserBaseModel):
     journal = models.ForeignKey(
@@ -439,6 +496,12 @@ class EditorialBoard(UserBaseModel):
 
     class Meta:
         ordering = ["journal"]
+        indexes = [
+            models.Index(
+                fields=["modified_at", "id"],
+                name="editorialboard_modified_idx",
+            ),
+        ]
 
     def __str__(self):
         return str(self.journal)
@@ -451,6 +514,11 @@ class CommitteeWork(UserBaseModel):
     class Meta:
         ordering = ["name"]
         verbose_name_plural = "Committee work"
+        indexes = [
+            models.Index(
+                fields=["modified_at", "id"], name="committeework_modified_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -498,6 +566,11 @@ class Lecture(UserBaseModel):
 
     class Meta:
         ordering = ["lecture_type", "start_date", "name"]
+        indexes = [
+            models.Index(
+                fields=["modified_at", "id"], name="lecture_modified_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{str(self.lecture_type)}: {self.name} - {self.start_date}"
@@ -573,6 +646,11 @@ class Exam(UserBaseModel):
 
     class Meta:
         ordering = ["exam_type", "date"]
+        indexes = [
+            models.Index(
+                fields=["modified_at", "id"], name="exam_modified_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{str(self.exam_type)}: {self.student_name} - {self.date}"
@@ -651,6 +729,11 @@ class Supervision(UserBaseModel):
     class Meta:
         ordering = ["supervision_type", "student_name"]
         verbose_name_plural = "Supervision"
+        indexes = [
+            models.Index(
+                fields=["modified_at", "id"], name="supervision_modified_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{str(self.supervision_type)} - {self.student_name}"
@@ -677,6 +760,112 @@ class Cpa(UserBaseModel):
 
     class Meta:
         verbose_name = "CPA"
+        indexes = [
+            models.Index(
+                fields=["modified_at", "id"], name="cpa_modified_idx"
+            ),
+        ]
 
     def __str__(self):
         return str(self.cpa_file)
+
+
+class PhysicianScore(models.Model):
+    """
+    Model representing a physician's running point total for one claim
+    category and calendar year, the year of each claim's scoring date (see
+    `afp.claims.scoring.ScoringRule`). Kept up to date by
+    `afp.claims.signals`, including when a weight table changes.
+    """
+
+    user_id = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        verbose_name="Physician",
+    )
+    category = models.CharField(max_length=STR_MED)
+    year = models.IntegerField()
+    points = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    claims = models.IntegerField("# Eligible Claims", default=0)
+    modified_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["user_id", "year", "category"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user_id", "category", "year"],
+                name="unique_physician_score",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.category} {self.year}"
+
+
+def import_storage():
+    """Storage for uploaded import files, which must not be public."""
+    path = getattr(settings, "CLAIM_IMPORT_STORAGE", None)
+    return import_string(path)() if path else default_storage
+
+
+class ImportJob(CreatedUpdatedMixin):
+    """
+    Model representing a CSV import queued from the admin and run by the
+    ``process_imports`` worker (see `afp.claims.jobs`). `position` and
+    `line` checkpoint the rows already imported.
+    """
+
+    class Status(models.IntegerChoices):
+        QUEUED = 1, _("Queued")
+        RUNNING = 2, _("Running")
+        DONE = 3, _("Done")
+        FAILED = 4, _("Failed")
+
+    model = models.CharField(max_length=STR_MED)
+    file = models.FileField(upload_to="imports/%Y/%m/", storage=import_storage)
+    name = models.CharField("File Name", max_length=STR_LONGEST)
+    size = models.BigIntegerField(default=0)
+    sha256 = models.CharField("SHA-256", max_length=64, blank=True)
+    dry_run = models.BooleanField(default=False)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+    )
+    status = models.IntegerField(choices=Status.choices, default=Status.QUEUED)
+    position = models.BigIntegerField("Bytes Read", default=0)
+    line = models.IntegerField("Lines Read", default=0)
+    created = models.IntegerField(default=0)
+    updated = models.IntegerField(default=0)
+    rejected = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    failure = models.TextField(blank=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(status=1),
+                name="importjob_queued_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
+
+    @property
+    def finished(self):
+        return self.status in (self.Status.DONE, self.Status.FAILED)
+
+    @property
+    def progress(self):
+        """Percentage of the file read so far."""
+        if self.status == self.Status.DONE:
+            return 100
+        if not self.size:
+            return 0
+        return min(100, 100 * self.position // self.size)
@@ -0,0 +1,50 @@
+"""
+Per-physician cache of the rendered claim list pages.
+
+A physician's claims only change a few times a year, so each list page is
+rendered once and then served from the cache. Every physician has a version
+number per claim section, kept in the cache and included in the page key;
+saving or deleting one of their claims, or a reviewer changing its
+eligibility or comments, bumps that version once the transaction commits
+(see `signals.py`), and the next visit renders a fresh page. The lookup
+snapshot version is part of the key too, so renaming a lookup row expires
+every page. `CLAIM_PAGE_CACHE_TIMEOUT` bounds how long a page can outlive
+changes made behind the ORM's back (e.g. ``QuerySet.update``).
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from afp.utils import versions
+
+from .lookups import get_snapshot
+
+
+def version_key(user_id, section):
+    return f"claims:page:version:{user_id}:{section}"
+
+
+def page_key(user_id, section):
+    """Return the cache key of the current version of a page."""
+    version = versions.get_version(version_key(user_id, section))
+    lookups = get_snapshot().version
+    return f"claims:page:{user_id}:{section}:{version}:{lookups}"
+
+
+def get_page(user_id, section):
+    """
+    Return ``(key, content)`` for a page, `content` being None on a miss.
+    """
+    key = page_key(user_id, section)
+    return key, cache.get(key)
+
+
+def set_page(key, content):
+    timeout = getattr(settings, "CLAIM_PAGE_CACHE_TIMEOUT", 60 * 60 * 24)
+    cache.set(key, content, timeout=timeout)
+
+
+def expire_pages(users, section):
+    """Expire the cached `section` page of every given physician."""
+    for user_id in users:
+        if user_id is not None:
+            versions.bump_version(version_key(user_id, section))
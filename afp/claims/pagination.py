@@ -0,0 +1,69 @@
+"""
+Keyset ("seek") pagination for the department-wide claim tables and the
+claims API.
+
+Instead of an OFFSET, each page starts strictly after the sort key and
+primary key of the last row of the previous page. With an index on
+``(sort field, id)`` every page costs the same no matter how deep it is, and
+rows added or removed meanwhile never shift a page or repeat a row.
+"""
+from django.core import signing
+from django.db.models import Q
+
+PAGE_SIZE = 50
+CURSOR_SALT = "afp.claims.pagination"
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(value, pk):
+    """Return an opaque cursor pointing just after a row."""
+    return signing.dumps(
+        [None if value is None else str(value), str(pk)],
+        salt=CURSOR_SALT,
+        compress=True,
+    )
+
+
+def decode_cursor(cursor):
+    """Return the ``[value, pk]`` stored in a cursor."""
+    try:
+        return signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise InvalidCursor(cursor)
+
+
+def keyset_filter(queryset, field, cursor=None):
+    """
+    Order `queryset` by `field` (prefix "-" for descending) then primary
+    key, keeping only the rows after `cursor`. `field` must not be nullable.
+    """
+    name = field.lstrip("-")
+    descending = field.startswith("-")
+    queryset = queryset.order_by(field, "-pk" if descending else "pk")
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        after, from_ = ("lt", "lte") if descending else ("gt", "gte")
+        # The redundant range condition lets the index seek straight to the
+        # first row instead of scanning both branches of the OR.
+        queryset = queryset.filter(
+            Q(**{f"{name}__{from_}": value}),
+            Q(**{f"{name}__{after}": value})
+            | Q(**{name: value, f"pk__{after}": pk}),
+        )
+    return queryset
+
+
+def keyset_page(queryset, field, cursor=None, size=PAGE_SIZE):
+    """
+    Return one page of `queryset` sorted as by `keyset_filter`, and the
+    cursor of the next page, or None on the last page.
+    """
+    rows = list(keyset_filter(queryset, field, cursor)[: size + 1])
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, field.lstrip("-")), last.pk)
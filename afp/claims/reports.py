@@ -0,0 +1,276 @@
+"""
+Department roll-up reports per clinical division and academic rank.
+
+For one year, the report gives the physicians, claims, eligible claims,
+points, grant dollars and eligible publications by type of each division
+and each rank, and of the department as a whole. Each figure is aggregated
+in the database: one query groups every physician's totals by ``GROUPING
+SETS ((division), (rank), ())``, so the division rows, rank rows and grand
+total come back together, and one more does the same for publications by
+type. Grant dollars divide each eligible grant's amount evenly between its
+eligible physician investigators with a window function, so a grant shared
+between divisions is counted once, in full, in the total.
+
+Reports are cached per year under a version number (see
+`afp.utils.versions`). `invalidate` bumps it whenever claims, scores or
+physicians' divisions or ranks change (see `signals`), and staff can force
+it from the report page.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import (
+    Case,
+    Count,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    Q,
+    Sum,
+    When,
+)
+from django.db.models.expressions import Window
+from django.db.models.functions import ExtractYear
+
+from afp.accounts.models import Division, Rank
+from afp.utils import versions
+
+from .dashboard import SECTIONS
+from .lookups import get_snapshot
+from .models import GrantLink, PhysicianScore, PublicationLink, PublicationType
+from .scoring import ELIGIBLE, RULES_BY_CATEGORY
+
+REPORT_VERSION_KEY = "claims:reports:version"
+REPORT_TIMEOUT = 60 * 60
+
+# Values of GROUPING(division, rank) for each grouping set.
+BY_DIVISION, BY_RANK, TOTAL = 1, 2, 3
+
+TOTALS = ["physicians", "claims", "eligible", "points", "dollars"]
+
+
+def by_year(queryset, date_field, year):
+    return queryset.alias(year=ExtractYear(date_field)).filter(year=year)
+
+
+def claim_rows(year):
+    """One ``(user_id, eligible)`` row per claim of `year`, of any section."""
+    queries = []
+    for section in SECTIONS:
+        rule = RULES_BY_CATEGORY.get(section.key)
+        date_field = rule.date_field if rule else "created_at"
+        eligible = rule.eligible if rule else ("eligible",)
+        queries.append(
+            by_year(section.model.objects.all(), date_field, year)
+            .annotate(
+                is_eligible=Case(
+                    When(Q(**{field: ELIGIBLE for field in eligible}), then=1),
+                    default=0,
+                    output_field=IntegerField(),
+                )
+            )
+            .values_list("user_id", "is_eligible")
+            .order_by()
+        )
+    first, *rest = queries
+    return first.union(*rest, all=True)
+
+
+def point_rows(year):
+    """One ``(user_id, points)`` row per physician with points in `year`."""
+    return (
+        PhysicianScore.objects.filter(year=year)
+        .values("user_id")
+        .annotate(total=Sum("points"))
+        .values_list("user_id", "total")
+        .order_by()
+    )
+
+
+def grant_rows(year):
+    """
+    One ``(user_id, share)`` row per eligible physician investigator of an
+    eligible grant starting in `year`, the share being an even split of its
+    amount between them. Other investigators (e.g. scientists) are left out
+    of the split, so the department's physicians account for the whole
+    amount, as the report only covers physicians.
+    """
+    rule = RULES_BY_CATEGORY["grants"]
+    queryset = GrantLink.objects.filter(
+        user_id__is_physician=True,
+        **{field: ELIGIBLE for field in rule.eligible},
+    )
+    return (
+        by_year(queryset, rule.date_field, year)
+        .annotate(
+            share=ExpressionWrapper(
+                F("grant__amount")
+                / Window(Count("pk"), partition_by=[F("grant_id")]),
+                output_field=DecimalField(),
+            )
+        )
+        .values_list("user_id", "share")
+        .order_by()
+    )
+
+
+def publication_rows(year):
+    """``(user_id, publication, type)`` per eligible authorship in `year`."""
+    rule = RULES_BY_CATEGORY["publications"]
+    queryset = PublicationLink.objects.filter(
+        **{field: ELIGIBLE for field in rule.eligible}
+    )
+    return (
+        by_year(queryset, rule.date_field, year)
+        .values_list("user_id", "publication_id", "publication__pub_type")
+        .order_by()
+    )
+
+
+def physicians_sql():
+    """Return the quoted physician table and its grouping columns."""
+    User = get_user_model()
+    quote = connection.ops.quote_name
+    return (
+        quote(User._meta.db_table),
+        quote(User._meta.get_field("division").column),
+        quote(User._meta.get_field("rank").column),
+        quote(User._meta.get_field("is_physician").column),
+    )
+
+
+def totals(year):
+    """Return ``[(level, division, rank, *TOTALS), ...]``."""
+    claims_sql, claims_params = claim_rows(year).query.sql_with_params()
+    points_sql, points_params = point_rows(year).query.sql_with_params()
+    grants_sql, grants_params = grant_rows(year).query.sql_with_params()
+    users, division, rank, is_physician = physicians_sql()
+    sql = f"""
+        WITH claims (user_id, eligible) AS ({claims_sql}),
+        points (user_id, points) AS ({points_sql}),
+        grants (user_id, share) AS ({grants_sql}),
+        activity (user_id, claims, eligible, points, dollars) AS (
+            SELECT user_id, COUNT(*), SUM(eligible), 0, 0
+            FROM claims GROUP BY user_id
+            UNION ALL SELECT user_id, 0, 0, points, 0 FROM points
+            UNION ALL SELECT user_id, 0, 0, 0, share FROM grants
+        )
+        SELECT
+            GROUPING(u.{division}, u.{rank}),
+            u.{division},
+            u.{rank},
+            COUNT(DISTINCT u.id),
+            COALESCE(SUM(a.claims), 0),
+            COALESCE(SUM(a.eligible), 0),
+            COALESCE(SUM(a.points), 0),
+            COALESCE(SUM(a.dollars), 0)
+        FROM {users} u
+        LEFT JOIN activity a ON a.user_id = u.id
+        WHERE u.{is_physician}
+        GROUP BY GROUPING SETS ((u.{division}), (u.{rank}), ())
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, (*claims_params, *points_params, *grants_params))
+        return cursor.fetchall()
+
+
+def publications(year):
+    """Return ``[(level, division, rank, publication type, count), ...]``."""
+    pubs_sql, pubs_params = publication_rows(year).query.sql_with_params()
+    users, division, rank, is_physician = physicians_sql()
+    sql = f"""
+        WITH pubs (user_id, publication_id, pub_type_id) AS ({pubs_sql})
+        SELECT
+            GROUPING(u.{division}, u.{rank}),
+            u.{division},
+            u.{rank},
+            p.pub_type_id,
+            COUNT(DISTINCT p.publication_id)
+        FROM pubs p
+        JOIN {users} u ON u.id = p.user_id
+        WHERE u.{is_physician}
+        GROUP BY GROUPING SETS (
+            (u.{division}, p.pub_type_id),
+            (u.{rank}, p.pub_type_id),
+            (p.pub_type_id)
+        )
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, pubs_params)
+        return cursor.fetchall()
+
+
+def build_rollup(year):
+    """
+    Return ``{level: {division or rank id: row}}``, each row holding the
+    `TOTALS` and ``{publication type id: count}`` as "publications".
+    """
+    rollup = {BY_DIVISION: {}, BY_RANK: {}, TOTAL: {}}
+
+    def row(level, division, rank):
+        key = {BY_DIVISION: division, BY_RANK: rank, TOTAL: None}[level]
+        return rollup[level].setdefault(
+            key, {**dict.fromkeys(TOTALS, 0), "publications": {}}
+        )
+
+    for level, division, rank, *values in totals(year):
+        row(level, division, rank).update(zip(TOTALS, values))
+    for level, division, rank, pub_type, count in publications(year):
+        row(level, division, rank)["publications"][pub_type] = count
+    return rollup
+
+
+def cached_rollup(year):
+    """Return `build_rollup(year)`, built at most once per change."""
+    version = versions.get_version(REPORT_VERSION_KEY)
+    key = f"claims:reports:{version}:{year}"
+    rollup = cache.get(key)
+    if rollup is None:
+        rollup = build_rollup(year)
+        cache.set(key, rollup, timeout=REPORT_TIMEOUT)
+    return rollup
+
+
+def invalidate():
+    """Make the next `cached_rollup` call rebuild from the database."""
+    versions.bump_version(REPORT_VERSION_KEY)
+
+
+def report_tables(rollup):
+    """
+    Return ``(publication types, [(title, rows), ...])`` for display, each
+    row carrying its name and its publication counts in type order.
+    """
+    snapshot = get_snapshot()
+    pub_types = sorted(
+        {
+            pk
+            for rows in rollup.values()
+            for row in rows.values()
+            for pk in row["publications"]
+        },
+        key=lambda pk: str(snapshot.tables[PublicationType].get(pk, "")),
+    )
+
+    def rows(level, model):
+        result = []
+        for pk, row in rollup[level].items():
+            name = snapshot.tables[model].get(pk) if model else "Department"
+            result.append(
+                {
+                    **row,
+                    "name": "(none)" if name is None else str(name),
+                    "publications": [
+                        row["publications"].get(t, 0) for t in pub_types
+                    ],
+                }
+            )
+        return sorted(result, key=lambda row: row["name"])
+
+    names = [str(snapshot.tables[PublicationType].get(pk)) for pk in pub_types]
+    return names, [
+        ("By division", rows(BY_DIVISION, Division)),
+        ("By rank", rows(BY_RANK, Rank)),
+        ("Total", rows(TOTAL, None)),
+    ]
@@ -0,0 +1,394 @@
+"""
+AFP points scoring.
+
+Every eligible claim is worth ``quantity * weight * weight * ...`` where each
+weight is read from a lookup table through a foreign key on the claim (e.g. a
+publication link is worth its publication type weight times its article type
+weight times its author role weight). Points are therefore linear in the
+claims that share the same lookups, so the engine never scores claims one by
+one: it asks the database to group eligible claims per physician, year and
+weight keys (one aggregate query per claim category), and then multiplies each
+grouped cell by its weights. The number of cells is bounded by the number of
+physicians times the size of the lookup tables, not by the number of claims.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DecimalField, Sum, Value
+from django.db.models.functions import Coalesce, ExtractYear
+
+from afp.utils import versions
+
+from .lookups import get_snapshot
+from .mixins import AdminMixin
+from .models import (
+    ArticleType,
+    Award,
+    AwardLevel,
+    Cpa,
+    Exam,
+    ExamType,
+    GrantCategory,
+    GrantLink,
+    GrantReview,
+    GrantReviewType,
+    GrantRole,
+    Lecture,
+    LectureType,
+    PhysicianScore,
+    PublicationLink,
+    PublicationRole,
+    PublicationType,
+    Supervision,
+    SupervisionType,
+    WorkFrequencyType,
+)
+
+ELIGIBLE = AdminMixin.EligibilityStatus.ELIGIBLE
+CENT = Decimal("0.01")
+
+MATRIX_VERSION_KEY = "claims:matrix:version"
+MATRIX_TIMEOUT = 60 * 60
+
+
+class Weight:
+    """A weight looked up through the foreign key at `path` on a claim."""
+
+    def __init__(self, path, model, field="weight"):
+        self.path = path
+        self.model = model
+        self.field = field
+
+
+class ScoringRule:
+    """
+    Describes how one claim category is scored.
+
+    `weights` are multiplied together; a null foreign key counts as a
+    weight of 1. `quantity` is an expression summed over the grouped claims
+    (1 per claim by default). `date_field` gives the year a claim counts
+    towards, and `eligible` lists every eligibility flag that must be set.
+    """
+
+    def __init__(
+        self,
+        category,
+        model,
+        weights=(),
+        quantity=None,
+        date_field="created_at",
+        eligible=("eligible",),
+    ):
+        self.category = category
+        self.model = model
+        self.weights = tuple(weights)
+        self.quantity = quantity if quantity is not None else Value(1)
+        self.date_field = date_field
+        self.eligible = tuple(eligible)
+
+    def cells(self, users=None, year=None):
+        """
+        Return the eligible claims grouped by physician, year and weight
+        keys, with the number of claims and summed quantity of each group.
+        """
+        queryset = self.model.objects.filter(
+            **{field: ELIGIBLE for field in self.eligible}
+        ).annotate(year=ExtractYear(self.date_field))
+        if users is not None:
+            queryset = queryset.filter(user_id__in=users)
+        if year is not None:
+            queryset = queryset.filter(year=year)
+        return (
+            queryset.values("user_id", "year", *(w.path for w in self.weights))
+            .annotate(
+                claims=Count("pk"),
+                quantity=Sum(self.quantity, output_field=DecimalField()),
+            )
+            .order_by()
+        )
+
+    def score_cell(self, cell, weights):
+        """Return the points of one grouped cell given a weight table."""
+        points = Decimal(cell["quantity"])
+        for weight in self.weights:
+            pk = cell[weight.path]
+            if pk is not None:
+                points *= weights[weight.model].get(pk, 0)
+        return points
+
+
+RULES = (
+    ScoringRule(
+        "awards",
+        Award,
+        weights=[Weight("award_level", AwardLevel, "value")],
+    ),
+    ScoringRule(
+        "grants",
+        GrantLink,
+        weights=[
+            Weight("grant__agency__category", GrantCategory),
+            Weight("role", GrantRole),
+        ],
+        date_field="grant__start_date",
+        eligible=("eligible", "grant__eligible"),
+    ),
+    ScoringRule(
+        "grant_reviews",
+        GrantReview,
+        weights=[Weight("type", GrantReviewType)],
+        date_field="date",
+    ),
+    ScoringRule(
+        "publications",
+        PublicationLink,
+        weights=[
+            Weight("publication__pub_type", PublicationType),
+            Weight("publication__article_type", ArticleType),
+            Weight("role", PublicationRole),
+        ],
+        eligible=("eligible", "publication__eligible"),
+    ),
+    ScoringRule(
+        "lectures",
+        Lecture,
+        weights=[Weight("lecture_type", LectureType)],
+        quantity=Coalesce("num_sessions", 1),
+        date_field="start_date",
+    ),
+    ScoringRule(
+        "exams",
+        Exam,
+        weights=[Weight("exam_type", ExamType)],
+        date_field="date",
+    ),
+    ScoringRule(
+        "supervision",
+        Supervision,
+        weights=[
+            Weight("supervision_type", SupervisionType),
+            Weight("frequency", WorkFrequencyType, "days_equal"),
+        ],
+    ),
+    ScoringRule("cpa", Cpa, quantity="cpa_value"),
+)
+
+RULES_BY_CATEGORY = {rule.category: rule for rule in RULES}
+
+
+def weight_models():
+    """Return every lookup model that carries a scoring weight."""
+    models = {}
+    for rule in RULES:
+        for weight in rule.weights:
+            models[weight.model] = weight.field
+    return models
+
+
+def rules_for_lookup(model):
+    """
+    Return the rules whose points depend on a lookup model, either as a
+    weight table or along the path to one (e.g. a grant agency's category).
+    """
+    rules = []
+    for rule in RULES:
+        related = set()
+        for weight in rule.weights:
+            opts = rule.model._meta
+            for name in weight.path.split("__"):
+                opts = opts.get_field(name).related_model._meta
+                related.add(opts.model)
+        if model in related:
+            rules.append(rule)
+    return rules
+
+
+def load_weights():
+    """
+    Return ``{lookup model: {pk: weight}}`` for every weight table, read
+    from the lookup snapshot rather than the database.
+    """
+    snapshot = get_snapshot()
+    return {
+        model: {
+            obj.pk: Decimal(getattr(obj, field))
+            for obj in snapshot.rows(model)
+        }
+        for model, field in weight_models().items()
+    }
+
+
+def build_matrix(users=None, year=None, categories=None):
+    """
+    Return ``{category: [cell, ...]}`` for the given physicians and year.
+
+    This is the only step that reads claims; the result can be scored any
+    number of times against different weight tables.
+    """
+    rules = RULES
+    if categories is not None:
+        rules = [RULES_BY_CATEGORY[category] for category in categories]
+    return {
+        rule.category: list(rule.cells(users=users, year=year))
+        for rule in rules
+    }
+
+
+def score_matrix(matrix, weights):
+    """
+    Score a claim matrix against a weight table.
+
+    Returns ``{(user_id, category, year): (points, claims)}``.
+    """
+    scores = defaultdict(lambda: [Decimal(0), 0])
+    for category, cells in matrix.items():
+        rule = RULES_BY_CATEGORY[category]
+        for cell in cells:
+            score = scores[(cell["user_id"], category, cell["year"])]
+            score[0] += rule.score_cell(cell, weights)
+            score[1] += cell["claims"]
+    return {
+        key: (points.quantize(CENT), claims)
+        for key, (points, claims) in scores.items()
+    }
+
+
+def totals_by_user(scores):
+    """Collapse scored cells into ``{user_id: points}``."""
+    totals = defaultdict(Decimal)
+    for (user_id, _category, _year), (points, _claims) in scores.items():
+        totals[user_id] += points
+    return dict(totals)
+
+
+def score(users=None, year=None, categories=None):
+    """Score every eligible claim of the given physicians and year."""
+    return score_matrix(
+        build_matrix(users=users, year=year, categories=categories),
+        load_weights(),
+    )
+
+
+def rule_for_model(model):
+    """Return the scoring rule of a claim model, or None if not scored."""
+    for rule in RULES:
+        if rule.model is model:
+            return rule
+    return None
+
+
+def refresh_scores(users, categories=None, year=None):
+    """
+    Recompute the `PhysicianScore` rows of the given physicians.
+
+    Only the given categories (all by default) and year (all by default) are
+    re-aggregated, and rows that no longer have eligible claims are removed.
+    Returns the scored cells.
+    """
+    users = set(users)
+    if not users:
+        return {}
+    if categories is None:
+        categories = list(RULES_BY_CATEGORY)
+    scores = score(users=users, year=year, categories=categories)
+    existing = PhysicianScore.objects.filter(
+        user_id__in=users, category__in=categories
+    )
+    if year is not None:
+        existing = existing.filter(year=year)
+    with transaction.atomic():
+        stale = [
+            row[0]
+            for row in existing.values_list(
+                "pk", "user_id", "category", "year"
+            )
+            if row[1:] not in scores
+        ]
+        if stale:
+            PhysicianScore.objects.filter(pk__in=stale).delete()
+        PhysicianScore.objects.bulk_create(
+            [
+                PhysicianScore(
+                    user_id_id=key[0],
+                    category=key[1],
+                    year=key[2],
+                    points=points,
+                    claims=claims,
+                )
+                for key, (points, claims) in scores.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["user_id", "category", "year"],
+            update_fields=["points", "claims", "modified_at"],
+        )
+    return scores
+
+
+def cached_matrix(year=None):
+    """
+    Return the department-wide claim matrix for `year`, built at most once
+    per claim change. The matrix does not depend on the weight tables, so
+    any number of weight scenarios can be scored against it.
+    """
+    version = versions.get_version(MATRIX_VERSION_KEY)
+    key = f"claims:matrix:{version}:{year}"
+    matrix = cache.get(key)
+    if matrix is None:
+        matrix = build_matrix(year=year)
+        cache.set(key, matrix, timeout=MATRIX_TIMEOUT)
+    return matrix
+
+
+def invalidate_matrix():
+    """Make the next `cached_matrix` call rebuild from the database."""
+    versions.bump_version(MATRIX_VERSION_KEY)
+
+
+def simulate(overrides, year=None):
+    """
+    Rescore every physician with some weights overridden, without writing
+    anything or re-reading claims.
+
+    `overrides` is ``{lookup model: {pk: weight}}``. Returns
+    ``{user_id: (current points, simulated points)}`` for every physician
+    with points under either weighting.
+    """
+    weights = load_weights()
+    scenario = {model: dict(values) for model, values in weights.items()}
+    for model, values in overrides.items():
+        scenario[model].update(values)
+    matrix = cached_matrix(year)
+    current = totals_by_user(score_matrix(matrix, weights))
+    simulated = totals_by_user(score_matrix(matrix, scenario))
+    return {
+        user_id: (
+            current.get(user_id, Decimal(0)),
+            simulated.get(user_id, Decimal(0)),
+        )
+        for user_id in current.keys() | simulated.keys()
+    }
+
+
+def simulation_rows(results):
+    """
+    Turn `simulate` results into rows for display, largest change first.
+    """
+    names = {
+        user.pk: str(user)
+        for user in get_user_model().objects.filter(pk__in=results)
+    }
+    rows = [
+        {
+            "user_id": user_id,
+            "name": names.get(user_id, ""),
+            "current": current,
+            "simulated": simulated,
+            "delta": simulated - current,
+        }
+        for user_id, (current, simulated) in results.items()
+    ]
+    rows.sort(key=lambda row: (-abs(row["delta"]), row["name"]))
+    return rows
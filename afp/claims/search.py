@@ -0,0 +1,96 @@
+"""
+Indexed search over publications, grants and journals.
+
+Search text is parsed like a web search (``"quoted phrases"``, ``or``,
+``-excluded``) and matched, stemmed, against a GIN-indexed tsvector of the
+searchable fields. Whole-word matching misses partial names ("Tiba" for
+"Tibavisky"), so the author and investigator lists are also matched as
+substrings through trigram GIN indexes. Both halves are index scans, so
+neither depends on the size of the table. Journals, looked up by
+abbreviation, title or ISSN as the user types, only use substring matching.
+"""
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db.models import Q
+from django.db.models.functions import Upper
+
+CONFIG = "english"
+
+
+class SubstringSearch:
+    """
+    Case-insensitive substring search over `fields`, served by one trigram
+    GIN index per field.
+    """
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+
+    def indexes(self, prefix):
+        """Return the indexes `filter` relies on, for a model's Meta."""
+        return [
+            # `icontains` compares UPPER(field), so index that.
+            GinIndex(
+                OpClass(Upper(field), name="gin_trgm_ops"),
+                name=f"{prefix}_{field}_trgm_idx",
+            )
+            for field in self.fields
+        ]
+
+    def match(self, text):
+        """Return a Q matching rows containing `text` in any field."""
+        match = Q()
+        for field in self.fields:
+            match |= Q(**{f"{field}__icontains": text})
+        return match
+
+    def filter(self, queryset, text):
+        """Return the rows of `queryset` matching `text`."""
+        text = text.strip()
+        if not text:
+            return queryset
+        return queryset.filter(self.match(text))
+
+
+class FullTextSearch:
+    """
+    Search over `fields`, additionally matching `substring_fields` on any
+    part of a word.
+    """
+
+    def __init__(self, fields, substring_fields=()):
+        self.fields = tuple(fields)
+        self.substring = SubstringSearch(substring_fields)
+
+    def vector(self):
+        return SearchVector(*self.fields, config=CONFIG)
+
+    def indexes(self, prefix):
+        """Return the indexes `filter` relies on, for a model's Meta."""
+        return [
+            GinIndex(self.vector(), name=f"{prefix}_search_idx"),
+            *self.substring.indexes(prefix),
+        ]
+
+    def filter(self, queryset, text):
+        """Return the rows of `queryset` matching `text`."""
+        text = text.strip()
+        if not text:
+            return queryset
+        match = Q(
+            search_vector=SearchQuery(
+                text, config=CONFIG, search_type="websearch"
+            )
+        )
+        if self.substring.fields:
+            match |= self.substring.match(text)
+        return queryset.alias(search_vector=self.vector()).filter(match)
+
+
+PUBLICATION_SEARCH = FullTextSearch(
+    ["title", "authors", "chapter_title"], substring_fields=["authors"]
+)
+GRANT_SEARCH = FullTextSearch(
+    ["name", "pi_list", "coi_list"], substring_fields=["pi_list", "coi_list"]
+)
+JOURNAL_SEARCH = SubstringSearch(["name", "full_name", "issn", "eissn"])
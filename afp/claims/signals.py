@@ -0,0 +1,201 @@
+"""
+Signal handlers keeping `PhysicianScore`, the cached list pages and
+roll-up reports, and the lookup snapshot in step with database changes.
+
+Saving or deleting a claim (or flipping its eligibility) only re-aggregates
+the affected physicians and category. Refreshes are queued and run once the
+surrounding transaction commits, so saving a publication with many author
+links costs one refresh rather than one per link.
+"""
+import threading
+from collections import defaultdict
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from afp.utils import versions
+
+from . import lookups, pagecache, reports, scoring
+from .dashboard import SECTIONS
+from .models import Grant, GrantLink, Publication, PublicationLink
+
+_pending = threading.local()
+
+# Physician fields the roll-up reports group or filter on.
+REPORT_FIELDS = {"division", "rank", "is_physician"}
+
+# Version of the list of users offered by author/investigator dropdowns.
+USERS_VERSION_KEY = "claims:users:version"
+
+# Parent model: (link model, link foreign key, score category).
+PARENTS = {
+    Publication: (PublicationLink, "publication", "publications"),
+    Grant: (GrantLink, "grant", "grants"),
+}
+
+
+def schedule_refresh(users, category):
+    """Queue a score refresh of `users` for when the transaction commits."""
+    pending = getattr(_pending, "scores", None)
+    if pending is None:
+        pending = _pending.scores = set()
+    pending.update((user, category) for user in users if user is not None)
+    transaction.on_commit(flush_refresh)
+
+
+def flush_refresh():
+    """Run every queued score refresh."""
+    pending = getattr(_pending, "scores", None)
+    if not pending:
+        return
+    _pending.scores = set()
+    scoring.invalidate_matrix()
+    users_by_category = defaultdict(set)
+    for user, category in pending:
+        users_by_category[category].add(user)
+    for category, users in users_by_category.items():
+        scoring.refresh_scores(users, [category])
+
+
+def remember_user(sender, instance, raw=False, **kwargs):
+    """Remember who owned an existing claim in case it is reassigned."""
+    if raw or instance._state.adding:
+        return
+    instance._previous_user_id = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("user_id", flat=True)
+        .first()
+    )
+
+
+def claim_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rule = scoring.rule_for_model(sender)
+    users = {instance.user_id_id, getattr(instance, "_previous_user_id", None)}
+    schedule_refresh(users, rule.category)
+
+
+def expire_pages(users, section):
+    """
+    Expire the cached `section` page of `users`, and the roll-up reports,
+    once committed.
+    """
+    transaction.on_commit(partial(pagecache.expire_pages, set(users), section))
+    transaction.on_commit(reports.invalidate)
+
+
+def page_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    users = {instance.user_id_id, getattr(instance, "_previous_user_id", None)}
+    expire_pages(users, SECTIONS_BY_MODEL[sender])
+
+
+def bulk_saved(model, pks, users=()):
+    """
+    Stand in for the signals skipped when `model` rows are written in bulk:
+    rescore, and expire the list page of, the physicians in `users` or, for
+    publications and grants, every author or investigator linked to `pks`
+    (whose links are also stamped as modified).
+    """
+    if model in PARENTS:
+        link, parent, category = PARENTS[model]
+        links = link.objects.filter(**{f"{parent}__in": pks})
+        users = set(links.values_list("user_id", flat=True))
+        # Links carry their parent's fields in the claims API, so move them
+        # to the end of its modification order for incremental clients.
+        links.update(modified_at=timezone.now())
+        schedule_refresh(users, category)
+        expire_pages(users, category)
+        return
+    rule = scoring.rule_for_model(model)
+    if rule is not None:
+        schedule_refresh(users, rule.category)
+    if model in SECTIONS_BY_MODEL:
+        expire_pages(users, SECTIONS_BY_MODEL[model])
+
+
+def links_saved(formset):
+    """
+    Rescore, and expire the list page of, every physician added to,
+    removed from or moved within an author/investigator formset saved in
+    bulk, standing in for the per-link signals `BulkInlineFormSet.save_bulk`
+    skips.
+    """
+    users = {form.initial.get("user_id") for form in formset.initial_forms}
+    users.update(obj.user_id_id for obj in formset.new_objects)
+    users.update(obj.user_id_id for obj, _ in formset.changed_objects)
+    bulk_saved(formset.model, [], users)
+
+
+def parent_changed(sender, instance, raw=False, **kwargs):
+    """
+    Rescore, expire the list page of, and stamp the link of every author
+    or investigator linked to a publication/grant.
+    """
+    if raw:
+        return
+    bulk_saved(sender, [instance.pk])
+
+
+for rule in scoring.RULES:
+    pre_save.connect(remember_user, sender=rule.model)
+    post_save.connect(claim_changed, sender=rule.model)
+    post_delete.connect(claim_changed, sender=rule.model)
+
+SECTIONS_BY_MODEL = {section.model: section.key for section in SECTIONS}
+
+for section in SECTIONS:
+    pre_save.connect(remember_user, sender=section.model)
+    post_save.connect(page_changed, sender=section.model)
+    post_delete.connect(page_changed, sender=section.model)
+
+for parent in PARENTS:
+    post_save.connect(parent_changed, sender=parent)
+
+
+def weights_changed(sender, raw=False, **kwargs):
+    """
+    Rescore every physician with claims in the categories a weight table
+    edit affects; the ledger would otherwise keep the old weights.
+    """
+    if raw:
+        return
+    for rule in scoring.rules_for_lookup(sender):
+        users = rule.model.objects.values_list("user_id", flat=True)
+        schedule_refresh(set(users.distinct()), rule.category)
+
+
+def physician_changed(sender, instance, raw=False, **kwargs):
+    """Expire the roll-up reports when a physician moves division or rank."""
+    update_fields = kwargs.get("update_fields")
+    if raw or update_fields and not REPORT_FIELDS & set(update_fields):
+        return
+    transaction.on_commit(reports.invalidate)
+
+
+def user_changed(sender, instance, raw=False, **kwargs):
+    """
+    Expire the pages listing every user (see `ConditionalGetMixin`) when
+    one is added, renamed or removed, but not on every login.
+    """
+    update_fields = kwargs.get("update_fields")
+    if raw or update_fields and set(update_fields) <= {"last_login"}:
+        return
+    transaction.on_commit(partial(versions.bump_version, USERS_VERSION_KEY))
+
+
+post_save.connect(physician_changed, sender=get_user_model())
+post_delete.connect(physician_changed, sender=get_user_model())
+post_save.connect(user_changed, sender=get_user_model())
+post_delete.connect(user_changed, sender=get_user_model())
+
+for lookup in lookups.LOOKUP_MODELS:
+    post_save.connect(lookups.lookup_changed, sender=lookup)
+    post_delete.connect(lookups.lookup_changed, sender=lookup)
+    post_save.connect(weights_changed, sender=lookup)
+    post_delete.connect(weights_changed, sender=lookup)
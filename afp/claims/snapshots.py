@@ -0,0 +1,178 @@
+"""
+Columnar snapshot of the claims database, for analysis away from production.
+
+Every claim table, the publications and grants they link to, and the
+dimensions they point at (lookups, journals, physicians) are written as
+Parquet datasets: one directory per table holding one or more part files,
+which pyarrow, pandas and DuckDB read as a single table. Rows are read
+through a server-side cursor and written one record batch at a time, so a
+snapshot runs in constant memory.
+
+Tables with a `modified_at` column can be appended to: an incremental
+snapshot writes a new part holding only the rows modified since the last
+one, recorded in ``snapshot.json``. A row saved again appears once per part
+it was written in, so readers keep the latest `modified_at` of each id.
+`modified_at` is stamped before commit, so the recorded point is never
+later than `CLAIM_SYNC_DELAY` seconds before the snapshot started (see
+`api.settled_before`): rows of transactions still in flight then are read
+again by the next snapshot rather than skipped.
+Deleted rows are only dropped by a full snapshot, which rewrites every
+table; tables without `modified_at` are always rewritten in full.
+
+Requires pyarrow (the ``analytics`` extra).
+"""
+import json
+import shutil
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .api import settled_before
+from .dashboard import SECTIONS
+from .lookups import LOOKUP_MODELS
+from .models import Grant, Journal, Publication
+
+CHUNK_SIZE = 10000
+STATE_FILE = "snapshot.json"
+COMPRESSION = "zstd"
+
+# Physicians are exported without their credentials or contact details.
+USER_FIELDS = [
+    "id",
+    "first_name",
+    "middle_name",
+    "last_name",
+    "is_physician",
+    "is_scientist",
+    "division",
+    "other_division",
+    "rank",
+    "is_active",
+    "date_joined",
+    "archived_at",
+]
+
+
+def tables():
+    """Return ``{table name: (model, fields)}`` for every exported table."""
+    result = {}
+    User = get_user_model()
+    claim_models = [section.model for section in SECTIONS]
+    for model in [*claim_models, Publication, Grant, Journal, *LOOKUP_MODELS]:
+        result[model._meta.db_table] = (model, model._meta.concrete_fields)
+    result[User._meta.db_table] = (
+        User,
+        [User._meta.get_field(name) for name in USER_FIELDS],
+    )
+    return result
+
+
+def arrow_type(field):
+    """Return the Arrow type of a model field's values."""
+    if field.is_relation:
+        return arrow_type(field.target_field)
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, (models.AutoField, models.IntegerField)):
+        return pa.int64()
+    if isinstance(field, models.FloatField):
+        return pa.float64()
+    if isinstance(field, models.DecimalField):
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(field, models.DateField):
+        return pa.date32()
+    return pa.string()
+
+
+def convert(field):
+    """Return a function turning a field's values into Arrow values."""
+    if arrow_type(field) != pa.string():
+        return None
+    return lambda value: value if value is None else str(value)
+
+
+def write_part(path, fields, queryset, chunk_size=CHUNK_SIZE):
+    """
+    Write the rows of `queryset` to the Parquet file `path` in batches,
+    returning the number of rows and their latest `modified_at`, if any.
+    """
+    schema = pa.schema(
+        [pa.field(field.column, arrow_type(field)) for field in fields]
+    )
+    converters = [convert(field) for field in fields]
+    names = [field.attname for field in fields]
+    modified = names.index("modified_at") if "modified_at" in names else None
+    rows, latest = 0, None
+
+    def flush(batch):
+        columns = [
+            pa.array(
+                values if conv is None else [conv(v) for v in values],
+                type=column.type,
+            )
+            for values, conv, column in zip(zip(*batch), converters, schema)
+        ]
+        writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+
+    with pq.ParquetWriter(path, schema, compression=COMPRESSION) as writer:
+        batch = []
+        for row in queryset.values_list(*names).iterator(chunk_size):
+            batch.append(row)
+            if modified is not None:
+                latest = max(latest or row[modified], row[modified])
+            if len(batch) == chunk_size:
+                flush(batch)
+                rows += len(batch)
+                batch = []
+        if batch:
+            flush(batch)
+            rows += len(batch)
+    return rows, latest
+
+
+def snapshot(output, incremental=False, chunk_size=CHUNK_SIZE):
+    """
+    Write a snapshot to the directory `output`, returning ``{table name:
+    rows written}``. With `incremental`, tables with `modified_at` only get
+    a new part of the rows modified since the last snapshot.
+    """
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    state_path = output / STATE_FILE
+    state = {}
+    if incremental and state_path.exists():
+        state = json.loads(state_path.read_text())
+
+    written = {}
+    stamp = timezone.now().strftime("%Y%m%dT%H%M%S%f")
+    settled = settled_before()
+    for table, (model, fields) in tables().items():
+        directory = output / table
+        queryset = model._default_manager.order_by("pk")
+        names = [field.name for field in fields]
+        since = state.get(table) if "modified_at" in names else None
+        if since is None:
+            shutil.rmtree(directory, ignore_errors=True)
+        else:
+            queryset = queryset.filter(modified_at__gt=parse_datetime(since))
+        directory.mkdir(exist_ok=True)
+
+        path = directory / f"part-{stamp}.parquet"
+        rows, latest = write_part(path, fields, queryset, chunk_size)
+        if since is not None and rows == 0:
+            path.unlink()
+        if "modified_at" in names and latest is not None:
+            state[table] = min(latest, settled).isoformat()
+        elif "modified_at" in names:
+            state[table] = since
+        written[table] = rows
+
+    state_path.write_text(json.dumps(state, indent=2, sort_keys=True))
+    return written
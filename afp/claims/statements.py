@@ -0,0 +1,166 @@
+"""
+Annual AFP statements: one PDF per physician listing their eligible claims
+of the year, the reviewers' comments on them and their points.
+
+Statements are rendered for a batch of physicians at a time from data read
+up front with one query per claim section, grouped by physician, so the cost
+of a batch does not grow with the number of claims. `save_statements` is
+what the ``generate_statements`` command runs in each worker process.
+
+Statements hold reviewers' comments, so they are written to the private
+`CLAIM_STATEMENT_STORAGE` and only served through `StatementView`. Each run
+adds a new file under an unguessable name rather than replacing the last
+one; the latest is the one served.
+"""
+import secrets
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.functions import ExtractYear
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from afp.utils.pdf import TextDocument
+
+from .dashboard import SECTIONS
+from .models import (
+    Award,
+    CommitteeWork,
+    Cpa,
+    EditorialBoard,
+    Exam,
+    GrantLink,
+    GrantReview,
+    Lecture,
+    PhysicianScore,
+    Promotion,
+    PublicationLink,
+    Supervision,
+)
+from .scoring import ELIGIBLE, RULES_BY_CATEGORY
+
+# Fields describing a claim on its statement, joined with " - ".
+DESCRIPTIONS = {
+    Award: ["name", "organization"],
+    Promotion: ["promoted_to__name"],
+    PublicationLink: ["publication__title"],
+    EditorialBoard: ["journal__full_name", "other_journal_name"],
+    GrantLink: ["grant__name"],
+    GrantReview: ["name"],
+    CommitteeWork: ["name"],
+    Lecture: ["name"],
+    Exam: ["exam_type__name", "student_name"],
+    Supervision: ["supervision_type__name", "student_name"],
+    Cpa: ["cpa_value"],
+}
+
+
+def statement_storage():
+    """Storage for statements, which must not be public."""
+    path = getattr(settings, "CLAIM_STATEMENT_STORAGE", None)
+    return import_string(path)() if path else default_storage
+
+
+def statement_dir(user_pk, year):
+    return f"statements/{year}/{user_pk}"
+
+
+def new_statement_path(user_pk, year):
+    """Return a new, unguessable name that sorts after earlier ones."""
+    stamp = timezone.now().strftime("%Y%m%dT%H%M%S%f")
+    token = secrets.token_hex(16)
+    return f"{statement_dir(user_pk, year)}/{stamp}-{token}.pdf"
+
+
+def latest_statement(user_pk, year, storage=None):
+    """Return the stored name of a physician's latest statement, or None."""
+    storage = storage or statement_storage()
+    directory = statement_dir(user_pk, year)
+    try:
+        _, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return None
+    files = sorted(name for name in files if name.endswith(".pdf"))
+    return f"{directory}/{files[-1]}" if files else None
+
+
+def statement_data(users, year):
+    """
+    Return ``{user pk: {"claims": {section key: [(description, comments),
+    ...]}, "points": {section key: points}}}`` for the given physicians.
+    """
+    data = {
+        user.pk: {"claims": defaultdict(list), "points": {}} for user in users
+    }
+    for section in SECTIONS:
+        rule = RULES_BY_CATEGORY.get(section.key)
+        date_field = rule.date_field if rule else "created_at"
+        eligible = rule.eligible if rule else ("eligible",)
+        paths = DESCRIPTIONS[section.model]
+        rows = (
+            section.model.objects.filter(
+                user_id__in=data, **{field: ELIGIBLE for field in eligible}
+            )
+            .alias(year=ExtractYear(date_field))
+            .filter(year=year)
+            .order_by("user_id", date_field, "pk")
+            .values_list("user_id", "decision_comments", *paths)
+        )
+        for user_id, comments, *parts in rows:
+            description = " - ".join(str(part) for part in parts if part)
+            data[user_id]["claims"][section.key].append(
+                (description, comments)
+            )
+    scores = PhysicianScore.objects.filter(user_id__in=data, year=year)
+    for user_id, category, points in scores.values_list(
+        "user_id", "category", "points"
+    ):
+        data[user_id]["points"][category] = points
+    return data
+
+
+def render_statement(user, year, data):
+    """Return the PDF of one physician's statement."""
+    document = TextDocument(f"AFP Statement {year} - {user}")
+    document.text(f"AFP Annual Statement {year}", size=16, bold=True)
+    document.text(str(user), size=12, space_before=4)
+    document.text(
+        f"Generated {timezone.localdate():%Y-%m-%d}", size=9, space_before=2
+    )
+    for section in SECTIONS:
+        claims = data["claims"].get(section.key, [])
+        points = data["points"].get(section.key)
+        if not claims and not points:
+            continue
+        heading = f"{section.label} ({len(claims)})"
+        if points is not None:
+            heading += f": {points} points"
+        document.text(heading, size=12, bold=True, space_before=12)
+        for description, comments in claims:
+            document.text(description or "(untitled)", space_before=3)
+            if comments:
+                document.text(f"Reviewer: {comments}", size=9, indent=12)
+    total = sum(data["points"].values())
+    document.text(
+        f"Total: {total} points", size=12, bold=True, space_before=18
+    )
+    return document.render()
+
+
+def save_statements(user_pks, year):
+    """
+    Render and store the statements of the given physicians, returning how
+    many were saved.
+    """
+    users = list(get_user_model().objects.filter(pk__in=user_pks))
+    data = statement_data(users, year)
+    storage = statement_storage()
+    for user in users:
+        storage.save(
+            new_statement_path(user.pk, year),
+            ContentFile(render_statement(user, year, data[user.pk])),
+        )
+    return len(users)
@@ -0,0 +1,1436 @@
+import csv
+import datetime
+import hashlib
+import importlib.util
+import io
+import json
+import sys
+import tempfile
+import zipfile
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.contrib.admin import site
+from django.contrib.auth.models import Permission
+from django.contrib.staticfiles import finders
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from afp.claims import (
+    jobs,
+    lookups,
+    reports,
+    scoring,
+    signals,
+    statements,
+)
+from afp.claims.dashboard import SECTIONS
+from afp.claims.pagination import keyset_page
+from afp.claims.search import PUBLICATION_SEARCH
+from afp.claims.forms import (
+    AwardForm,
+    PublicationForm,
+    PublicationLinkFormSet,
+)
+from afp.accounts.models import Division, Rank
+from afp.claims.models import (
+    ArticleType,
+    Award,
+    AwardLevel,
+    CommitteeWork,
+    Cpa,
+    EditorialBoard,
+    Exam,
+    ExamType,
+    Grant,
+    GrantAgency,
+    GrantAgencyType,
+    GrantCategory,
+    GrantLink,
+    ImportJob,
+    GrantReview,
+    GrantReviewType,
+    GrantRole,
+    Journal,
+    Lecture,
+    LectureType,
+    PhysicianScore,
+    Promotion,
+    Publication,
+    PublicationLink,
+    PublicationRole,
+    PublicationType,
+    Supervision,
+    SupervisionType,
+    WorkFrequencyType,
+)
+
+
+class ClaimsTestData:
+    """Creates a small set of lookups and claims shared by the tests."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Test data is never committed, so the lookup snapshot is not
+        # discarded by the signals; drop it once the class data exists.
+        lookups.discard_snapshot()
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user(
+            username="will", email="will@email.com", password="testpass123"
+        )
+        cls.other_user = User.objects.create_user(
+            username="sam", email="sam@email.com", password="testpass123"
+        )
+        cls.local = AwardLevel.objects.create(name="Local", value=400)
+        cls.national = AwardLevel.objects.create(name="National", value=800)
+        cls.article = PublicationType.objects.create(
+            name="Journal Article", weight=Decimal("1")
+        )
+        cls.research = ArticleType.objects.create(
+            name="Original Research", weight=Decimal("1")
+        )
+        cls.first_author = PublicationRole.objects.create(
+            name="First Author", weight=Decimal("4")
+        )
+        cls.grand_rounds = LectureType.objects.create(
+            name="Grand Rounds", weight=Decimal("150")
+        )
+
+        Award.objects.create(
+            user_id=cls.user,
+            name="Teaching Award",
+            organization="CAMH",
+            award_level=cls.local,
+            eligible=1,
+        )
+        Award.objects.create(
+            user_id=cls.user,
+            name="Research Award",
+            organization="CIHR",
+            award_level=cls.national,
+            eligible=1,
+        )
+        Award.objects.create(
+            user_id=cls.user,
+            name="Pending Award",
+            organization="CAMH",
+            award_level=cls.national,
+        )
+        cls.publication = Publication.objects.create(
+            pub_type=cls.article,
+            article_type=cls.research,
+            title="A Study",
+            authors="Will, Sam",
+            eligible=1,
+        )
+        PublicationLink.objects.create(
+            user_id=cls.user,
+            publication=cls.publication,
+            role=cls.first_author,
+            eligible=1,
+        )
+        Lecture.objects.create(
+            user_id=cls.other_user,
+            lecture_type=cls.grand_rounds,
+            name="Psychosis",
+            start_date=datetime.date(2022, 3, 1),
+            hours=Decimal("1"),
+            is_series=True,
+            num_sessions=3,
+            eligible=1,
+        )
+
+
+class ScoringTests(ClaimsTestData, TestCase):
+    def test_score(self):
+        scores = scoring.score()
+        year = self.publication.created_at.year
+        self.assertEqual(
+            scores[(self.user.pk, "awards", year)], (Decimal("1200"), 2)
+        )
+        self.assertEqual(
+            scores[(self.user.pk, "publications", year)], (Decimal("4"), 1)
+        )
+        self.assertEqual(
+            scores[(self.other_user.pk, "lectures", 2022)],
+            (Decimal("450"), 1),
+        )
+        self.assertEqual(
+            scoring.totals_by_user(scores),
+            {
+                self.user.pk: Decimal("1204"),
+                self.other_user.pk: Decimal("450"),
+            },
+        )
+
+    def test_score_matrix_with_other_weights(self):
+        matrix = scoring.build_matrix(users=[self.user.pk])
+        weights = scoring.load_weights()
+        weights[AwardLevel][self.national.pk] = Decimal("1000")
+        totals = scoring.totals_by_user(scoring.score_matrix(matrix, weights))
+        self.assertEqual(totals, {self.user.pk: Decimal("1404")})
+
+    def test_score_query_count(self):
+        lookups.get_snapshot()
+        with self.assertNumQueries(len(scoring.RULES)):
+            scoring.score()
+
+
+class PhysicianScoreTests(ClaimsTestData, TestCase):
+    def test_ledger_follows_claim_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            award = Award.objects.create(
+                user_id=self.other_user,
+                name="Mentorship Award",
+                organization="CAMH",
+                award_level=self.local,
+                eligible=1,
+            )
+        ledger = PhysicianScore.objects.get(
+            user_id=self.other_user, category="awards"
+        )
+        self.assertEqual((ledger.points, ledger.claims), (Decimal("400"), 1))
+
+        award.eligible = 0
+        with self.captureOnCommitCallbacks(execute=True):
+            award.save()
+        self.assertFalse(
+            PhysicianScore.objects.filter(
+                user_id=self.other_user, category="awards"
+            ).exists()
+        )
+
+    def test_ledger_follows_weight_changes(self):
+        self.addCleanup(lookups.discard_snapshot)
+        scoring.refresh_scores([self.user.pk])
+        self.national.value = 1000
+        with self.captureOnCommitCallbacks(execute=True):
+            self.national.save()
+        ledger = PhysicianScore.objects.get(
+            user_id=self.user, category="awards"
+        )
+        self.assertEqual(ledger.points, Decimal("1400"))
+        self.assertEqual(
+            scoring.rules_for_lookup(GrantAgency),
+            [scoring.RULES_BY_CATEGORY["grants"]],
+        )
+
+    def test_score_year_command(self):
+        out = io.StringIO()
+        call_command("score_year", 2022, workers=1, stdout=out)
+        self.assertEqual(
+            list(PhysicianScore.objects.values_list("category", "points")),
+            [("lectures", Decimal("450"))],
+        )
+        self.assertIn("2 physicians and 1 claims", out.getvalue())
+
+    def test_score_year_rebuilds_non_physicians(self):
+        self.user.is_physician = False
+        self.user.save()
+        year = self.publication.created_at.year
+        PhysicianScore.objects.create(
+            user_id=self.user, category="exams", year=year, points=1
+        )
+        call_command("score_year", year, workers=1, stdout=io.StringIO())
+        self.assertEqual(
+            set(
+                PhysicianScore.objects.filter(user_id=self.user).values_list(
+                    "category", "points"
+                )
+            ),
+            {("awards", Decimal("1200")), ("publications", Decimal("4"))},
+        )
+
+    def test_ledger_follows_publication_changes(self):
+        self.publication.eligible = 0
+        with self.captureOnCommitCallbacks(execute=True):
+            self.publication.save()
+        self.assertFalse(
+            PhysicianScore.objects.filter(category="publications").exists()
+        )
+
+
+class LinkFormSetTests(ClaimsTestData, TestCase):
+    def formset(self, links):
+        data = {
+            "links-TOTAL_FORMS": len(links),
+            "links-INITIAL_FORMS": sum("id" in link for link in links),
+        }
+        for i, link in enumerate(links):
+            for field, value in link.items():
+                data[f"links-{i}-{field}"] = value
+        return PublicationLinkFormSet(
+            data, instance=self.publication, prefix="links"
+        )
+
+    def test_links_are_saved_in_bulk(self):
+        User = get_user_model()
+        authors = [
+            User.objects.create_user(
+                username=f"author{i}",
+                email=f"author{i}@email.com",
+                password="testpass123",
+            )
+            for i in range(10)
+        ]
+        (link,) = self.publication.publicationlink_set.all()
+        formset = self.formset(
+            [
+                {
+                    "id": link.pk,
+                    "user_id": self.user.pk,
+                    "role": self.first_author.pk,
+                    "is_corresponding": "on",
+                },
+                *(
+                    {"user_id": author.pk, "role": self.first_author.pk}
+                    for author in authors
+                ),
+            ]
+        )
+        self.assertTrue(formset.is_valid())
+        # One UPDATE and one INSERT, whatever the number of authors.
+        with self.assertNumQueries(2):
+            formset.save_bulk(self.publication)
+
+        links = self.publication.publicationlink_set.all()
+        self.assertEqual(len(links), 11)
+        self.assertTrue(all(link.created_at for link in links))
+        link.refresh_from_db()
+        self.assertTrue(link.is_corresponding)
+        self.assertGreater(link.modified_at, link.created_at)
+
+        formset = self.formset(
+            [
+                {"id": link.pk, "user_id": self.user.pk, "DELETE": "on"}
+                for link in links
+            ]
+        )
+        self.assertTrue(formset.is_valid())
+        with self.captureOnCommitCallbacks(execute=True):
+            formset.save_bulk(self.publication)
+            signals.links_saved(formset)
+        self.assertFalse(self.publication.publicationlink_set.exists())
+        self.assertFalse(
+            PhysicianScore.objects.filter(category="publications").exists()
+        )
+
+    def test_reassigned_link_rescores_both_physicians(self):
+        scoring.refresh_scores([self.user.pk])
+        (link,) = self.publication.publicationlink_set.all()
+        formset = self.formset(
+            [
+                {
+                    "id": link.pk,
+                    "user_id": self.other_user.pk,
+                    "role": self.first_author.pk,
+                }
+            ]
+        )
+        self.assertTrue(formset.is_valid())
+        with self.captureOnCommitCallbacks(execute=True):
+            formset.save_bulk(self.publication)
+            signals.links_saved(formset)
+        self.assertEqual(
+            list(
+                PhysicianScore.objects.filter(
+                    category="publications"
+                ).values_list("user_id", "points")
+            ),
+            [(self.other_user.pk, Decimal("4"))],
+        )
+
+
+class TimestampTests(ClaimsTestData, TestCase):
+    def test_bulk_writes_stamp_modified_at(self):
+        award = Award.objects.get(name="Pending Award")
+        Award.objects.filter(pk=award.pk).update(eligible=0)
+        updated = Award.objects.get(pk=award.pk)
+        self.assertGreater(updated.modified_at, award.modified_at)
+        self.assertEqual(updated.created_at, award.created_at)
+
+        previous = updated.modified_at
+        updated.name = "Renamed Award"
+        Award.objects.bulk_update([updated], ["name"])
+        renamed = Award.objects.get(pk=award.pk)
+        self.assertEqual(renamed.name, "Renamed Award")
+        self.assertGreater(renamed.modified_at, previous)
+
+
+class LookupSnapshotTests(ClaimsTestData, TestCase):
+    def test_form_choices_come_from_snapshot(self):
+        lookups.get_snapshot()
+        with self.assertNumQueries(0):
+            html = AwardForm().as_p()
+        self.assertIn("National", html)
+        form = AwardForm(
+            data={
+                "name": "Award",
+                "organization": "CAMH",
+                "award_level": self.national.pk,
+            }
+        )
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data["award_level"], self.national)
+
+    def test_edit_invalidates_snapshot(self):
+        self.addCleanup(lookups.discard_snapshot)
+        version = lookups.get_snapshot().version
+        with self.captureOnCommitCallbacks(execute=True):
+            AwardLevel.objects.create(name="Provincial", value=800)
+        snapshot = lookups.get_snapshot()
+        self.assertGreater(snapshot.version, version)
+        self.assertIn(
+            "Provincial", [str(row) for row in snapshot.rows(AwardLevel)]
+        )
+
+    @override_settings(LOOKUP_SNAPSHOT_CHECK_INTERVAL=60 * 60)
+    def test_rolled_back_edit_is_not_kept(self):
+        lookups.discard_snapshot()
+        lookups.get_snapshot()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            AwardLevel.objects.create(name="Regional", value=800)
+            lookups.get_snapshot()
+            raise RuntimeError
+        self.assertNotIn(
+            "Regional",
+            [str(row) for row in lookups.get_snapshot().rows(AwardLevel)],
+        )
+
+    def test_culled_version_does_not_go_back(self):
+        version = lookups.current_version()
+        lookups.bump_version()
+        cache.delete(lookups.VERSION_KEY)
+        self.assertGreater(lookups.current_version(), version + 1)
+        cache.delete(lookups.VERSION_KEY)
+        lookups.bump_version()
+        self.assertGreater(lookups.current_version(), version + 1)
+
+
+class ScoreSimulationTests(ClaimsTestData, TestCase):
+    def test_simulation_api(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        payload = {"weights": {"PublicationRole": {self.first_author.pk: 2}}}
+        response = self.client.post(
+            reverse("simulate_scores"),
+            payload,
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        results = {
+            row["user_id"]: (
+                Decimal(row["current"]),
+                Decimal(row["simulated"]),
+            )
+            for row in response.json()["results"]
+        }
+        self.assertEqual(results[self.user.pk], (1204, 1202))
+        self.assertEqual(results[self.other_user.pk], (450, 450))
+        self.assertEqual(self.first_author.weight, Decimal("4"))
+
+    def test_simulation_api_requires_staff(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("simulate_scores"), {}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_matrix_is_rebuilt_after_version_is_culled(self):
+        scoring.cached_matrix()
+        with self.assertNumQueries(0):
+            scoring.cached_matrix()
+        cache.delete(scoring.MATRIX_VERSION_KEY)
+        with self.assertNumQueries(len(scoring.RULES)):
+            scoring.cached_matrix()
+
+
+class AllPublicationsTests(ClaimsTestData, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for title in ("Cohort", "Bias", "Cohort", "Delirium"):
+            publication = Publication.objects.create(
+                pub_type=cls.article, title=title, authors="Sam"
+            )
+            PublicationLink.objects.create(
+                user_id=cls.other_user,
+                publication=publication,
+                role=cls.first_author,
+            )
+
+    def pages(self, sort):
+        pages, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(
+                Publication.objects.all(), sort, cursor, size=2
+            )
+            pages.append([row.pk for row in rows])
+            if cursor is None:
+                return pages
+
+    def test_keyset_pages(self):
+        for sort in ("title", "-title"):
+            expected = list(
+                Publication.objects.order_by(
+                    sort, sort.replace("title", "pk")
+                ).values_list("pk", flat=True)
+            )
+            pages = self.pages(sort)
+            self.assertEqual([len(page) for page in pages], [2, 2, 1])
+            self.assertEqual(sum(pages, []), expected)
+
+    def test_all_publications_view(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("publication_list"))
+        self.assertContains(response, 'id="all-pubs-body"')
+        url = reverse("all_publications")
+        response = self.client.get(url, {"q": "cohorts", "sort": "-title"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["publications"]), 2)
+        self.assertNotContains(response, "A Study")
+        self.assertIsNone(response.context["next_url"])
+        self.assertEqual(
+            self.client.get(url, {"after": "bogus"}).status_code, 400
+        )
+
+
+class SearchTests(ClaimsTestData, TestCase):
+    def search(self, text):
+        return set(
+            PUBLICATION_SEARCH.filter(
+                Publication.objects.all(), text
+            ).values_list("title", flat=True)
+        )
+
+    def test_publication_search(self):
+        self.assertEqual(self.search("studies"), {"A Study"})
+        self.assertEqual(self.search("study -sam"), set())
+        self.assertEqual(self.search("Wil"), {"A Study"})
+        self.assertEqual(self.search("unknown"), set())
+
+    def test_admin_search(self):
+        self.user.is_staff = self.user.is_superuser = True
+        self.user.save()
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse("admin:claims_publication_changelist"), {"q": "study"}
+        )
+        self.assertEqual(response.context["cl"].result_count, 1)
+
+
+class JournalAutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username="will", email="will@email.com", password="testpass123"
+        )
+        cls.jama = Journal.objects.create(
+            name="JAMA Psychiatry",
+            full_name="JAMA Psychiatry",
+            issn="2168-622X",
+        )
+        cls.ajp = Journal.objects.create(
+            name="Am J Psychiatry",
+            full_name="American Journal of Psychiatry",
+            issn="0002-953X",
+        )
+
+    def autocomplete(self, text):
+        response = self.client.get(
+            reverse("journal_autocomplete"), {"q": text}
+        )
+        return [row["text"] for row in response.json()["results"]]
+
+    def test_autocomplete(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.autocomplete("0002-953"), [str(self.ajp)])
+        self.assertEqual(
+            self.autocomplete("psychiatry"), [str(self.ajp), str(self.jama)]
+        )
+        self.assertEqual(self.autocomplete("ja"), [str(self.jama)])
+        self.assertEqual(
+            self.autocomplete("am"), [str(self.ajp), str(self.jama)]
+        )
+        self.assertEqual(self.autocomplete(""), [])
+
+    def test_form_renders_selected_journal_only(self):
+        html = str(
+            PublicationForm(initial={"journal": self.ajp.pk})["journal"]
+        )
+        self.assertIn(str(self.ajp), html)
+        self.assertNotIn(str(self.jama), html)
+        self.assertIn(reverse("journal_autocomplete"), html)
+
+    @override_settings(
+        STATICFILES_STORAGE=(
+            "django.contrib.staticfiles.storage.ManifestStaticFilesStorage"
+        )
+    )
+    def test_form_media_is_in_the_static_manifest(self):
+        # Production serves the committed staticfiles/ with a strict
+        # manifest, so every local asset must have been collected since it
+        # last changed.
+        with open(finders.find("js/autocomplete.js"), "rb") as f:
+            digest = hashlib.md5(f.read()).hexdigest()[:12]
+        self.assertIn(
+            f"/static/js/autocomplete.{digest}.js",
+            str(PublicationForm().media),
+        )
+
+
+class ImportTestMixin:
+    """Queues uploads through the admin and runs the import worker."""
+
+    def setUp(self):
+        super().setUp()
+        media = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(
+            override_settings(MEDIA_ROOT=media, CLAIM_IMPORT_WORKER=True)
+        )
+
+    def post(self, model, text, dry_run=False):
+        """Upload a file in the admin, returning its queued job."""
+        admin = get_user_model().objects.filter(username="admin").first()
+        if admin is None:
+            admin = get_user_model().objects.create_superuser(
+                username="admin",
+                email="admin@email.com",
+                password="testpass123",
+            )
+        self.client.force_login(admin)
+        data = {"csv_upload": SimpleUploadedFile("file.csv", text.encode())}
+        if dry_run:
+            data["dry_run"] = "on"
+        response = self.client.post(f"/admin/claims/{model}/upload_csv/", data)
+        job = ImportJob.objects.get(
+            pk=resolve(response.url).kwargs["object_id"]
+        )
+        self.job_url = reverse("admin:claims_importjob_change", args=[job.pk])
+        self.assertRedirects(response, self.job_url)
+        self.assertEqual(job.status, ImportJob.Status.QUEUED)
+        return job
+
+    def process(self, job):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("process_imports", once=True, stdout=io.StringIO())
+        job.refresh_from_db()
+        return job
+
+    def upload(self, model, text, dry_run=False):
+        job = self.process(self.post(model, text, dry_run))
+        self.assertEqual(job.status, ImportJob.Status.DONE, job.failure)
+        return job
+
+
+class JournalImportTests(ImportTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.jama = Journal.objects.create(
+            id=700,
+            name="JAMA Psych",
+            full_name="JAMA Psychiatry",
+            issn="2168-622X",
+        )
+        cls.ajp = Journal.objects.create(
+            name="AJP", full_name="Am J Psychiatry", issn="0002-953X"
+        )
+
+    def test_upload(self):
+        job = self.upload(
+            "journal",
+            "id,name,full_name,issn,eissn,impact_factor,isi_listed\r\n"
+            "700,JAMA Psych,JAMA Psychiatry,2168-622X,,22.5,1\r\n"
+            ',AJP,"Psychiatry, American Journal of",0002-953X,,19.2,True\r\n'
+            ",Lancet Psych,Lancet Psychiatry,2215-0366,,not a number,0\r\n"
+            "12,BJPsych,British Journal of Psychiatry,0007-1250,,10.7,0\r\n"
+            "\r\n",
+        )
+        self.assertEqual((job.created, job.updated, job.rejected), (1, 2, 1))
+        self.assertEqual(job.progress, 100)
+        self.assertContains(self.client.get(self.job_url), "<td>4</td>")
+
+        self.jama.refresh_from_db()
+        self.assertEqual(self.jama.impact_factor, Decimal("22.5"))
+        self.assertTrue(self.jama.isi_listed)
+        self.ajp.refresh_from_db()
+        self.assertEqual(self.ajp.full_name, "Psychiatry, American Journal of")
+        self.assertFalse(Journal.objects.filter(name="Lancet Psych").exists())
+
+        # The id sequence moved past the imported ids.
+        journal = Journal.objects.create(name="New", full_name="New")
+        self.assertGreater(journal.pk, 700)
+
+    def test_refresh(self):
+        Journal.objects.create(name="Gone", full_name="Gone", issn="1-1")
+        path = self.enterContext(tempfile.TemporaryDirectory()) + "/jcr.csv"
+        with open(path, "w") as f:
+            f.write(
+                "name,full_name,issn,eissn,impact_factor,isi_listed\n"
+                "JAMA Psych,JAMA Psychiatry,2168-622X,,25.8,1\n"
+                "AJP,Am J Psychiatry,0002-953X,,,0\n"
+                "Lancet Psych,Lancet Psychiatry,,2215-0366,30.8,1\n"
+                "No ISSN,No ISSN,,,1.0,0\n"
+            )
+        out, err = io.StringIO(), io.StringIO()
+        call_command("refresh_journals", path, dry_run=True, stdout=out)
+        self.assertIn("1 unchanged, 1 updated, 1 new", out.getvalue())
+        self.assertFalse(Journal.objects.filter(issn=None).exists())
+
+        call_command("refresh_journals", path, stdout=out, stderr=err)
+        self.assertIn(
+            "1 unchanged, 1 updated, 1 new, 1 disappeared, 1 rejected.",
+            out.getvalue().splitlines()[-1],
+        )
+        self.assertIn("Line 5: issn:", err.getvalue())
+        self.jama.refresh_from_db()
+        self.assertEqual(self.jama.impact_factor, Decimal("25.8"))
+        self.assertTrue(self.jama.isi_listed)
+        self.assertTrue(Journal.objects.filter(eissn="2215-0366").exists())
+        self.assertTrue(Journal.objects.filter(name="Gone").exists())
+
+        call_command("refresh_journals", path, stdout=out, stderr=err)
+        self.assertIn("3 unchanged, 0 updated, 0 new", out.getvalue())
+
+    def test_resume(self):
+        text = (
+            "id,name,full_name,issn,eissn,impact_factor,isi_listed\n"
+            ",Lancet Psych,Lancet Psychiatry,2215-0366,,30.8,1\n"
+            ",BJPsych,British Journal of Psychiatry,0007-1250,,10.7,0\n"
+            ",Schiz Bull,Schizophrenia Bulletin,0586-7614,,6.6,1\n"
+        )
+        csv_import = site._registry[Journal].csv_import
+        save_progress = jobs.save_progress
+
+        def fail_after_first_row(job, report):
+            if report.line > 2:
+                raise RuntimeError("Worker lost")
+            save_progress(job, report)
+
+        with mock.patch.object(csv_import, "batch_size", 1):
+            with mock.patch.object(
+                jobs, "save_progress", fail_after_first_row
+            ):
+                job = self.process(self.post("journal", text))
+            self.assertEqual(job.status, ImportJob.Status.FAILED)
+            self.assertIn("Worker lost", job.failure)
+            self.assertEqual((job.line, job.created), (2, 1))
+            self.assertEqual(Journal.objects.count(), 3)
+
+            # Uploading the same file again resumes the failed job.
+            self.assertEqual(self.upload("journal", text), job)
+        job.refresh_from_db()
+        self.assertEqual((job.line, job.created, job.updated), (4, 3, 0))
+        self.assertEqual(Journal.objects.count(), 5)
+
+        # Once it is done, importing it again changes nothing.
+        job = self.upload("journal", text)
+        self.assertEqual((job.created, job.updated), (0, 3))
+        self.assertEqual(Journal.objects.count(), 5)
+
+    def test_resume_permission(self):
+        job = ImportJob.objects.create(
+            model="claims.journal",
+            file=SimpleUploadedFile("file.csv", b"id\n"),
+            name="file.csv",
+            size=3,
+            status=ImportJob.Status.FAILED,
+        )
+        staff = get_user_model().objects.create_user(
+            username="staff",
+            email="staff@email.com",
+            password="testpass123",
+            is_staff=True,
+        )
+        staff.user_permissions.add(
+            Permission.objects.get(codename="view_importjob")
+        )
+        self.client.force_login(staff)
+        url = reverse("admin:claims_importjob_changelist")
+        data = {"action": "resume", "_selected_action": [job.pk]}
+        self.assertNotContains(self.client.get(url), 'value="resume"')
+        self.client.post(url, data)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.Status.FAILED)
+
+        staff.user_permissions.add(
+            Permission.objects.get(codename="add_journal")
+        )
+        self.client.post(url, data)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.Status.QUEUED)
+
+    def test_upload_runs_without_worker(self):
+        with override_settings(CLAIM_IMPORT_WORKER=False):
+            self.client.force_login(
+                get_user_model().objects.create_superuser(
+                    username="admin",
+                    email="admin@email.com",
+                    password="testpass123",
+                )
+            )
+            text = "id,name,full_name,issn,eissn,impact_factor,isi_listed\n"
+            text += ",Lancet Psych,Lancet Psychiatry,2215-0366,,30.8,1\n"
+            self.client.post(
+                "/admin/claims/journal/upload_csv/",
+                {"csv_upload": SimpleUploadedFile("f.csv", text.encode())},
+            )
+        job = ImportJob.objects.get()
+        self.assertEqual((job.status, job.created), (ImportJob.Status.DONE, 1))
+
+
+class LectureImportTests(ImportTestMixin, ClaimsTestData, TestCase):
+    def csv(self):
+        rounds = self.grand_rounds.pk
+        return (
+            f"{self.other_user.pk},{rounds},Psychosis,,2022-03-01,2,1,2,,1,2\n"
+            f"{self.user.pk},{rounds},Ethics,,2022-05-01,1,0,,,1,2\n"
+            f"{self.user.pk},999,Mood,,2022-05-01,1,0,,,1,2\n"
+            f"{self.user.pk},{rounds},,,May 2022,1,0,,,1,2\n"
+        )
+
+    def test_dry_run(self):
+        job = self.upload("lecture", self.csv(), dry_run=True)
+        self.assertEqual((job.created, job.updated, job.rejected), (1, 1, 2))
+        response = self.client.get(self.job_url)
+        self.assertContains(response, "Dry run")
+        self.assertContains(response, "lecture_type: lecture type 999")
+        self.assertContains(response, "start_date:")
+        self.assertEqual(Lecture.objects.count(), 1)
+        self.assertEqual(Lecture.objects.get().hours, Decimal("1"))
+
+    def test_import(self):
+        job = self.upload("lecture", self.csv())
+        self.assertEqual((job.created, job.updated, job.rejected), (1, 1, 2))
+        self.assertEqual(
+            dict(Lecture.objects.values_list("name", "hours")),
+            {"Psychosis": Decimal("2"), "Ethics": Decimal("1")},
+        )
+        self.assertEqual(
+            dict(
+                PhysicianScore.objects.filter(category="lectures").values_list(
+                    "user_id", "points"
+                )
+            ),
+            {self.user.pk: Decimal("150"), self.other_user.pk: Decimal("300")},
+        )
+
+
+class DashboardTests(ClaimsTestData, TestCase):
+    def test_home_summary(self):
+        scoring.refresh_scores([self.user.pk])
+        year = self.publication.created_at.year
+        self.client.force_login(self.user)
+        # Savepoint and release, session, user and the summary itself.
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("home"))
+        self.assertEqual(response.context["year"], year)
+        rows = {row["label"]: row for row in response.context["summary"]}
+        self.assertEqual(rows["Awards"]["claims"], 3)
+        self.assertEqual(rows["Awards"]["statuses"], [0, 1, 0, 2])
+        self.assertEqual(rows["Awards"]["points"], Decimal("1200"))
+        self.assertEqual(rows["Publications"]["statuses"], [0, 0, 0, 1])
+        self.assertEqual(rows["Lectures"]["claims"], 0)
+        self.assertEqual(response.context["total"]["claims"], 4)
+        self.assertEqual(response.context["total"]["points"], Decimal("1204"))
+
+
+class StatementTests(ClaimsTestData, TestCase):
+    def test_generate(self):
+        media = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        Award.objects.filter(name="Teaching Award").update(
+            decision_comments="Confirmed (by chair)"
+        )
+        scoring.refresh_scores([self.user.pk])
+        year = self.publication.created_at.year
+
+        out = io.StringIO()
+        with self.assertNumQueries(1 + 1 + len(SECTIONS) + 1):
+            call_command("generate_statements", year, workers=1, stdout=out)
+        self.assertIn("Wrote 2 statements", out.getvalue())
+
+        self.client.force_login(self.user)
+        url = reverse("statement", kwargs={"year": year})
+        response = self.client.get(url)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        pdf = b"".join(response.streaming_content)
+        self.assertTrue(pdf.startswith(b"%PDF-1.4"))
+        self.assertTrue(pdf.endswith(b"%%EOF\n"))
+        self.assertIn(b"(Teaching Award - CAMH)", pdf)
+        self.assertIn(b"(Reviewer: Confirmed \\(by chair\\))", pdf)
+        self.assertIn(b"(Publications \\(1\\): 4.00 points)", pdf)
+        self.assertIn(b"(Total: 1204.00 points)", pdf)
+        self.assertNotIn(b"Pending Award", pdf)
+
+        # Names can't be guessed, and a new run doesn't replace the last.
+        name = statements.latest_statement(self.user.pk, year)
+        self.assertRegex(name, rf"^statements/{year}/{self.user.pk}/\S{{50}}")
+        statements.save_statements([self.user.pk], year)
+        self.assertGreater(
+            statements.latest_statement(self.user.pk, year), name
+        )
+        self.assertTrue(statements.statement_storage().exists(name))
+
+    def test_access(self):
+        media = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        statements.save_statements([self.user.pk], 2022)
+        url = reverse("statement", kwargs={"year": 2022})
+
+        self.client.force_login(self.other_user)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.get(url, {"user": self.user.pk})
+        self.assertEqual(response.status_code, 403)
+
+        self.other_user.is_staff = True
+        self.other_user.save()
+        response = self.client.get(url, {"user": self.user.pk})
+        self.assertEqual(response.status_code, 200)
+
+        self.client.logout()
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+
+class PageCacheTests(ClaimsTestData, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_list_page_is_cached_until_claims_change(self):
+        url = reverse("award_list")
+        first = self.client.get(url)
+        self.assertContains(first, "Teaching Award")
+        # Only the conditional GET validator runs.
+        with self.assertNumQueries(5):
+            cached = self.client.get(url)
+        self.assertEqual(cached.content, first.content)
+
+        award = Award.objects.get(name="Teaching Award")
+        award.decision_comments = "Missing certificate"
+        with self.captureOnCommitCallbacks(execute=True):
+            award.save()
+        self.assertContains(self.client.get(url), "Missing certificate")
+
+    def test_publication_change_expires_linked_pages(self):
+        url = reverse("publication_list")
+        self.assertContains(self.client.get(url), "A Study")
+        self.publication.title = "A Revised Study"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.publication.save()
+        self.assertContains(self.client.get(url), "A Revised Study")
+
+
+class ConditionalGetTests(ClaimsTestData, TestCase):
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def assertNotModified(self, url, response):
+        etag = response.headers["ETag"]
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+
+    def test_list_page(self):
+        url = reverse("award_list")
+        response = self.client.get(url)
+        self.assertIn("no-cache", response.headers["Cache-Control"])
+        self.assertNotModified(url, response)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Award.objects.get(name="Pending Award").delete()
+        etag = response.headers["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "Pending Award")
+
+    def test_update_page(self):
+        url = reverse("edit_publication", kwargs={"pk": self.publication.pk})
+        # The first visit sets the CSRF cookie, which is part of the ETag.
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertNotModified(url, response)
+
+        link = self.publication.publicationlink_set.get()
+        link.is_corresponding = True
+        link.save()
+        etag = response.headers["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        # The author dropdowns list every user, so new ones expire the page.
+        self.assertNotModified(url, response)
+        with self.captureOnCommitCallbacks(execute=True):
+            get_user_model().objects.create_user(
+                username="alex", email="alex@email.com", password="testpass123"
+            )
+        etag = response.headers["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(CLAIM_SYNC_DELAY=0)
+class ClaimApiTests(ClaimsTestData, TestCase):
+    def setUp(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+
+    def fetch(self, section, **params):
+        response = self.client.get(
+            reverse("claims_api", kwargs={"section": section}), params
+        )
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b"".join(response.streaming_content))
+
+    def test_pages_follow_modification_order(self):
+        first = self.fetch("awards", limit=2)
+        self.assertEqual(
+            [row["name"] for row in first["results"]],
+            ["Teaching Award", "Research Award"],
+        )
+        self.assertTrue(first["more"])
+        self.assertEqual(first["results"][0]["award_level_name"], "Local")
+
+        second = self.fetch("awards", limit=2, after=first["next"])
+        self.assertEqual(
+            [row["name"] for row in second["results"]], ["Pending Award"]
+        )
+        self.assertFalse(second["more"])
+
+        # Only claims saved since are returned from the last cursor.
+        self.assertEqual(
+            self.fetch("awards", after=second["next"]),
+            {"results": [], "next": second["next"], "more": False},
+        )
+        Award.objects.get(name="Teaching Award").save()
+        latest = self.fetch("awards", after=second["next"])
+        self.assertEqual(
+            [row["name"] for row in latest["results"]], ["Teaching Award"]
+        )
+
+    def test_recent_rows_wait_for_concurrent_commits(self):
+        with override_settings(CLAIM_SYNC_DELAY=60):
+            self.assertEqual(self.fetch("awards")["results"], [])
+        hour_ago = timezone.now() - datetime.timedelta(hours=1)
+        Award.objects.update(modified_at=hour_ago)
+        with override_settings(CLAIM_SYNC_DELAY=60):
+            self.assertEqual(len(self.fetch("awards")["results"]), 3)
+
+    def test_links_include_parent(self):
+        (row,) = self.fetch("publications")["results"]
+        self.assertEqual(row["publication_title"], "A Study")
+        self.assertEqual(row["role_name"], "First Author")
+        self.assertEqual(row["publication_pub_type_name"], "Journal Article")
+
+    def test_parent_changes_resend_links(self):
+        first = self.fetch("publications")
+        self.publication.title = "A Corrected Study"
+        self.publication.save()
+        (row,) = self.fetch("publications", after=first["next"])["results"]
+        self.assertEqual(row["publication_title"], "A Corrected Study")
+
+    def test_errors(self):
+        url = reverse("claims_api", kwargs={"section": "awards"})
+        self.assertEqual(self.client.get(url, {"after": "x"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"limit": 0}).status_code, 400)
+        url = reverse("claims_api", kwargs={"section": "unknown"})
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.user.is_staff = False
+        self.user.save()
+        url = reverse("claims_api", kwargs={"section": "awards"})
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+class ExportTests(ClaimsTestData, TestCase):
+    def test_admin_csv(self):
+        admin = get_user_model().objects.create_superuser(
+            username="admin", email="admin@email.com", password="testpass123"
+        )
+        self.client.force_login(admin)
+        response = self.client.post(
+            "/admin/claims/award/",
+            {
+                "action": "export_csv",
+                "_selected_action": Award.objects.values_list("pk", flat=True),
+            },
+        )
+        self.assertTrue(response.streaming)
+        text = b"".join(response.streaming_content).decode()
+        header, *rows = csv.reader(io.StringIO(text))
+        self.assertIn("Award Level", header)
+        self.assertEqual(len(rows), 3)
+        levels = [row[header.index("Award Level")] for row in rows]
+        self.assertEqual(sorted(levels), ["Local", "National", "National"])
+
+    def test_xlsx_command(self):
+        path = self.enterContext(tempfile.TemporaryDirectory()) + "/out.xlsx"
+        call_command(
+            "export_claims", "publications", format="xlsx", output=path
+        )
+        with zipfile.ZipFile(path) as archive:
+            self.assertIsNone(archive.testzip())
+            sheet = archive.read("xl/worksheets/sheet1.xml").decode()
+        self.assertIn('<t xml:space="preserve">Publication Title</t>', sheet)
+        self.assertIn(">A Study<", sheet)
+        self.assertIn(">First Author<", sheet)
+        self.assertEqual(sheet.count("<row>"), 2)
+
+
+class BundleTests(ClaimsTestData, TestCase):
+    def setUp(self):
+        media = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+
+    def test_physician_bundle(self):
+        award = Award.objects.get(name="Teaching Award")
+        award.ver_file.save("proof.pdf", ContentFile(b"award" * 50000))
+        self.publication.ver_file.save("paper.pdf", ContentFile(b"paper"))
+        Award.objects.filter(name="Research Award").update(
+            ver_file="uploads/gone.pdf"
+        )
+
+        response = self.client.get(
+            reverse("verification_bundle"), {"user": self.user.pk}
+        )
+        self.assertEqual(response["Content-Type"], "application/zip")
+        content = b"".join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertEqual(
+                archive.namelist(),
+                [
+                    f"awards/{award.pk}-proof.pdf",
+                    f"publications/publication/{self.publication.pk}"
+                    "-paper.pdf",
+                    "MISSING.txt",
+                ],
+            )
+            self.assertEqual(
+                archive.read(archive.namelist()[0]), b"award" * 50000
+            )
+            self.assertEqual(
+                archive.read("MISSING.txt"), b"uploads/gone.pdf\n"
+            )
+
+    def test_errors(self):
+        url = reverse("verification_bundle")
+        self.assertEqual(self.client.get(url).status_code, 400)
+        response = self.client.get(url, {"section": "awards", "year": "x"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(url, {"section": "nope"})
+        self.assertEqual(response.status_code, 404)
+
+
+class SnapshotTests(ClaimsTestData, TestCase):
+    def test_missing_pyarrow(self):
+        modules = {"pyarrow": None, "afp.claims.snapshots": None}
+        with mock.patch.dict(sys.modules, modules):
+            with self.assertRaisesMessage(CommandError, "analytics extra"):
+                call_command("snapshot_claims", "unused")
+
+    @skipUnless(importlib.util.find_spec("pyarrow"), "needs pyarrow")
+    @override_settings(CLAIM_SYNC_DELAY=0)
+    def test_incremental(self):
+        import pyarrow.parquet as pq
+
+        output = self.enterContext(tempfile.TemporaryDirectory())
+        table = Award._meta.db_table
+        call_command(
+            "snapshot_claims", output, chunk_size=2, stdout=io.StringIO()
+        )
+        awards = pq.read_table(f"{output}/{table}")
+        self.assertEqual(awards.num_rows, 3)
+        self.assertIn("award_level_id", awards.column_names)
+        users = pq.read_table(f"{output}/{get_user_model()._meta.db_table}")
+        self.assertNotIn("password", users.column_names)
+
+        award = Award.objects.get(name="Pending Award")
+        award.eligible = 1
+        award.save()
+        out = io.StringIO()
+        call_command("snapshot_claims", output, incremental=True, stdout=out)
+        self.assertIn(f"{table}: 1 rows", out.getvalue())
+        self.assertIn(f"{Lecture._meta.db_table}: 0 rows", out.getvalue())
+        awards = pq.read_table(f"{output}/{table}").to_pylist()
+        self.assertEqual(len(awards), 4)
+        latest = max(awards, key=lambda row: row["modified_at"])
+        self.assertEqual(
+            (latest["id"], latest["eligible"]), (str(award.pk), 1)
+        )
+
+    @skipUnless(importlib.util.find_spec("pyarrow"), "needs pyarrow")
+    @override_settings(CLAIM_SYNC_DELAY=60 * 60)
+    def test_incremental_rereads_unsettled_rows(self):
+        output = self.enterContext(tempfile.TemporaryDirectory())
+        call_command("snapshot_claims", output, stdout=io.StringIO())
+        out = io.StringIO()
+        call_command("snapshot_claims", output, incremental=True, stdout=out)
+        self.assertIn(f"{Award._meta.db_table}: 3 rows", out.getvalue())
+
+
+class RollupTests(ClaimsTestData, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.adult = Division.objects.create(name="Adult")
+        cls.child = Division.objects.create(name="Child")
+        cls.professor = Rank.objects.create(name="Professor")
+        for user, division in [
+            (cls.user, cls.adult),
+            (cls.other_user, cls.child),
+        ]:
+            user.division = division
+            user.rank = cls.professor
+            user.save()
+        agency = GrantAgency.objects.create(
+            name="CIHR",
+            type=GrantAgencyType.objects.create(name="Federal"),
+            category=GrantCategory.objects.create(name="Tier 1", weight=1),
+        )
+        cls.year = cls.publication.created_at.year
+        grant = Grant.objects.create(
+            agency=agency,
+            name="Shared Grant",
+            amount=1000,
+            pi_list="Will",
+            coi_list="Sam",
+            start_date=datetime.date(cls.year, 1, 1),
+            end_date=datetime.date(cls.year + 1, 1, 1),
+            eligible=1,
+        )
+        role = GrantRole.objects.create(name="PI", weight=1)
+        scientist = get_user_model().objects.create_user(
+            username="alex",
+            email="alex@email.com",
+            password="testpass123",
+            is_physician=False,
+        )
+        for user in [cls.user, cls.other_user, scientist]:
+            GrantLink.objects.create(
+                user_id=user, grant=grant, role=role, eligible=1
+            )
+
+    def setUp(self):
+        cache.clear()
+        scoring.refresh_scores([self.user.pk, self.other_user.pk])
+
+    def test_rollup(self):
+        with self.assertNumQueries(2):
+            rollup = reports.cached_rollup(self.year)
+        with self.assertNumQueries(0):
+            self.assertEqual(reports.cached_rollup(self.year), rollup)
+
+        adult = rollup[reports.BY_DIVISION][self.adult.pk]
+        self.assertEqual(
+            [adult[key] for key in reports.TOTALS],
+            [1, 5, 4, Decimal("1205"), Decimal("500")],
+        )
+        child = rollup[reports.BY_DIVISION][self.child.pk]
+        self.assertEqual((child["claims"], child["dollars"]), (1, 500))
+        professor = rollup[reports.BY_RANK][self.professor.pk]
+        self.assertEqual(
+            (professor["physicians"], professor["dollars"]), (2, 1000)
+        )
+        total = rollup[reports.TOTAL][None]
+        self.assertEqual((total["claims"], total["dollars"]), (6, 1000))
+        self.assertEqual(total["publications"], {self.article.pk: 1})
+
+    def test_invalidation(self):
+        rollup = reports.cached_rollup(self.year)
+        self.assertEqual(rollup[reports.TOTAL][None]["claims"], 6)
+        with self.captureOnCommitCallbacks(execute=True):
+            Award.objects.create(
+                user_id=self.other_user,
+                name="New Award",
+                organization="CAMH",
+                award_level=self.local,
+            )
+        rollup = reports.cached_rollup(self.year)
+        self.assertEqual(rollup[reports.TOTAL][None]["claims"], 7)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_user.division = self.adult
+            self.other_user.save()
+        rollup = reports.cached_rollup(self.year)
+        self.assertNotIn(self.child.pk, rollup[reports.BY_DIVISION])
+
+        # A culled version is never restarted at one an old roll-up used.
+        cache.delete(reports.REPORT_VERSION_KEY)
+        with self.assertNumQueries(2):
+            reports.cached_rollup(self.year)
+        cache.delete(reports.REPORT_VERSION_KEY)
+        reports.invalidate()
+        with self.assertNumQueries(2):
+            reports.cached_rollup(self.year)
+
+    def test_admin_page(self):
+        admin = get_user_model().objects.create_superuser(
+            username="admin", email="admin@email.com", password="testpass123"
+        )
+        self.client.force_login(admin)
+        url = reverse("admin:claims_physicianscore_rollup")
+        response = self.client.get(url, {"year": self.year})
+        self.assertContains(response, "<td>Adult</td>")
+        self.assertContains(response, "<th>Journal Article</th>")
+        self.assertContains(response, "<td>1000.00</td>")
+        with mock.patch.object(reports, "invalidate") as invalidate:
+            response = self.client.post(f"{url}?year={self.year}")
+        invalidate.assert_called_once_with()
+        self.assertRedirects(response, f"{url}?year={self.year}")
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Renders every claim page for a physician with many claims, each
+    pointing at its own lookup rows, and checks the number of queries stays
+    within a fixed budget, so N+1 queries can't slip back in.
+    """
+
+    ROWS = 40
+
+    # Every page costs a savepoint, its release, the session and the user.
+    REQUEST_QUERIES = 4
+    # List pages run the conditional GET validator, then the list query.
+    BUDGETS = {
+        "home": 1,
+        "award_list": 2,
+        "promotion_list": 2,
+        "publication_list": 2,
+        "all_publications": 1,
+        "editorial_board_list": 2,
+        "grant_list": 2,
+        "all_grants": 1,
+        "grantreview_list": 2,
+        "committee_list": 2,
+        "lecture_list": 2,
+        "exam_list": 2,
+        "supervision_list": 2,
+        "cpa_list": 2,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username="will", email="will@email.com", password="testpass123"
+        )
+        rows = range(cls.ROWS)
+
+        def lookups(model, **fields):
+            return model.objects.bulk_create(
+                model(name=f"{model.__name__} {i}", **fields) for i in rows
+            )
+
+        def claims(model, **fields):
+            model.objects.bulk_create(
+                model(
+                    user_id=cls.user,
+                    **{
+                        name: value[i] if isinstance(value, list) else value
+                        for name, value in fields.items()
+                    },
+                )
+                for i in rows
+            )
+
+        journals = Journal.objects.bulk_create(
+            Journal(name=f"J {i}", full_name=f"Journal {i}") for i in rows
+        )
+        claims(Award, award_level=lookups(AwardLevel, value=1), name="Award")
+        claims(Promotion, promoted_to=lookups(Rank))
+        claims(EditorialBoard, journal=journals)
+        claims(
+            GrantReview,
+            type=lookups(GrantReviewType),
+            agency="CIHR",
+            name="Panel",
+            date=datetime.date(2022, 1, 1),
+            num_days=1,
+            num_reviewed=1,
+        )
+        claims(CommitteeWork, name="Committee", hours=1)
+        claims(
+            Lecture,
+            lecture_type=lookups(LectureType, weight=1),
+            name="Lecture",
+            start_date=datetime.date(2022, 1, 1),
+            hours=1,
+        )
+        claims(
+            Exam,
+            exam_type=lookups(ExamType, weight=1),
+            student_name="Student",
+            hours=1,
+            date=datetime.date(2022, 1, 1),
+        )
+        claims(
+            Supervision,
+            supervision_type=lookups(SupervisionType, weight=1),
+            frequency=[
+                WorkFrequencyType.objects.create(
+                    name=f"Frequency {i}", days_equal=Decimal(i) / 10
+                )
+                for i in rows
+            ],
+            student_name="Student",
+        )
+        claims(Cpa, cpa_value=1)
+
+        publications = Publication.objects.bulk_create(
+            Publication(
+                pub_type=pub_type,
+                journal=journal,
+                title=f"Publication {i}",
+                authors="Will",
+            )
+            for i, (pub_type, journal) in enumerate(
+                zip(lookups(PublicationType, weight=1), journals)
+            )
+        )
+        claims(
+            PublicationLink,
+            publication=publications,
+            role=lookups(PublicationRole, weight=1),
+        )
+        agency_type = GrantAgencyType.objects.create(name="Federal")
+        category = GrantCategory.objects.create(name="Tier 1", weight=1)
+        grants = Grant.objects.bulk_create(
+            Grant(
+                agency=agency,
+                name=f"Grant {i}",
+                amount=1000,
+                pi_list="Will",
+                coi_list="Sam",
+                start_date=datetime.date(2022, 1, 1),
+                end_date=datetime.date(2023, 1, 1),
+            )
+            for i, agency in enumerate(
+                lookups(GrantAgency, type=agency_type, category=category)
+            )
+        )
+        claims(GrantLink, grant=grants, role=lookups(GrantRole, weight=1))
+
+    def test_query_budgets(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        lookups.get_snapshot()
+        for url_name, budget in self.BUDGETS.items():
+            with self.subTest(url_name):
+                with self.assertNumQueries(self.REQUEST_QUERIES + budget):
+                    response = self.client.get(reverse(url_name))
+                self.assertEqual(response.status_code, 200)
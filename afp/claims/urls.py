@@ -46,6 +46,11 @@ urlpatterns += [
         views.PublicationListView.as_view(),
         name="publication_list",
     ),
+    path(
+        "publications/all",
+        views.AllPublicationListView.as_view(),
+        name="all_publications",
+    ),
     path(
         "publications/add",
         views.PublicationCreateView.as_view(),
@@ -92,6 +97,11 @@ urlpatterns += [
         views.GrantListView.as_view(),
         name="grant_list",
     ),
+    path(
+        "grants/all",
+        views.AllGrantListView.as_view(),
+        name="all_grants",
+    ),
     path(
         "grants/add",
         views.GrantCreateView.as_view(),
@@ -222,3 +232,41 @@ urlpatterns += [
         name="delete_cpa",
     ),
 ]
+
+urlpatterns += [
+    path(
+        "scores/simulate",
+        views.ScoreSimulationView.as_view(),
+        name="simulate_scores",
+    ),
+]
+
+urlpatterns += [
+    path(
+        "journals/autocomplete",
+        views.JournalAutocompleteView.as_view(),
+        name="journal_autocomplete",
+    ),
+]
+
+urlpatterns += [
+    path(
+        "api/<slug:section>", views.ClaimApiView.as_view(), name="claims_api"
+    ),
+]
+
+urlpatterns += [
+    path(
+        "bundles/verification",
+        views.VerificationBundleView.as_view(),
+        name="verification_bundle",
+    ),
+]
+
+urlpatterns += [
+    path(
+        "statements/<int:year>",
+        views.StatementView.as_view(),
+        name="statement",
+    ),
+]
@@ -1,29 +1,56 @@
-from django.contrib.auth.mixins import LoginRequiredMixin
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.exceptions import PermissionDenied
+from django.db.models import Count, Exists, Max, OuterRef, Q
+from django.db.models.functions import Greatest
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
 from django.views.generic import (
     CreateView,
     DeleteView,
     ListView,
     TemplateView,
     UpdateView,
+    View,
 )
 
+from afp.utils import versions
+
+from . import api, bundles, pagecache, signals, statements
+from .dashboard import Status, claim_summary
 from .forms import (
     AwardForm,
     CommitteeWorkForm,
     CpaForm,
     EditorialBoardForm,
     ExamForm,
+    GrantFilterForm,
     GrantForm,
     GrantLinkFormSet,
     GrantReviewForm,
     LectureForm,
     PromotionForm,
+    PublicationFilterForm,
     PublicationForm,
     PublicationLinkFormSet,
     SupervisionForm,
+    WeightScenarioForm,
 )
+from .lookups import get_snapshot
 from .models import (
     Award,
     CommitteeWork,
@@ -33,17 +60,142 @@ from .models import (
     Grant,
     GrantLink,
     GrantReview,
+    Journal,
     Lecture,
     Promotion,
     Publication,
     PublicationLink,
     Supervision,
 )
+from .pagination import InvalidCursor, keyset_page
+from .scoring import simulate, simulation_rows
+from .search import JOURNAL_SEARCH
 
 
 class HomeView(LoginRequiredMixin, TemplateView):
     template_name = "home.html"
 
+    def get_context_data(self, **kwargs):
+        year = timezone.localdate().year
+        rows, total = claim_summary(self.request.user, year)
+        kwargs.update(
+            year=year,
+            summary=rows,
+            total=total,
+            statuses=Status.labels,
+        )
+        return super().get_context_data(**kwargs)
+
+
+class KeysetListView(LoginRequiredMixin, ListView):
+    """
+    Serves one page of a department-wide table as table rows, for the htmx
+    "load more" tables of the list pages. Search, filters and sort come from
+    `filter_form_class`; the next page is requested with the ``after``
+    cursor of the last row.
+    """
+
+    filter_form_class = None
+
+    def get(self, request, *args, **kwargs):
+        self.filter_form = self.filter_form_class(request.GET)
+        if not self.filter_form.is_valid():
+            return HttpResponseBadRequest()
+        try:
+            return super().get(request, *args, **kwargs)
+        except InvalidCursor:
+            return HttpResponseBadRequest()
+
+    def get_context_data(self, **kwargs):
+        rows, cursor = keyset_page(
+            self.object_list,
+            self.filter_form.get_sort(),
+            self.request.GET.get("after"),
+        )
+        next_url = None
+        if cursor is not None:
+            params = self.request.GET.copy()
+            params["after"] = cursor
+            next_url = f"{self.request.path}?{params.urlencode()}"
+        return super().get_context_data(
+            object_list=rows, next_url=next_url, **kwargs
+        )
+
+
+class ConditionalGetMixin:
+    """
+    Answers GET requests with 304 Not Modified while the browser's copy is
+    current, at the cost of one aggregate query. The validator is the
+    latest of `validator_fields` and the number of rows of
+    `get_validator_queryset()` (the physician's claims on list pages, the
+    claim on edit pages), plus everything else a page depends on: the
+    lookup snapshot, the user, the CSRF secret and the release. Pages with
+    `lists_users` offer every user in a dropdown, so they also depend on
+    the version of the user table (see `signals.user_changed`).
+    """
+
+    validator_fields = ("modified_at",)
+    lists_users = False
+
+    def get_validator_queryset(self):
+        if "pk" in self.kwargs:
+            return self.model.objects.filter(pk=self.kwargs["pk"])
+        return self.model.objects.filter(user_id=self.request.user)
+
+    def get_validator(self):
+        stamps = [Max(field) for field in self.validator_fields]
+        row = self.get_validator_queryset().aggregate(
+            rows=Count("pk"),
+            modified_at=Greatest(*stamps) if len(stamps) > 1 else stamps[0],
+        )
+        etag = hashlib.md5(
+            repr(
+                (
+                    row["rows"],
+                    row["modified_at"],
+                    get_snapshot().version,
+                    self.lists_users
+                    and versions.get_version(signals.USERS_VERSION_KEY),
+                    self.request.user.pk,
+                    self.request.META.get("CSRF_COOKIE"),
+                    settings.RELEASE,
+                )
+            ).encode()
+        ).hexdigest()
+        return etag, row["modified_at"]
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validator()
+        view = condition(
+            etag_func=lambda request, *args, **kwargs: etag,
+            last_modified_func=lambda request, *args, **kwargs: last_modified,
+        )(super().get)
+        response = view(request, *args, **kwargs)
+        # Make browsers revalidate every time rather than guess a lifetime
+        # from Last-Modified.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class CachedPageMixin:
+    """
+    Serves a physician's list page from the page cache (see `pagecache`),
+    rendering and storing it on a miss.
+    """
+
+    cache_section = None
+
+    def get(self, request, *args, **kwargs):
+        key, content = pagecache.get_page(request.user.pk, self.cache_section)
+        if content is not None:
+            return HttpResponse(content)
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.add_post_render_callback(
+                lambda response: pagecache.set_page(key, response.content)
+            )
+        return response
+
 
 class UserMixin:
     def form_valid(self, form):
@@ -51,13 +203,18 @@ class UserMixin:
         return super().form_valid(form)
 
 
-class AwardListView(LoginRequiredMixin, ListView):
+class AwardListView(
+    LoginRequiredMixin, ConditionalGetMixin, CachedPageMixin, ListView
+):
     model = Award
     template_name = "claims/awards.html"
     context_object_name = "awards"
+    cache_section = "awards"
 
     def get_queryset(self):
-        return Award.objects.filter(user_id=self.request.user)
+        return Award.objects.filter(user_id=self.request.user).select_related(
+            "award_level"
+        )
 
 
 class AwardCreateView(LoginRequiredMixin, CreateView):
@@ -73,7 +230,7 @@ class AwardCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class AwardUpdateView(LoginRequiredMixin, UpdateView):
+class AwardUpdateView(LoginRequiredMixin, ConditionalGetMixin, UpdateView):
     model = Award
     form_class = AwardForm
     template_name = "claims/award_form.html"
@@ -87,13 +244,18 @@ class AwardDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy("award_list")
 
 
-class PromotionListView(LoginRequiredMixin, ListView):
+class PromotionListView(
+    LoginRequiredMixin, ConditionalGetMixin, CachedPageMixin, ListView
+):
     model = Promotion
     template_name = "claims/promotions.html"
     context_object_name = "promotions"
+    cache_section = "promotions"
 
     def get_queryset(self):
-        return Promotion.objects.filter(user_id=self.request.user)
+        return Promotion.objects.filter(
+            user_id=self.request.user
+        ).select_related("promoted_to")
 
 
 class PromotionCreateView(LoginRequiredMixin, CreateView):
@@ -109,7 +271,7 @@ class PromotionCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class PromotionUpdateView(LoginRequiredMixin, UpdateView):
+class PromotionUpdateView(LoginRequiredMixin, ConditionalGetMixin, UpdateView):
     model = Promotion
     form_class = PromotionForm
     template_name = "claims/promotion_form.html"
@@ -123,22 +285,41 @@ class PromotionDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy("promotion_list")
 
 
-class PublicationListView(LoginRequiredMixin, ListView):
+class PublicationListView(
+    LoginRequiredMixin, ConditionalGetMixin, CachedPageMixin, ListView
+):
     model = PublicationLink
     template_name = "claims/publications.html"
     context_object_name = "publications"
+    cache_section = "publications"
+    validator_fields = ("modified_at", "publication__modified_at")
 
     def get_queryset(self):
         queryset = {
             "my_pubs": PublicationLink.objects.filter(
                 user_id=self.request.user
-            ).select_related("publication"),
-            "all_pubs": PublicationLink.objects.all()
-            .distinct("publication")
-            .select_related("publication"),
+            ).select_related(
+                "publication__pub_type", "publication__journal", "role"
+            ),
         }
         return queryset
 
+    def get_context_data(self, **kwargs):
+        kwargs.setdefault("filter_form", PublicationFilterForm())
+        return super().get_context_data(**kwargs)
+
+
+class AllPublicationListView(KeysetListView):
+    template_name = "claims/all_publications.html"
+    context_object_name = "publications"
+    filter_form_class = PublicationFilterForm
+
+    def get_queryset(self):
+        queryset = Publication.objects.filter(
+            Exists(PublicationLink.objects.filter(publication=OuterRef("pk")))
+        ).select_related("pub_type")
+        return self.filter_form.filter(queryset)
+
 
 class PublicationInline:
     form_class = PublicationForm
@@ -164,12 +345,8 @@ class PublicationInline:
         return redirect("publication_list")
 
     def formset_links_valid(self, formset):
-        links = formset.save(commit=False)
-        for obj in formset.deleted_objects:
-            obj.delete()
-        for link in links:
-            link.publication = self.object
-            link.save()
+        formset.save_bulk(self.object)
+        signals.links_saved(formset)
 
 
 class PublicationCreateView(LoginRequiredMixin, PublicationInline, CreateView):
@@ -191,7 +368,12 @@ class PublicationCreateView(LoginRequiredMixin, PublicationInline, CreateView):
             }
 
 
-class PublicationUpdateView(LoginRequiredMixin, PublicationInline, UpdateView):
+class PublicationUpdateView(
+    LoginRequiredMixin, ConditionalGetMixin, PublicationInline, UpdateView
+):
+    validator_fields = ("modified_at", "publicationlink__modified_at")
+    lists_users = True
+
     def get_context_data(self, **kwargs):
         ctx = super(PublicationUpdateView, self).get_context_data(**kwargs)
         ctx["named_formsets"] = self.get_named_formsets()
@@ -215,22 +397,39 @@ class PublicationDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy("publication_list")
 
 
-class GrantListView(LoginRequiredMixin, ListView):
+class GrantListView(
+    LoginRequiredMixin, ConditionalGetMixin, CachedPageMixin, ListView
+):
     model = GrantLink
     template_name = "claims/grants.html"
     context_object_name = "grants"
+    cache_section = "grants"
+    validator_fields = ("modified_at", "grant__modified_at")
 
     def get_queryset(self):
         queryset = {
             "my_grants": GrantLink.objects.filter(
                 user_id=self.request.user
-            ).select_related("grant"),
-            "all_grants": GrantLink.objects.all()
-            .distinct("grant")
-            .select_related("grant"),
+            ).select_related("grant__agency", "role"),
         }
         return queryset
 
+    def get_context_data(self, **kwargs):
+        kwargs.setdefault("filter_form", GrantFilterForm())
+        return super().get_context_data(**kwargs)
+
+
+class AllGrantListView(KeysetListView):
+    template_name = "claims/all_grants.html"
+    context_object_name = "grants"
+    filter_form_class = GrantFilterForm
+
+    def get_queryset(self):
+        queryset = Grant.objects.filter(
+            Exists(GrantLink.objects.filter(grant=OuterRef("pk")))
+        ).select_related("agency")
+        return self.filter_form.filter(queryset)
+
 
 class GrantInline:
     form_class = GrantForm
@@ -256,12 +455,8 @@ class GrantInline:
         return redirect("grant_list")
 
     def formset_links_valid(self, formset):
-        links = formset.save(commit=False)
-        for obj in formset.deleted_objects:
-            obj.delete()
-        for link in links:
-            link.grant = self.object
-            link.save()
+        formset.save_bulk(self.object)
+        signals.links_saved(formset)
 
 
 class GrantCreateView(LoginRequiredMixin, GrantInline, CreateView):
@@ -283,7 +478,12 @@ class GrantCreateView(LoginRequiredMixin, GrantInline, CreateView):
             }
 
 
-class GrantUpdateView(LoginRequiredMixin, GrantInline, UpdateView):
+class GrantUpdateView(
+    LoginRequiredMixin, ConditionalGetMixin, GrantInline, UpdateView
+):
+    validator_fields = ("modified_at", "grantlink__modified_at")
+    lists_users = True
+
     def get_context_data(self, **kwargs):
         ctx = super(GrantUpdateView, self).get_context_data(**kwargs)
         ctx["named_formsets"] = self.get_named_formsets()
@@ -307,13 +507,18 @@ class GrantDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy("grant_list")
 
 
-class GrantReviewListView(LoginRequiredMixin, ListView):
+class GrantReviewListView(
+    LoginRequiredMixin, ConditionalGetMixin, CachedPageMixin, ListView
+):
     model = GrantReview
     template_name = "claims/grant_reviews.html"
     context_object_name = "grantreviews"
+    cache_section = "grant_reviews"
 
     def get_queryset(self):
-        return GrantReview.objects.filter(user_id=self.request.user)
+        return GrantReview.objects.filter(
+            user_id=self.request.user
+        ).select_related("type")
 
 
 class GrantReviewCreateView(LoginRequiredMixin, CreateView):
@@ -329,7 +534,9 @@ class GrantReviewCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class GrantReviewUpdateView(LoginRequiredMixin, UpdateView):
+class GrantReviewUpdateView(
+    LoginRequiredMixin, ConditionalGetMixin, UpdateView
+):
     model = GrantReview
     form_class = GrantReviewForm
     template_name = "claims/grant_review_form.html"
@@ -343,13 +550,18 @@ class GrantReviewDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy("grantreview_list")
 
 
-class EditorialBoardListView(LoginRequiredMixin, ListView):
+class EditorialBoardListView(
+    LoginRequiredMixin, ConditionalGetMixin, CachedPageMixin, ListView
+):
     model = EditorialBoard
     template_name = "claims/editorial_boards.html"
     context_object_name = "editorial_boards"
+    cache_section = "editorial_boards"
 
     def get_queryset(self):
-        return EditorialBoard.objects.filter(user_id=self.request.user)
+        return EditorialBoard.objects.filter(
+            user_id=self.request.user
+        ).select_related("journal")
 
 
 class EditorialBoardCreateView(LoginRequiredMixin, CreateView):
@@ -365,7 +577,9 @@ class EditorialBoardCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class EditorialBoardUpdateView(LoginRequiredMixin, UpdateView):
+class EditorialBoardUpdateView(
+    LoginRequiredMixin, ConditionalGetMixin, UpdateView
+):
     model = EditorialBoard
     form_class = EditorialBoardForm
     template_name = "claims/editorial_board_form.html"
@@ -379,10 +593,13 @@ class EditorialBoardDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy("editorial_board_list")
 
 
-class CommitteeListView(LoginRequiredMixin, ListView):
+class CommitteeListView(
+    LoginRequiredMixin, ConditionalGetMixin, CachedPageMixin, ListView
+):
     model = CommitteeWork
     template_name = "claims/committees.html"
     context_object_name = "committees"
+    cache_section = "committees"
 
     def get_queryset(self):
         return CommitteeWork.objects.filter(user_id=self.request.user)
@@ -401,7 +618,7 @@ class CommitteeCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class CommitteeUpdateView(LoginRequiredMixin, UpdateView):
+class CommitteeUpdateView(LoginRequiredMixin, ConditionalGetMixin, UpdateView):
     model = CommitteeWork
     form_class = CommitteeWorkForm
     template_name = "claims/committee_form.html"
@@ -422,13 +639,18 @@ class CommitteeDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy("committee_list")
 
 
-class LectureListView(LoginRequiredMixin, ListView):
+class LectureListView(
+    LoginRequiredMixin, ConditionalGetMixin, CachedPageMixin, ListView
+):
     model = Lecture
     template_name = "claims/lectures.html"
     context_object_name = "lectures"
+    cache_section = "lectures"
 
     def get_queryset(self):
-        return Lecture.objects.filter(user_id=self.request.user)
+        return Lecture.objects.filter(
+            user_id=self.request.user
+        ).select_related("lecture_type")
 
 
 class LectureCreateView(LoginRequiredMixin, CreateView):
@@ -444,7 +666,7 @@ class LectureCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class LectureUpdateView(LoginRequiredMixin, UpdateView):
+class LectureUpdateView(LoginRequiredMixin, ConditionalGetMixin, UpdateView):
     model = Lecture
     form_class = LectureForm
     template_name = "claims/lecture_form.html"
@@ -465,13 +687,18 @@ class LectureDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy("lecture_list")
 
 
-class ExamListView(LoginRequiredMixin, ListView):
+class ExamListView(
+    LoginRequiredMixin, ConditionalGetMixin, CachedPageMixin, ListView
+):
     model = Exam
     template_name = "claims/exams.html"
     context_object_name = "exams"
+    cache_section = "exams"
 
     def get_queryset(self):
-        return Exam.objects.filter(user_id=self.request.user)
+        return Exam.objects.filter(user_id=self.request.user).select_related(
+            "exam_type"
+        )
 
 
 class ExamCreateView(LoginRequiredMixin, CreateView):
@@ -487,7 +714,7 @@ class ExamCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class ExamUpdateView(LoginRequiredMixin, UpdateView):
+class ExamUpdateView(LoginRequiredMixin, ConditionalGetMixin, UpdateView):
     model = Exam
     form_class = ExamForm
     template_name = "claims/exam_form.html"
@@ -508,13 +735,18 @@ class ExamDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy("exam_list")
 
 
-class SupervisionListView(LoginRequiredMixin, ListView):
+class SupervisionListView(
+    LoginRequiredMixin, ConditionalGetMixin, CachedPageMixin, ListView
+):
     model = Supervision
     template_name = "claims/supervision.html"
     context_object_name = "supervisions"
+    cache_section = "supervision"
 
     def get_queryset(self):
-        return Supervision.objects.filter(user_id=self.request.user)
+        return Supervision.objects.filter(
+            user_id=self.request.user
+        ).select_related("supervision_type", "frequency")
 
 
 class SupervisionCreateView(LoginRequiredMixin, CreateView):
@@ -530,7 +762,9 @@ class SupervisionCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class SupervisionUpdateView(LoginRequiredMixin, UpdateView):
+class SupervisionUpdateView(
+    LoginRequiredMixin, ConditionalGetMixin, UpdateView
+):
     model = Supervision
     form_class = SupervisionForm
     template_name = "claims/supervision_form.html"
@@ -551,10 +785,13 @@ class SupervisionDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy("supervision_list")
 
 
-class CpaListView(LoginRequiredMixin, ListView):
+class CpaListView(
+    LoginRequiredMixin, ConditionalGetMixin, CachedPageMixin, ListView
+):
     model = Cpa
     template_name = "claims/cpa.html"
     context_object_name = "cpa_list"
+    cache_section = "cpa"
 
     def get_queryset(self):
         return Cpa.objects.filter(user_id=self.request.user)
@@ -573,7 +810,7 @@ class CpaCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class CpaUpdateView(LoginRequiredMixin, UpdateView):
+class CpaUpdateView(LoginRequiredMixin, ConditionalGetMixin, UpdateView):
     model = Cpa
     form_class = CpaForm
     template_name = "claims/cpa_form.html"
@@ -585,3 +822,167 @@ class CpaDeleteView(LoginRequiredMixin, DeleteView):
     queryset = Cpa.objects.all()
     template_name = "claims/confirm_delete.html"
     success_url = reverse_lazy("cpa_list")
+
+
+class StaffRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
+    def test_func(self):
+        return self.request.user.is_staff
+
+
+class ScoreSimulationView(StaffRequiredMixin, View):
+    """
+    What-if API. POST a JSON body such as
+    ``{"year": 2022, "weights": {"PublicationRole": {"1": "1.5"}}}`` to get
+    every physician's current and simulated points. Nothing is saved.
+    """
+
+    def post(self, request, *args, **kwargs):
+        try:
+            payload = json.loads(request.body or "{}")
+            data = {"year": payload.get("year")}
+            for table, weights in payload.get("weights", {}).items():
+                for pk, weight in weights.items():
+                    data[f"{table}-{pk}"] = weight
+        except (ValueError, AttributeError):
+            return JsonResponse({"error": "Invalid JSON payload."}, status=400)
+
+        form = WeightScenarioForm(data)
+        unknown = sorted(set(data) - set(form.fields))
+        if unknown:
+            return JsonResponse(
+                {"error": f"Unknown weights: {', '.join(unknown)}"}, status=400
+            )
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        year = form.cleaned_data["year"]
+        rows = simulation_rows(simulate(form.overrides(), year=year))
+        return JsonResponse({"year": year, "results": rows})
+
+
+class JournalAutocompleteView(LoginRequiredMixin, View):
+    """
+    Journals whose abbreviation, title or ISSN contain ``q``, as
+    ``{"results": [{"id": ..., "text": ...}, ...]}`` for `AutocompleteSelect`.
+    """
+
+    limit = 20
+
+    def get(self, request, *args, **kwargs):
+        text = request.GET.get("q", "").strip()
+        journals = []
+        if text:
+            journals = (
+                JOURNAL_SEARCH.filter(Journal.objects.all(), text)
+                .annotate(prefix=Q(name__istartswith=text))
+                .order_by("-prefix", "name")
+                .values("pk", "full_name", "issn")[: self.limit]
+            )
+        results = [
+            {
+                "id": journal["pk"],
+                "text": journal["full_name"],
+                "issn": journal["issn"],
+            }
+            for journal in journals
+        ]
+        return JsonResponse({"results": results})
+
+
+class ClaimApiView(StaffRequiredMixin, View):
+    """
+    Every claim of one section, streamed as JSON; see `api`. Pass the
+    ``next`` value of a response as ``after`` to get the following rows.
+    """
+
+    def get(self, request, section, *args, **kwargs):
+        section = api.SECTIONS_BY_KEY.get(section)
+        if section is None:
+            return JsonResponse({"error": "Unknown section."}, status=404)
+        try:
+            limit = int(request.GET.get("limit", api.DEFAULT_LIMIT))
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= api.MAX_LIMIT:
+            return JsonResponse(
+                {"error": f"limit must be between 1 and {api.MAX_LIMIT}."},
+                status=400,
+            )
+        try:
+            content = api.export(section, request.GET.get("after"), limit)
+        except InvalidCursor:
+            return JsonResponse({"error": "Invalid cursor."}, status=400)
+        return StreamingHttpResponse(content, content_type="application/json")
+
+
+class VerificationBundleView(StaffRequiredMixin, View):
+    """
+    The verification files of a physician (``?user=<id>``) or a claim
+    section (``?section=<key>``), optionally for one ``year``, streamed as
+    a zip archive; see `bundles`.
+    """
+
+    def get(self, request, *args, **kwargs):
+        key = request.GET.get("section")
+        if key is None:
+            sections = api.SECTIONS_BY_KEY.values()
+        elif key in api.SECTIONS_BY_KEY:
+            sections = [api.SECTIONS_BY_KEY[key]]
+        else:
+            return JsonResponse({"error": "Unknown section."}, status=404)
+        try:
+            user = request.GET.get("user")
+            users = None if user is None else [int(user)]
+            year = request.GET.get("year")
+            year = None if year is None else int(year)
+        except ValueError:
+            return JsonResponse(
+                {"error": "user and year must be numbers."}, status=400
+            )
+        if key is None and users is None:
+            return JsonResponse(
+                {"error": "Give a user or a section."}, status=400
+            )
+
+        parts = ["verification", key, user, year and str(year)]
+        filename = "-".join(part for part in parts if part)
+        response = StreamingHttpResponse(
+            bundles.bundle(sections, users, year),
+            content_type="application/zip",
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="{filename}.zip"'
+        return response
+
+
+class StatementView(LoginRequiredMixin, View):
+    """
+    A physician's latest annual statement for `year`. Staff can fetch any
+    physician's with ``?user=<id>``; see `statements`.
+    """
+
+    def get(self, request, year, *args, **kwargs):
+        user = request.GET.get("user")
+        if user is None:
+            user_pk = request.user.pk
+        elif not request.user.is_staff:
+            raise PermissionDenied
+        else:
+            try:
+                user_pk = int(user)
+            except ValueError:
+                return JsonResponse(
+                    {"error": "user must be a number."}, status=400
+                )
+
+        storage = statements.statement_storage()
+        name = statements.latest_statement(user_pk, year, storage)
+        if name is None:
+            raise Http404("No statement for this year.")
+        return FileResponse(
+            storage.open(name, "rb"),
+            as_attachment=True,
+            filename=f"afp-statement-{year}-{user_pk}.pdf",
+            content_type="application/pdf",
+        )
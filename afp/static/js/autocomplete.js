@@ -0,0 +1,40 @@
+// Turns every <select data-autocomplete-url> (see AutocompleteSelect) into a
+// Tom Select box that fetches its options from the server as the user types.
+document.addEventListener("DOMContentLoaded", function () {
+  document.querySelectorAll("select[data-autocomplete-url]").forEach(function (select) {
+    new TomSelect(select, {
+      valueField: "id",
+      labelField: "text",
+      searchField: [],
+      // The server already filtered and ordered the results.
+      score: function () {
+        return function () {
+          return 1;
+        };
+      },
+      // The trigram index behind the endpoints can't serve shorter queries.
+      shouldLoad: function (query) {
+        return query.length >= 3;
+      },
+      load: function (query, callback) {
+        var url = select.dataset.autocompleteUrl + "?q=" + encodeURIComponent(query);
+        fetch(url)
+          .then(function (response) {
+            return response.json();
+          })
+          .then(function (data) {
+            callback(data.results);
+          })
+          .catch(function () {
+            callback();
+          });
+      },
+      render: {
+        option: function (item, escape) {
+          var issn = item.issn ? ' <small class="text-muted">' + escape(item.issn) + "</small>" : "";
+          return "<div>" + escape(item.text) + issn + "</div>";
+        },
+      },
+    });
+  });
+});
@@ -0,0 +1,135 @@
+"""
+A minimal PDF writer for plain text documents.
+
+Enough for generated statements and reports: left-aligned lines in the
+standard Helvetica fonts, wrapped to the page width and flowed onto as many
+Letter pages as needed. The standard fonts need no embedding, so a document
+is a few kilobytes and takes no third-party library to produce. Text is
+encoded as Windows-1252; other characters print as "?".
+"""
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+MARGIN = 54
+FONTS = {False: "F1", True: "F2"}
+
+# Approximate Helvetica advance widths, in ems, erring on the wide side so
+# wrapped lines never run past the margin.
+NARROW = set(" !'(),./:;I[]fijlrt|")
+WIDE = set("%@MWmw")
+
+
+def text_width(text, size):
+    width = 0
+    for char in text:
+        if char in NARROW:
+            width += 0.33
+        elif char in WIDE:
+            width += 0.95
+        elif char.isupper() or char.isdigit():
+            width += 0.7
+        else:
+            width += 0.58
+    return width * size
+
+
+def wrap(text, width, size):
+    """Split `text` into lines no wider than `width` points."""
+    lines = []
+    for paragraph in str(text).splitlines() or [""]:
+        line = ""
+        for word in paragraph.split(" "):
+            candidate = f"{line} {word}" if line else word
+            if text_width(candidate, size) <= width:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            while text_width(word, size) > width:
+                cut = len(word) - 1
+                while cut > 1 and text_width(word[:cut], size) > width:
+                    cut -= 1
+                lines.append(word[:cut])
+                word = word[cut:]
+            line = word
+        lines.append(line)
+    return lines
+
+
+def escape(text):
+    data = text.encode("cp1252", errors="replace")
+    return (
+        data.replace(b"\\", b"\\\\")
+        .replace(b"(", b"\\(")
+        .replace(b")", b"\\)")
+    )
+
+
+class TextDocument:
+    """A document built line by line and rendered with `render()`."""
+
+    def __init__(self, title=""):
+        self.title = title
+        self.pages = []
+        self.new_page()
+
+    def new_page(self):
+        self.pages.append([])
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def text(self, text, size=10, bold=False, indent=0, space_before=0):
+        """Add a paragraph, wrapped to the page width."""
+        left = MARGIN + indent
+        leading = size * 1.3
+        self.y -= space_before
+        for line in wrap(text, PAGE_WIDTH - MARGIN - left, size):
+            if self.y - leading < MARGIN:
+                self.new_page()
+            self.y -= leading
+            self.pages[-1].append(
+                b"BT /%s %g Tf %g %g Td (%s) Tj ET"
+                % (FONTS[bold].encode(), size, left, self.y, escape(line))
+            )
+
+    def render(self):
+        """Return the document as PDF bytes."""
+        objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            None,
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+            b"/Encoding /WinAnsiEncoding >>",
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold "
+            b"/Encoding /WinAnsiEncoding >>",
+            b"<< /Title (%s) >>" % escape(self.title),
+        ]
+        kids = []
+        for operations in self.pages:
+            content = b"\n".join(operations)
+            objects.append(
+                b"<< /Length %d >>\nstream\n%s\nendstream"
+                % (len(content), content)
+            )
+            objects.append(
+                b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+                b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> "
+                b"/Contents %d 0 R >>"
+                % (PAGE_WIDTH, PAGE_HEIGHT, len(objects))
+            )
+            kids.append(b"%d 0 R" % len(objects))
+        objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            b" ".join(kids),
+            len(kids),
+        )
+
+        output = bytearray(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(len(output))
+            output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+        xref = len(output)
+        output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+        for offset in offsets:
+            output += b"%010d 00000 n \n" % offset
+        output += (
+            b"trailer\n<< /Size %d /Root 1 0 R /Info 5 0 R >>\n"
+            b"startxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+        )
+        return bytes(output)
@@ -0,0 +1,117 @@
+"""
+Spreadsheets written as a stream of chunks.
+
+Both writers take an iterable of rows (the first being the header) and
+return an iterator of encoded chunks, holding no more than `ROWS_PER_CHUNK`
+rows in memory at a time, so a response or file can be fed straight from a
+database cursor.
+
+XLSX files are zip archives of XML parts. The worksheet part is compressed
+as it is written into a `zipfile.ZipFile` over a write-only buffer (see
+`afp.utils.zipstream`), so nothing has to be spooled to disk first. Cells
+hold numbers, booleans or inline strings; dates are written as ISO strings,
+which needs no style sheet.
+"""
+import csv
+import io
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from .zipstream import StreamBuffer
+
+ROWS_PER_CHUNK = 500
+
+# Characters XML 1.0 does not allow, even escaped.
+ILLEGAL_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">\
+<Default Extension="rels" \
+ContentType="application/vnd.openxmlformats-package.relationships+xml"/>\
+<Default Extension="xml" ContentType="application/xml"/>\
+<Override PartName="/xl/workbook.xml" \
+ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.\
+sheet.main+xml"/>\
+<Override PartName="/xl/worksheets/sheet1.xml" \
+ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.\
+worksheet+xml"/>\
+</Types>"""
+
+ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships \
+xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" \
+Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/\
+officeDocument" Target="xl/workbook.xml"/>\
+</Relationships>"""
+
+WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook \
+xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" \
+xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">\
+<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>\
+</workbook>"""
+
+WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships \
+xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" \
+Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/\
+worksheet" Target="worksheets/sheet1.xml"/>\
+</Relationships>"""
+
+SHEET_START = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet \
+xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">\
+<sheetData>"""
+
+SHEET_END = "</sheetData></worksheet>"
+
+
+def csv_chunks(rows):
+    """Yield a CSV file of `rows` as strings."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for i, row in enumerate(rows, 1):
+        writer.writerow("" if value is None else value for value in row)
+        if i % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def xlsx_cell(value):
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c t="n"><v>{value}</v></c>'
+    text = escape(ILLEGAL_XML.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def xlsx_chunks(rows, sheet="Sheet1"):
+    """Yield an XLSX workbook of `rows`, on one sheet, as bytes."""
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", ROOT_RELS)
+        archive.writestr(
+            "xl/workbook.xml", WORKBOOK.format(name=escape(sheet[:31]))
+        )
+        archive.writestr("xl/_rels/workbook.xml.rels", WORKBOOK_RELS)
+        with archive.open(
+            "xl/worksheets/sheet1.xml", "w", force_zip64=True
+        ) as part:
+            part.write(SHEET_START.encode())
+            for i, row in enumerate(rows, 1):
+                cells = "".join(xlsx_cell(value) for value in row)
+                part.write(f"<row>{cells}</row>".encode())
+                if i % ROWS_PER_CHUNK == 0:
+                    yield buffer.drain()
+            part.write(SHEET_END.encode())
+    yield buffer.drain()
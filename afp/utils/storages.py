@@ -9,3 +9,15 @@ class StaticRootGoogleCloudStorage(GoogleCloudStorage):
 class MediaRootGoogleCloudStorage(GoogleCloudStorage):
     location = "media"
     file_overwrite = False
+
+
+class ImportsGoogleCloudStorage(GoogleCloudStorage):
+    location = "private"
+    default_acl = "private"
+    file_overwrite = False
+
+
+class StatementsGoogleCloudStorage(GoogleCloudStorage):
+    location = "private"
+    default_acl = "private"
+    file_overwrite = False
@@ -0,0 +1,41 @@
+"""
+Version numbers kept in the cache, for expiring whatever is derived from them.
+
+Cached values are stored under keys that include a version number, and
+bumping the version makes every one of them unreachable at once. A version
+that has been culled or has expired is started again from the clock rather
+than from 1: a value cached under an old version must never look current
+again, and the clock (in microseconds) is always ahead of any version
+bumped since it was last seeded.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def clock():
+    return time.time_ns() // 1000
+
+
+def get_version(key):
+    """Return the version at `key`, seeding it from the clock if missing."""
+    version = cache.get(key)
+    if version is None:
+        seed = clock()
+        cache.add(key, seed, timeout=None)
+        version = cache.get(key, seed)
+    return version
+
+
+def bump_version(key):
+    """Move the version at `key` past every value cached under it."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Another process may have seeded the version since it went
+        # missing and cached a value under it; move past that one too.
+        if not cache.add(key, clock(), timeout=None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                pass
@@ -0,0 +1,57 @@
+"""
+Zip archives written as a stream of chunks.
+
+`zipfile.ZipFile` can write to a file it cannot seek in: it then puts each
+entry's sizes after its data instead of going back to fill them in. Writing
+into a `StreamBuffer` and draining it after every block therefore produces
+the archive piece by piece, without holding any entry whole in memory or
+spooling the archive to disk.
+"""
+import io
+import zipfile
+
+# Bytes read from a file at a time.
+CHUNK_SIZE = 64 * 1024
+
+
+class StreamBuffer(io.RawIOBase):
+    """
+    A write-only, unseekable file keeping what is written to it until it is
+    drained.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def zip_chunks(entries):
+    """
+    Yield a zip archive as bytes. `entries` is an iterable of ``(name in
+    the archive, content)``, the content being bytes or an iterable of byte
+    chunks. Entries are taken from `entries` one at a time, so a generator
+    can open each file only when its turn comes.
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in entries:
+            if isinstance(content, bytes):
+                archive.writestr(name, content)
+                yield buffer.drain()
+                continue
+            with archive.open(name, "w", force_zip64=True) as entry:
+                for chunk in content:
+                    entry.write(chunk)
+                    yield buffer.drain()
+    yield buffer.drain()
@@ -61,6 +61,7 @@ DJANGO_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django.forms",
 ]
 
@@ -224,6 +225,41 @@ ADMINS = [("""Michael Joseph""", "info@afp-fmc-camh.ca")]
 # https://docs.djangoproject.com/en/dev/ref/settings/#managers
 MANAGERS = ADMINS
 
+# CLAIMS
+# ------------------------------------------------------------------------------
+# Seconds a process trusts its lookup table snapshot before re-checking the
+# shared version in the cache (see afp/claims/lookups.py).
+LOOKUP_SNAPSHOT_CHECK_INTERVAL = env.int(
+    "LOOKUP_SNAPSHOT_CHECK_INTERVAL", default=5
+)
+# Identifies the deployed release, so that browsers revalidate pages rendered
+# by an older one. Cloud Run sets K_REVISION.
+RELEASE = env("K_REVISION", default="")
+# Seconds a physician's rendered claim list page is kept in the cache (see
+# afp/claims/pagecache.py).
+CLAIM_PAGE_CACHE_TIMEOUT = env.int(
+    "CLAIM_PAGE_CACHE_TIMEOUT", default=60 * 60 * 24
+)
+# Seconds a saved claim must age before the claims API or an incremental
+# snapshot sends it, so that every transaction stamped before it has
+# committed (see afp/claims/api.py).
+CLAIM_SYNC_DELAY = env.int("CLAIM_SYNC_DELAY", default=60)
+# Storage class of uploaded CSV import files; the default storage if unset
+# (see afp/claims/jobs.py).
+CLAIM_IMPORT_STORAGE = None
+# Storage class of generated annual statements; the default storage if unset
+# (see afp/claims/statements.py).
+CLAIM_STATEMENT_STORAGE = None
+# Whether a `process_imports` worker runs the queued CSV imports. Until one
+# is deployed, the admin runs each import in the request that uploads or
+# resumes it (see afp/claims/jobs.py).
+CLAIM_IMPORT_WORKER = env.bool("CLAIM_IMPORT_WORKER", default=False)
+# Seconds the import worker sleeps when the queue is empty.
+CLAIM_IMPORT_POLL_INTERVAL = env.int("CLAIM_IMPORT_POLL_INTERVAL", default=5)
+# Seconds after its last checkpoint that a running import is assumed to have
+# lost its worker and is resumed by another.
+CLAIM_IMPORT_STALE_AFTER = env.int("CLAIM_IMPORT_STALE_AFTER", default=15 * 60)
+
 # LOGGING
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#logging
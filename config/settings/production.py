@@ -48,6 +48,22 @@ DATABASES["default"]["CONN_MAX_AGE"] = env.int(
 
 # CACHES
 # ------------------------------------------------------------------------------
+# https://docs.djangoproject.com/en/dev/topics/cache/#database-caching
+# Shared by every Cloud Run instance so cache-based invalidation (e.g. the
+# lookup snapshot version) reaches all of them. Run `createcachetable` on
+# deploy.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "django_cache",
+        # Cached pages are kept per physician and claim section, so the
+        # default of 300 entries would cull (and reset) the shared
+        # version keys every few minutes.
+        "OPTIONS": {
+            "MAX_ENTRIES": env.int("DJANGO_CACHE_MAX_ENTRIES", default=50000),
+        },
+    }
+}
 #CACHES = {
 #    "default": {
 #        "BACKEND": "django_redis.cache.RedisCache",
@@ -98,6 +114,10 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 # ------------------------------------------------------------------------------
 DEFAULT_FILE_STORAGE = "afp.utils.storages.MediaRootGoogleCloudStorage"
 MEDIA_URL = f"https://storage.googleapis.com/{GS_BUCKET_NAME}/media/"
+# Uploaded registry files hold physician data, so keep them private.
+CLAIM_IMPORT_STORAGE = "afp.utils.storages.ImportsGoogleCloudStorage"
+# Statements hold reviewers' comments, so keep them private too.
+CLAIM_STATEMENT_STORAGE = "afp.utils.storages.StatementsGoogleCloudStorage"
 
 # EMAIL
 # ------------------------------------------------------------------------------